@@ -0,0 +1,88 @@
+"""
+Teste de carga: centenas de reservas concorrentes disputando poucos horários.
+Ao final confere no banco que nenhum profissional ficou com horários sobrepostos
+e informa as reservas por segundo.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_agendamento_concorrente
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+# Banco temporário, para não tocar no banco de desenvolvimento
+ARQUIVO_BANCO = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', f'sqlite:///{ARQUIVO_BANCO}')
+
+from src import create_app, db
+from src.models.profissional_models import Profissional_model
+from src.models.servico_models import Servico_model
+from src.models.usuario_models import Usuario_model
+from src.services.agendamento_services import AgendamentoService
+
+app = create_app()
+
+TOTAL_RESERVAS = 400
+THREADS = 32
+TOTAL_PROFISSIONAIS = 3
+DIAS = 2
+HORARIOS = [datetime.min.replace(hour=h, minute=m).time()
+            for h in (9, 10, 11, 13, 14, 15, 16, 17, 18, 19) for m in (0, 30)]
+
+# Pares sobrepostos de agendamentos ativos do mesmo profissional
+CONSULTA_SOBREPOSICOES = db.text("""
+    SELECT COUNT(*) FROM tb_agendamento a
+    JOIN tb_agendamento b
+      ON a.id_profissional = b.id_profissional AND a.id < b.id
+     AND a.dt_atendimento < b.dt_fim AND b.dt_atendimento < a.dt_fim
+    WHERE a.status != 'cancelado' AND b.status != 'cancelado'
+""")
+
+
+def popular_banco():
+    db.create_all()
+    db.session.add_all([
+        Servico_model(descricao='Barba', valor=30, horario_duracao=30),
+        Servico_model(descricao='Corte Tesoura', valor=50, horario_duracao=60),
+        Usuario_model(nome='bench', email='bench@bench', senha='x', telefone='0'),
+    ])
+    db.session.add_all(Profissional_model(nome=f'prof {i}') for i in range(TOTAL_PROFISSIONAIS))
+    db.session.commit()
+
+
+def reservar(semente):
+    aleatorio = random.Random(semente)
+    dia = date.today() + timedelta(days=aleatorio.randint(1, DIAS))
+    with app.app_context():
+        resultado = AgendamentoService.criar_agendamento(
+            datetime.combine(dia, aleatorio.choice(HORARIOS)), 1,
+            aleatorio.randint(1, TOTAL_PROFISSIONAIS),
+            aleatorio.sample([1, 2], aleatorio.randint(1, 2)))
+    if resultado.get('sucesso'):
+        return 'reservado'
+    return 'erro interno' if 'Erro interno' in resultado['erro'] else 'recusado'
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        popular_banco()
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as threads:
+        resultados = Counter(threads.map(reservar, range(TOTAL_RESERVAS)))
+    duracao = time.perf_counter() - inicio
+
+    with app.app_context():
+        sobreposicoes = db.session.execute(CONSULTA_SOBREPOSICOES).scalar()
+
+    print(f'{TOTAL_RESERVAS} tentativas, {THREADS} threads, {TOTAL_PROFISSIONAIS} profissionais x {DIAS} dias')
+    print(f'{TOTAL_RESERVAS / duracao:8.1f} tentativas/s   {resultados["reservado"] / duracao:8.1f} reservas/s   '
+          f'{dict(resultados)}')
+    print(f'sobreposições: {sobreposicoes}')
+    sys.exit(1 if sobreposicoes else 0)
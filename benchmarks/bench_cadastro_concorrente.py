@@ -0,0 +1,109 @@
+"""
+Benchmark: cadastros concorrentes com emails repetidos.
+Compara o fluxo antigo (consulta o email e depois insere) com o cadastro que
+depende só da constraint UNIQUE, e confere que cada email foi aceito exatamente uma vez:
+as demais tentativas recebem 400 e o banco tem uma única linha por email.
+Termina com erro (código 1) se a conferência falhar.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_cadastro_concorrente
+"""
+
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# Banco temporário e hash barato, para medir o caminho do banco e não o pbkdf2
+ARQUIVO_BANCO = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{ARQUIVO_BANCO}'
+os.environ.setdefault('PBKDF2_ROUNDS', '1000')
+os.environ.setdefault('SENHA_PROCESSOS', '0')
+
+from src import create_app, db
+from src.entities.usuario_entitie import Usuario
+from src.models.usuario_models import Usuario_model
+from src.services import usuario_services
+
+app = create_app()
+
+# Cenários: (nome, emails distintos, tentativas por email, threads)
+CENARIOS = [
+    ('distintos', 500, 1, 16),   # cadastros normais
+    ('repetidos', 100, 5, 16),   # mesmo email enviado várias vezes ao mesmo tempo
+    ('um-email', 1, 32, 32),     # todas as threads largam juntas com o mesmo email
+]
+
+
+def cadastro_com_consulta(email):
+    # Fluxo anterior: duas idas ao banco e uma janela entre a consulta e o INSERT
+    with app.app_context():
+        if usuario_services.listar_usuario_email(email):
+            return email, 400
+        try:
+            usuario_services.cadastrar_usuario(Usuario('bench', email, '0000', 'senha'))
+            return email, 201
+        except usuario_services.EmailJaCadastradoError:
+            return email, 400
+
+
+def cadastro_atomico(email):
+    with app.app_context():
+        try:
+            usuario_services.cadastrar_usuario(Usuario('bench', email, '0000', 'senha'))
+            return email, 201
+        except usuario_services.EmailJaCadastradoError:
+            return email, 400
+
+
+# Cada email aceito exatamente uma vez (201), as outras tentativas recusadas (400), uma linha no banco por email
+def conferir(nome, respostas, emails):
+    aceitos = Counter(email for email, status in respostas if status == 201)
+    recusados = Counter(email for email, status in respostas if status == 400)
+    tentativas = Counter(emails)
+    falhas = [email for email in tentativas
+              if aceitos[email] != 1 or recusados[email] != tentativas[email] - 1]
+    with app.app_context():
+        linhas = Counter(db.session.execute(
+            db.select(Usuario_model.email).where(Usuario_model.email.like(f'{nome}-%'))).scalars())
+    falhas += [email for email in tentativas if linhas[email] != 1]
+    if falhas:
+        raise RuntimeError(f'{nome}: {len(set(falhas))} emails sem exatamente um cadastro (ex.: {falhas[0]})')
+    return aceitos
+
+
+def medir(nome, funcao, emails_distintos, tentativas, total_threads):
+    emails = [f'{nome}-{i}@bench' for i in range(emails_distintos)] * tentativas
+    largada = threading.Barrier(total_threads)
+    local = threading.local()
+
+    def tentar(email):
+        # A primeira tentativa de cada thread sai junto com as outras, para os INSERTs disputarem a mesma chave
+        if not getattr(local, 'largou', False):
+            local.largou = True
+            try:
+                largada.wait(timeout=1)
+            except threading.BrokenBarrierError:
+                pass
+        return funcao(email)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(total_threads) as threads:
+        respostas = list(threads.map(tentar, emails))
+    duracao = time.perf_counter() - inicio
+
+    aceitos = conferir(nome, respostas, emails)
+    print(f'{nome:<24} {len(emails) / duracao:8.1f} requisições/s   '
+          f'{sum(aceitos.values())} aceitos, {len(emails) - sum(aceitos.values())} recusados')
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        db.create_all()
+    for cenario, emails_distintos, tentativas, total_threads in CENARIOS:
+        print(f'{cenario}: {emails_distintos} emails x {tentativas} tentativas, {total_threads} threads')
+        medir(f'{cenario}/consulta', cadastro_com_consulta, emails_distintos, tentativas, total_threads)
+        medir(f'{cenario}/atomico', cadastro_atomico, emails_distintos, tentativas, total_threads)
+    print('conferência ok: cada email cadastrado exatamente uma vez')
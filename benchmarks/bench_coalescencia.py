@@ -0,0 +1,86 @@
+"""
+Benchmark: rajadas de chamadas simultâneas a listar_horarios_disponiveis para o mesmo
+profissional e dia (a agenda acabou de abrir), com e sem a coalescência (single-flight).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_coalescencia
+"""
+
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+# Banco temporário, para não tocar no banco de desenvolvimento (BENCH_DATABASE_URL usa outro banco de testes)
+ARQUIVO_BANCO = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', f'sqlite:///{ARQUIVO_BANCO}')
+
+from sqlalchemy import event
+
+from benchmarks.carga.gerador import popular
+from src import create_app, db
+from src.services.agendamento_services import AgendamentoService, horarios_coalescedor, ocupacao_cache
+from src.services.coalescencia import chamadas_coalescidas
+
+CHAMADAS_POR_RAJADA = 32
+RAJADAS = 50
+
+app = create_app({'SENHA_PROCESSOS': 0})
+
+
+def rajadas(nome, funcao, validade):
+    app.config['DISPONIBILIDADE_COALESCENCIA_SEGUNDOS'] = validade
+    consultas = [0]
+    latencias = []
+    lock = threading.Lock()
+
+    def contar(*args):
+        with lock:
+            consultas[0] += 1
+
+    def cliente(barreira, id_profissional, dia):
+        with app.app_context():
+            barreira.wait()
+            inicio = time.perf_counter()
+            resultado = funcao(id_profissional, dia)
+            duracao = time.perf_counter() - inicio
+            assert resultado.get('sucesso'), resultado
+            with lock:
+                latencias.append(duracao)
+
+    antes = {r: chamadas_coalescidas.valor(nome=horarios_coalescedor.nome, resultado=r)
+             for r in ('executada', 'compartilhada', 'recente')}
+    event.listen(db.engine, 'before_cursor_execute', contar)
+    inicio = time.perf_counter()
+    for rajada in range(RAJADAS):
+        # Cada rajada em um profissional/dia diferente, com o cache de ocupação frio (a agenda acabou de abrir)
+        id_profissional, dia = rajada % 5 + 1, date.today() + timedelta(days=rajada // 5 + 1)
+        ocupacao_cache.invalidar()
+        horarios_coalescedor.invalidar()
+        barreira = threading.Barrier(CHAMADAS_POR_RAJADA)
+        threads = [threading.Thread(target=cliente, args=(barreira, id_profissional, dia))
+                   for _ in range(CHAMADAS_POR_RAJADA)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    total = time.perf_counter() - inicio
+    event.remove(db.engine, 'before_cursor_execute', contar)
+
+    depois = {r: chamadas_coalescidas.valor(nome=horarios_coalescedor.nome, resultado=r) - antes[r] for r in antes}
+    chamadas = RAJADAS * CHAMADAS_POR_RAJADA
+    reaproveitadas = depois['compartilhada'] + depois['recente']
+    latencias.sort()
+    print(f'{nome:<36} {chamadas / total:8.0f} ch/s   p50 {latencias[len(latencias) // 2] * 1000:6.2f} ms   '
+          f'p99 {latencias[int(len(latencias) * 0.99)] * 1000:6.2f} ms   '
+          f'{consultas[0] / chamadas:5.2f} consultas/ch   reaproveitadas {reaproveitadas / chamadas:6.1%}')
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        popular(10000)
+        print(f'{RAJADAS} rajadas de {CHAMADAS_POR_RAJADA} chamadas simultâneas (mesmo profissional e dia)')
+        rajadas('sem coalescência', AgendamentoService._calcular_horarios_disponiveis, 0)
+        rajadas('single-flight (janela 0 s)', AgendamentoService.listar_horarios_disponiveis, 0)
+        rajadas('single-flight + janela de 1 s', AgendamentoService.listar_horarios_disponiveis, 1.0)
@@ -0,0 +1,88 @@
+"""
+Benchmark: disponibilidade profissional a profissional, dia a dia (uma chamada por par)
+contra a consulta em lote de listar_horarios_disponiveis_lote.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_disponibilidade
+"""
+
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+# Banco temporário, para não tocar no banco de desenvolvimento (BENCH_DATABASE_URL usa outro banco de testes)
+ARQUIVO_BANCO = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', f'sqlite:///{ARQUIVO_BANCO}')
+
+from src import create_app, db
+from src.models.agendamento_models import Agendamento_model
+from src.models.profissional_models import Profissional_model
+from src.models.servico_models import Servico_model
+from src.models.usuario_models import Usuario_model
+from src.services.agendamento_services import AgendamentoService, horarios_coalescedor, ocupacao_cache
+
+app = create_app()
+
+TOTAL_PROFISSIONAIS = 20
+TOTAL_DIAS = 14
+AGENDAMENTOS_POR_DIA = 8
+REPETICOES = 5
+
+
+def popular_banco():
+    random.seed(42)
+    db.create_all()
+    servico = Servico_model(descricao='Corte Tesoura', valor=50, horario_duracao=60)
+    usuario = Usuario_model(nome='bench', email='bench@bench', senha='x', telefone='0')
+    db.session.add_all([servico, usuario])
+    db.session.add_all(Profissional_model(nome=f'prof {i}') for i in range(TOTAL_PROFISSIONAIS))
+    db.session.flush()
+
+    hoje = date.today()
+    for id_profissional in range(1, TOTAL_PROFISSIONAIS + 1):
+        for dia in range(TOTAL_DIAS):
+            horas = random.sample([9, 10, 11, 13, 14, 15, 16, 17, 18, 19], AGENDAMENTOS_POR_DIA)
+            for hora in horas:
+                inicio = datetime.combine(hoje + timedelta(days=dia), datetime.min.time()).replace(hour=hora)
+                db.session.add(Agendamento_model(
+                    dt_atendimento=inicio, dt_fim=inicio + timedelta(minutes=60),
+                    id_user=usuario.id, id_profissional=id_profissional,
+                    id_servico=servico.id, valor_total=50))
+    db.session.commit()
+
+
+def medir(nome, funcao):
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    print(f'{nome:<40} melhor {min(tempos) * 1000:8.1f} ms   média {sum(tempos) / len(tempos) * 1000:8.1f} ms')
+
+
+def por_chamada():
+    ocupacao_cache.invalidar()  # Mede o caminho que vai ao banco, não o cache
+    horarios_coalescedor.invalidar()
+    hoje = date.today()
+    for id_profissional in range(1, TOTAL_PROFISSIONAIS + 1):
+        for dia in range(TOTAL_DIAS):
+            AgendamentoService.listar_horarios_disponiveis(id_profissional, hoje + timedelta(days=dia))
+
+
+def em_lote(formato):
+    hoje = date.today()
+    resultado = AgendamentoService.listar_horarios_disponiveis_lote(
+        None, hoje, hoje + timedelta(days=TOTAL_DIAS - 1), formato)
+    assert resultado.get('sucesso'), resultado
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        popular_banco()
+        print(f'{TOTAL_PROFISSIONAIS} profissionais x {TOTAL_DIAS} dias '
+              f'({TOTAL_PROFISSIONAIS * TOTAL_DIAS * AGENDAMENTOS_POR_DIA} agendamentos)')
+        medir('uma chamada por profissional/dia', por_chamada)
+        medir('lote (bits)', lambda: em_lote('bits'))
+        medir('lote (intervalos)', lambda: em_lote('intervalos'))
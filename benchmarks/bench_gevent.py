@@ -0,0 +1,125 @@
+"""
+Benchmark: carga HTTP no servidor gevent (servidor_gevent.py) contra o servidor
+do werkzeug com uma thread por requisição (como o app.run).
+Cada servidor roda em um processo separado sobre o mesmo banco temporário.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_gevent
+"""
+
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+CONCORRENCIA = 32
+REQUISICOES_POR_CLIENTE = 60
+PORTA_GEVENT = 8301
+PORTA_THREADS = 8302
+
+
+def servir_com_threads():
+    import logging
+    from werkzeug.serving import make_server
+    from src import create_app
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # sem log de acesso, como no gevent
+    make_server('127.0.0.1', PORTA_THREADS, create_app(), threaded=True).serve_forever()
+
+
+def iniciar_servidor(comando, porta):
+    import requests
+
+    ambiente = dict(os.environ, PORT=str(porta), HOST='127.0.0.1', GEVENT_LOG_ACESSO='0')
+    processo = subprocess.Popen(comando, env=ambiente)
+    for _ in range(100):
+        try:
+            requests.get(f'http://127.0.0.1:{porta}/disponibilidade', timeout=1)
+            return processo
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    processo.kill()
+    raise RuntimeError(f'servidor não respondeu na porta {porta}')
+
+
+def gerar_carga(porta, total_profissionais):
+    import requests
+
+    base = f'http://127.0.0.1:{porta}'
+    hoje = date.today()
+    latencias = []
+    falhas = [0]
+    lock = threading.Lock()
+
+    def cliente(semente):
+        aleatorio = random.Random(semente)
+        sessao = requests.Session()
+        medidas = []
+        for _ in range(REQUISICOES_POR_CLIENTE):
+            id_profissional = aleatorio.randint(1, total_profissionais)
+            dia = hoje + timedelta(days=aleatorio.randint(0, 13))
+            url = aleatorio.choice([
+                f'{base}/profissional/{id_profissional}/horarios?data={dia}',
+                f'{base}/disponibilidade?inicio={hoje}&fim={hoje + timedelta(days=6)}&profissionais={id_profissional}',
+                f'{base}/usuario/1/agendamentos?limite=20',
+            ])
+            inicio = time.perf_counter()
+            resposta = sessao.get(url)
+            medidas.append(time.perf_counter() - inicio)
+            if resposta.status_code != 200:
+                with lock:
+                    falhas[0] += 1
+        with lock:
+            latencias.extend(medidas)
+
+    clientes = [threading.Thread(target=cliente, args=(i,)) for i in range(CONCORRENCIA)]
+    inicio = time.perf_counter()
+    for thread in clientes:
+        thread.start()
+    for thread in clientes:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        'rps': len(latencias) / duracao,
+        'p50': latencias[len(latencias) // 2] * 1000,
+        'p99': latencias[int(len(latencias) * 0.99) - 1] * 1000,
+        'falhas': falhas[0],
+    }
+
+
+def main():
+    # Importado aqui: o módulo aponta DATABASE_URL para um banco temporário, herdado pelos servidores
+    from benchmarks.bench_disponibilidade import app, popular_banco, TOTAL_PROFISSIONAIS
+
+    with app.app_context():
+        popular_banco()
+
+    servidores = [
+        ('threads (werkzeug)', [sys.executable, '-m', 'benchmarks.bench_gevent', '--servidor-threads'], PORTA_THREADS),
+        ('gevent', [sys.executable, 'servidor_gevent.py'], PORTA_GEVENT),
+    ]
+
+    print(f'{CONCORRENCIA} clientes x {REQUISICOES_POR_CLIENTE} requisições')
+    for nome, comando, porta in servidores:
+        processo = iniciar_servidor(comando, porta)
+        try:
+            gerar_carga(porta, TOTAL_PROFISSIONAIS)  # aquecimento (caches e pool de conexões)
+            resultado = gerar_carga(porta, TOTAL_PROFISSIONAIS)
+        finally:
+            processo.send_signal(signal.SIGTERM)
+            codigo = processo.wait(timeout=30)
+        print(f"{nome:<20} {resultado['rps']:8.1f} req/s   p50 {resultado['p50']:7.1f} ms   "
+              f"p99 {resultado['p99']:7.1f} ms   falhas {resultado['falhas']}   saída {codigo}")
+
+
+if __name__ == '__main__':
+    if '--servidor-threads' in sys.argv:
+        servir_com_threads()
+    else:
+        main()
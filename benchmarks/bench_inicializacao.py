@@ -0,0 +1,55 @@
+"""
+Benchmark: tempo de inicialização a frio
+- worker: importar app.py (create_app) e atender a primeira requisição
+- testes: create_app com SQLite em memória, criar as tabelas e atender a primeira requisição
+
+Cada medição roda em um processo Python novo. Termina com código 1 se a mediana passar do alvo.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_inicializacao
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+
+REPETICOES = 5
+
+# Alvos de tempo (mediana) para a inicialização a frio, em milissegundos
+ALVO_WORKER_MS = 1200
+ALVO_TESTES_MS = 1200
+
+CODIGO_WORKER = """
+from app import app
+app.test_client().get('/disponibilidade')
+"""
+
+CODIGO_TESTES = """
+from src import create_app, db
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+with app.app_context():
+    db.create_all()
+    app.test_client().get('/usuario')
+"""
+
+
+def medir(codigo):
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, '-c', codigo], check=True)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+if __name__ == '__main__':
+    # Referência: só subir o interpretador
+    base = medir('pass')
+    dentro_do_alvo = True
+    for nome, codigo, alvo in [('worker', CODIGO_WORKER, ALVO_WORKER_MS), ('testes', CODIGO_TESTES, ALVO_TESTES_MS)]:
+        mediana = medir(codigo)
+        dentro_do_alvo &= mediana <= alvo
+        print(f'{nome:<8} mediana {mediana:7.1f} ms (interpretador {base:5.1f} ms)   alvo {alvo} ms   '
+              f'{"ok" if mediana <= alvo else "ACIMA DO ALVO"}')
+    sys.exit(0 if dentro_do_alvo else 1)
@@ -0,0 +1,81 @@
+"""
+Benchmark: leituras e agendamentos concorrentes em cada perfil de banco (PERFIL_BANCO).
+Cada perfil roda em um processo separado, já que o engine é criado na importação do app.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_perfis_banco [perfil ...]
+
+O perfil mysql só é medido quando MYSQL_URL aponta para um banco de testes.
+"""
+
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+THREADS = 16
+OPERACOES_POR_THREAD = 100
+PERCENTUAL_AGENDAMENTOS = 20  # o restante são leituras
+
+
+def executar_carga():
+    # Importado aqui: o módulo aponta DATABASE_URL para um banco temporário antes de carregar o app
+    from benchmarks.bench_disponibilidade import app, popular_banco, TOTAL_PROFISSIONAIS
+    from src.services.agendamento_services import AgendamentoService
+
+    with app.app_context():
+        popular_banco()
+
+    contagem = {'leituras': 0, 'agendamentos': 0, 'recusados': 0, 'erros': 0}
+    lock = threading.Lock()
+
+    def trabalhador(semente):
+        aleatorio = random.Random(semente)
+        for _ in range(OPERACOES_POR_THREAD):
+            with app.app_context():
+                if aleatorio.randrange(100) < PERCENTUAL_AGENDAMENTOS:
+                    dia = date.today() + timedelta(days=aleatorio.randint(15, 60))
+                    hora = aleatorio.choice([9, 10, 11, 13, 14, 15, 16, 17, 18, 19])
+                    resultado = AgendamentoService.criar_agendamento(
+                        datetime.combine(dia, datetime.min.time()).replace(hour=hora),
+                        1, aleatorio.randint(1, TOTAL_PROFISSIONAIS), [1])
+                    tipo = 'agendamentos' if resultado.get('sucesso') else (
+                        'erros' if 'Erro interno' in resultado.get('erro', '') else 'recusados')
+                else:
+                    AgendamentoService.listar_agendamentos_usuario(1, limite=50)
+                    AgendamentoService.listar_horarios_disponiveis_lote(
+                        [aleatorio.randint(1, TOTAL_PROFISSIONAIS)], date.today(), date.today() + timedelta(days=6))
+                    tipo = 'leituras'
+            with lock:
+                contagem[tipo] += 1
+
+    threads = [threading.Thread(target=trabalhador, args=(i,)) for i in range(THREADS)]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+
+    total = THREADS * OPERACOES_POR_THREAD
+    print(f"{os.environ['PERFIL_BANCO']:<16} {total / duracao:8.1f} op/s   "
+          f"leituras {contagem['leituras']}, agendados {contagem['agendamentos']}, "
+          f"recusados {contagem['recusados']}, erros {contagem['erros']}")
+
+
+if __name__ == '__main__':
+    if os.environ.get('BENCH_PERFIL_FILHO'):
+        executar_carga()
+        sys.exit()
+
+    perfis = sys.argv[1:] or ['sqlite-padrao', 'sqlite'] + (['mysql'] if os.getenv('MYSQL_URL') else [])
+    print(f'{THREADS} threads x {OPERACOES_POR_THREAD} operações ({PERCENTUAL_AGENDAMENTOS}% agendamentos)')
+    for perfil in perfis:
+        ambiente = dict(os.environ, PERFIL_BANCO=perfil, BENCH_PERFIL_FILHO='1')
+        ambiente.pop('BENCH_DATABASE_URL', None)
+        if perfil == 'mysql':
+            ambiente['BENCH_DATABASE_URL'] = os.environ['MYSQL_URL']
+        subprocess.run([sys.executable, '-m', 'benchmarks.bench_perfis_banco'], env=ambiente, check=True)
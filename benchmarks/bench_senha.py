@@ -0,0 +1,54 @@
+"""
+Benchmark: cadastros de usuário por segundo com o hash da senha na própria
+thread (SENHA_PROCESSOS=0) e no pool de processos.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_senha
+"""
+
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Banco temporário, para não tocar no banco de desenvolvimento
+ARQUIVO_BANCO = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{ARQUIVO_BANCO}'
+
+from src import create_app, db
+from src.entities.usuario_entitie import Usuario
+from src.services import senha_services, usuario_services
+
+app = create_app()
+
+TOTAL_CADASTROS = 200
+THREADS = 16
+
+
+def cadastrar(indice, prefixo):
+    with app.app_context():
+        usuario_services.cadastrar_usuario(
+            Usuario(f'usuario {indice}', f'{prefixo}{indice}@bench', '0000', 'senha-forte'))
+
+
+def medir(nome, processos):
+    app.config['SENHA_PROCESSOS'] = processos
+    with app.app_context():
+        senha_services.gerar_hash('aquecimento')  # cria o pool fora da medição
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as threads:
+        list(threads.map(cadastrar, range(TOTAL_CADASTROS), [nome] * TOTAL_CADASTROS))
+    duracao = time.perf_counter() - inicio
+    print(f'{nome:<28} {TOTAL_CADASTROS / duracao:8.1f} cadastros/s')
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        db.create_all()
+    print(f'{TOTAL_CADASTROS} cadastros, {THREADS} threads, {app.config["PBKDF2_ROUNDS"]} rounds, '
+          f'{os.cpu_count()} CPUs')
+    medir('hash na thread', 0)
+    medir('pool de processos', os.cpu_count())
+    with app.app_context():
+        senha_services.encerrar()
@@ -0,0 +1,74 @@
+"""
+Benchmark: 10 mil usuários serializados pelo marshmallow (objetos do modelo + json.dumps)
+contra o serializador compilado (tuplas de colunas -> bytes JSON).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_serializacao
+"""
+
+import json
+import os
+import tempfile
+import time
+
+# Banco temporário, para não tocar no banco de desenvolvimento
+ARQUIVO_BANCO = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', f'sqlite:///{ARQUIVO_BANCO}')
+
+from src import create_app, db
+from src.models.usuario_models import Usuario_model
+from src.schemas import serializadores
+from src.schemas.usuario_schemas import UsuarioSchema, usuario_serializador
+
+app = create_app()
+
+TOTAL_USUARIOS = 10_000
+REPETICOES = 5
+
+
+def popular_banco():
+    db.create_all()
+    db.session.execute(db.insert(Usuario_model), [
+        {'nome': f'usuario {i}', 'email': f'usuario{i}@bench', 'telefone': f'55119{i:08d}',
+         'senha': '$pbkdf2-sha256$29000$c2FsdA$' + 'x' * 43}
+        for i in range(TOTAL_USUARIOS)
+    ])
+    db.session.commit()
+
+
+def medir(nome, funcao):
+    tempos = []
+    for _ in range(REPETICOES):
+        db.session.expunge_all()  # cada repetição carrega os objetos de novo
+        inicio = time.perf_counter()
+        corpo = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    print(f'{nome:<46} melhor {min(tempos) * 1000:8.1f} ms   média {sum(tempos) / len(tempos) * 1000:8.1f} ms'
+          f'   {len(corpo) / 1024:6.0f} KB')
+    return min(tempos)
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        popular_banco()
+        usuarios = Usuario_model.query.order_by(Usuario_model.id).all()
+        linhas = db.session.execute(
+            db.select(*[getattr(Usuario_model, c) for c in usuario_serializador.colunas]).order_by(Usuario_model.id)
+        ).all()
+
+        print(f'{TOTAL_USUARIOS} usuários, codificador: {"orjson" if serializadores.orjson else "json (stdlib)"}')
+        print('-- só serialização (dados já carregados)')
+        marshmallow = medir('marshmallow: schema.dump + json.dumps',
+                            lambda: json.dumps(UsuarioSchema().dump(usuarios, many=True)).encode())
+        compilado = medir('compilado: json_lista(tuplas)', lambda: usuario_serializador.json_lista(linhas))
+        print(f'{"":<46} {marshmallow / compilado:.1f}x mais rápido')
+
+        print('-- consulta + serialização')
+        marshmallow = medir('marshmallow: query.all + dump',
+                            lambda: json.dumps(UsuarioSchema().dump(
+                                Usuario_model.query.order_by(Usuario_model.id).all(), many=True)).encode())
+        compilado = medir('compilado: select(colunas) + json_lista',
+                          lambda: usuario_serializador.json_lista(db.session.execute(
+                              db.select(*[getattr(Usuario_model, c) for c in usuario_serializador.colunas])
+                              .order_by(Usuario_model.id)).all()))
+        print(f'{"":<46} {marshmallow / compilado:.1f}x mais rápido')
@@ -0,0 +1,11 @@
+"""
+Suíte de benchmarks de carga sobre SQLite local
+- gerador: popula usuários, profissionais, serviços e agendamentos em escalas configuráveis
+- medicao: latência (p50/p95/p99), vazão e consultas por operação
+- operacoes: agendar, consultar disponibilidade, listar usuários/agendamentos e cancelar,
+  pelos serviços e pelo test client do Flask
+
+Uso (na raiz do projeto):
+    python -m benchmarks.carga --escala 1k --salvar base.json
+    python -m benchmarks.carga --escala 1k --comparar base.json
+"""
@@ -0,0 +1,76 @@
+import argparse
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+
+def ler_argumentos():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.carga',
+                                     description='Benchmarks de agenda e usuários sobre SQLite local')
+    parser.add_argument('--escala', default='1k', help='1k, 10k, 100k, 1m ou um número de agendamentos')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--repeticoes', type=int, default=200, help='execuções medidas de cada operação')
+    parser.add_argument('--banco', help='arquivo SQLite reaproveitado entre execuções (populado se estiver vazio)')
+    parser.add_argument('--operacoes', help='nomes separados por vírgula (padrão: todas)')
+    parser.add_argument('--salvar', metavar='ARQUIVO', help='salva os resultados como linha de base (JSON)')
+    parser.add_argument('--comparar', metavar='ARQUIVO', help='compara com uma linha de base salva')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help='regressão aceita no p95 (0.2 = 20%%)')
+    return parser.parse_args()
+
+
+def main():
+    args = ler_argumentos()
+    from benchmarks.carga.gerador import ESCALAS
+    total_agendamentos = ESCALAS.get(args.escala.lower()) or int(args.escala)
+
+    # O banco precisa estar definido antes de importar o app
+    arquivo = args.banco or os.path.join(tempfile.mkdtemp(), 'carga.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(arquivo)}'
+
+    from src import create_app, db
+    from benchmarks.carga import gerador, medicao
+    from benchmarks.carga.operacoes import Operacoes
+
+    app = create_app({'SENHA_PROCESSOS': 0})
+    with app.app_context():
+        dims = gerador.dimensoes_existentes()
+        if dims is None:
+            inicio = time.perf_counter()
+            dims = gerador.popular(total_agendamentos, args.semente)
+            print(f'banco populado em {time.perf_counter() - inicio:.1f}s: {arquivo}')
+        contador = medicao.ContadorConsultas(db.engine)
+
+    print(f"{dims['agendamentos']} agendamentos, {dims['usuarios']} usuários, "
+          f"{dims['profissionais']} profissionais, {dims['dias']} dias; {args.repeticoes} execuções por operação\n")
+
+    operacoes = Operacoes(app, dims, args.semente).todas()
+    if args.operacoes:
+        operacoes = {nome: operacoes[nome] for nome in args.operacoes.split(',')}
+
+    resultados = {nome: medicao.medir(funcao, args.repeticoes, contador) for nome, funcao in operacoes.items()}
+    medicao.imprimir(resultados)
+
+    if args.salvar:
+        medicao.salvar(args.salvar, {
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'semente': args.semente,
+            'dimensoes': dims,
+            'operacoes': resultados,
+        })
+        print(f'\nlinha de base salva em {args.salvar}')
+
+    if args.comparar:
+        regressoes = medicao.comparar(args.comparar, resultados, args.tolerancia)
+        if regressoes:
+            print(f"\nregressões: {', '.join(regressoes)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
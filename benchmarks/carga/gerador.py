@@ -0,0 +1,133 @@
+"""
+Gerador de dados com semente fixa: a mesma escala e semente produzem sempre o mesmo banco
+"""
+
+import math
+import random
+from datetime import date, datetime, timedelta
+from passlib.hash import pbkdf2_sha256
+from src import db
+from src.models.agendamento_models import Agendamento_model
+from src.models.profissional_models import Profissional_model
+from src.models.servico_models import Servico_model
+from src.models.usuario_models import Usuario_model
+
+# Total de agendamentos de cada escala
+ESCALAS = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+HORAS = [9, 10, 11, 13, 14, 15, 16, 17, 18, 19]  # início de cada atendimento (serviços de até 60 min)
+AGENDAMENTOS_POR_DIA = 8                          # por profissional, deixando horários livres
+TOTAL_SERVICOS = 10
+NOMES = ('Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Heitor', 'Isabela', 'João',
+         'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Thiago', 'Vitória', 'William')
+SOBRENOMES = ('Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima',
+              'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes')
+TAMANHO_LOTE = 10_000
+
+
+def dimensoes(total_agendamentos):
+    """
+    Quantidade de registros de cada tabela para um total de agendamentos.
+    """
+    profissionais = max(5, total_agendamentos // 5_000)
+    return {
+        'agendamentos': total_agendamentos,
+        'usuarios': max(100, total_agendamentos // 10),
+        'profissionais': profissionais,
+        'servicos': TOTAL_SERVICOS,
+        'dias': math.ceil(total_agendamentos / (profissionais * AGENDAMENTOS_POR_DIA)),
+    }
+
+
+def _inserir_em_lotes(modelo, linhas):
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) == TAMANHO_LOTE:
+            db.session.execute(db.insert(modelo), lote)
+            lote = []
+    if lote:
+        db.session.execute(db.insert(modelo), lote)
+
+
+def _agendamentos(aleatorio, dims, servicos, primeiro_dia):
+    agora = datetime.utcnow()
+    total = 0
+    for dia in range(dims['dias']):
+        data = primeiro_dia + timedelta(days=dia)
+        for id_profissional in range(1, dims['profissionais'] + 1):
+            for hora in aleatorio.sample(HORAS, AGENDAMENTOS_POR_DIA):
+                if total == dims['agendamentos']:
+                    return
+                total += 1
+
+                id_servico, duracao, valor = servicos[aleatorio.randrange(len(servicos))]
+                inicio = datetime.combine(data, datetime.min.time()).replace(hour=hora)
+                cancelado = aleatorio.random() < 0.1
+                if cancelado:
+                    status = 'cancelado'
+                else:
+                    status = 'finalizado' if inicio < agora else 'agendado'
+                yield {
+                    'dt_agendamento': inicio - timedelta(days=aleatorio.randint(1, 30)),
+                    'dt_atendimento': inicio,
+                    'dt_fim': inicio + timedelta(minutes=duracao),
+                    'id_user': aleatorio.randint(1, dims['usuarios']),
+                    'id_profissional': id_profissional,
+                    'id_servico': id_servico,
+                    'status': status,
+                    'valor_total': valor,
+                    'taxa_cancelamento': round(valor * 0.2, 2) if cancelado and aleatorio.random() < 0.5 else 0.0,
+                }
+
+
+def _usuarios(aleatorio, total, senha):
+    for i in range(1, total + 1):
+        nome = f'{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)}'
+        yield {'nome': nome, 'email': f'usuario{i}@carga.local', 'telefone': f'5511{i:09d}', 'senha': senha}
+
+
+def popular(total_agendamentos, semente=42):
+    """
+    Cria as tabelas e insere os dados da escala. Metade dos dias fica no passado
+    e metade no futuro, a partir de hoje. Retorna as dimensões geradas.
+    """
+    aleatorio = random.Random(semente)
+    dims = dimensoes(total_agendamentos)
+    db.create_all()
+
+    servicos = [(i + 1, 30 if i % 2 else 60, float(30 + 10 * i)) for i in range(dims['servicos'])]
+    _inserir_em_lotes(Servico_model, (
+        {'descricao': f'serviço {id}', 'valor': valor, 'horario_duracao': duracao}
+        for id, duracao, valor in servicos))
+
+    # Todos os usuários com o mesmo hash: o custo do pbkdf2 não entra na geração.
+    # Os nomes usam um gerador próprio para não mudar a sequência dos agendamentos
+    senha = pbkdf2_sha256.using(rounds=1000).hash('senha')
+    _inserir_em_lotes(Usuario_model, _usuarios(random.Random(semente + 1), dims['usuarios'], senha))
+
+    _inserir_em_lotes(Profissional_model, (
+        {'nome': f'profissional {i}'} for i in range(1, dims['profissionais'] + 1)))
+
+    primeiro_dia = date.today() - timedelta(days=dims['dias'] // 2)
+    _inserir_em_lotes(Agendamento_model, _agendamentos(aleatorio, dims, servicos, primeiro_dia))
+
+    db.session.commit()
+    dims['primeiro_dia'] = primeiro_dia.isoformat()
+    return dims
+
+
+def dimensoes_existentes():
+    """
+    Dimensões de um banco já populado (para reaproveitar um banco grande entre execuções),
+    ou None se o banco estiver vazio.
+    """
+    db.create_all()
+    total, primeiro = db.session.execute(
+        db.select(db.func.count(Agendamento_model.id), db.func.min(Agendamento_model.dt_atendimento))
+    ).one()
+    if not total:
+        return None
+    dims = dimensoes(total)
+    dims['primeiro_dia'] = primeiro.date().isoformat()
+    return dims
@@ -0,0 +1,95 @@
+"""
+Medição das operações: latência, vazão e consultas ao banco, e comparação com uma linha de base
+"""
+
+import json
+import time
+from sqlalchemy import event
+
+
+class ContadorConsultas:
+    """
+    Conta os comandos enviados ao banco pelo engine (before_cursor_execute).
+    """
+
+    def __init__(self, engine):
+        self.total = 0
+        event.listen(engine, 'before_cursor_execute', self._contar)
+
+    def _contar(self, *args):
+        self.total += 1
+
+
+def percentil(valores_ordenados, p):
+    indice = min(len(valores_ordenados) - 1, max(0, round(p / 100 * len(valores_ordenados)) - 1))
+    return valores_ordenados[indice]
+
+
+def medir(funcao, repeticoes, contador, aquecimento=5):
+    """
+    Executa funcao(i) `repeticoes` vezes e resume as medidas.
+    As primeiras execuções (aquecimento) só preenchem caches e não entram no resultado.
+    """
+    for i in range(aquecimento):
+        funcao(-1 - i)
+
+    tempos = []
+    consultas_antes = contador.total
+    inicio = time.perf_counter()
+    for i in range(repeticoes):
+        t0 = time.perf_counter()
+        funcao(i)
+        tempos.append(time.perf_counter() - t0)
+    duracao = time.perf_counter() - inicio
+
+    tempos.sort()
+    return {
+        'repeticoes': repeticoes,
+        'ops_por_segundo': round(repeticoes / duracao, 1),
+        'p50_ms': round(percentil(tempos, 50) * 1000, 3),
+        'p95_ms': round(percentil(tempos, 95) * 1000, 3),
+        'p99_ms': round(percentil(tempos, 99) * 1000, 3),
+        'consultas_por_op': round((contador.total - consultas_antes) / repeticoes, 2),
+    }
+
+
+def imprimir(resultados):
+    print(f"{'operação':<34} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'consultas':>10}")
+    for nome, r in resultados.items():
+        print(f"{nome:<34} {r['ops_por_segundo']:>9.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+              f"{r['p99_ms']:>9.2f} {r['consultas_por_op']:>10.2f}")
+
+
+def salvar(arquivo, dados):
+    with open(arquivo, 'w', encoding='utf-8') as saida:
+        json.dump(dados, saida, indent=2, ensure_ascii=False)
+
+
+def comparar(arquivo_base, resultados, tolerancia):
+    """
+    Compara com a linha de base salva e retorna as operações que regrediram:
+    p95 acima da tolerância (ex.: 0.2 = 20% mais lento) ou mais consultas por operação
+    (meia consulta de folga na média, para as revalidações periódicas dos caches).
+    """
+    with open(arquivo_base, encoding='utf-8') as entrada:
+        base = json.load(entrada)['operacoes']
+
+    regressoes = []
+    print(f"\ncomparação com {arquivo_base} (tolerância {tolerancia:.0%} no p95)")
+    print(f"{'operação':<34} {'p50':>9} {'p95':>9} {'ops/s':>9} {'consultas':>14}")
+    for nome, atual in resultados.items():
+        anterior = base.get(nome)
+        if not anterior:
+            print(f'{nome:<34} (sem linha de base)')
+            continue
+
+        def variacao(campo):
+            return (atual[campo] - anterior[campo]) / anterior[campo] if anterior[campo] else 0.0
+
+        regrediu = variacao('p95_ms') > tolerancia or atual['consultas_por_op'] > anterior['consultas_por_op'] + 0.5
+        if regrediu:
+            regressoes.append(nome)
+        print(f"{nome:<34} {variacao('p50_ms'):>+9.0%} {variacao('p95_ms'):>+9.0%} "
+              f"{variacao('ops_por_segundo'):>+9.0%} {anterior['consultas_por_op']:>6.2f} -> {atual['consultas_por_op']:<5.2f}"
+              f"{'  REGRESSÃO' if regrediu else ''}")
+    return regressoes
@@ -0,0 +1,123 @@
+"""
+Operações medidas: cada uma recebe o número da execução e faz uma chamada completa,
+pelos serviços (dentro de um contexto de app, como numa requisição) ou pelo test client
+"""
+
+import random
+from datetime import date, datetime, timedelta
+from src.services import usuario_services
+from . import gerador
+from src.services.agendamento_services import AgendamentoService
+
+
+class Operacoes:
+    def __init__(self, app, dims, semente=42):
+        self.app = app
+        self.cliente = app.test_client()
+        self.dims = dims
+        self.aleatorio = random.Random(semente)
+        self.primeiro_dia = date.fromisoformat(dims['primeiro_dia'])
+        self.agendados = []  # (id, id_user) criados por agendar, cancelados depois
+        self.recusados = 0
+
+    def _profissional(self):
+        return self.aleatorio.randint(1, self.dims['profissionais'])
+
+    def _usuario(self):
+        return self.aleatorio.randint(1, self.dims['usuarios'])
+
+    def _dia_populado(self):
+        return self.primeiro_dia + timedelta(days=self.aleatorio.randrange(self.dims['dias']))
+
+    # --- serviços ---
+
+    def agendar(self, i):
+        # Dias depois dos gerados: a maioria das reservas é aceita
+        dia = self.primeiro_dia + timedelta(days=self.dims['dias'] + self.aleatorio.randint(1, 90))
+        hora = self.aleatorio.choice([9, 10, 11, 13, 14, 15, 16, 17, 18, 19])
+        id_user = self._usuario()
+        with self.app.app_context():
+            resultado = AgendamentoService.criar_agendamento(
+                datetime.combine(dia, datetime.min.time()).replace(hour=hora),
+                id_user, self._profissional(), [self.aleatorio.randint(1, self.dims['servicos'])])
+        if resultado.get('sucesso'):
+            self.agendados.extend((agendamento['id'], id_user) for agendamento in resultado['agendamentos'])
+        else:
+            self.recusados += 1
+
+    def cancelar(self, i):
+        if not self.agendados:
+            return
+        id_agendamento, id_user = self.agendados.pop()
+        with self.app.app_context():
+            AgendamentoService.cancelar_agendamento(id_agendamento, id_user)
+
+    def disponibilidade_dia(self, i):
+        with self.app.app_context():
+            AgendamentoService.listar_horarios_disponiveis(self._profissional(), self._dia_populado())
+
+    def disponibilidade_semana(self, i):
+        inicio = self._dia_populado()
+        with self.app.app_context():
+            AgendamentoService.listar_horarios_disponiveis_lote(None, inicio, inicio + timedelta(days=6))
+
+    def proximos_horarios(self, i):
+        # Janela de uma semana a partir de um dia gerado (os passados são ignorados pelo serviço)
+        inicio = datetime.combine(self._dia_populado(), datetime.min.time())
+        servicos = self.aleatorio.sample(range(1, self.dims['servicos'] + 1), 2)
+        with self.app.app_context():
+            AgendamentoService.buscar_proximos_horarios(servicos, inicio, inicio + timedelta(days=7), 5)
+
+    def agendamentos_usuario(self, i):
+        with self.app.app_context():
+            AgendamentoService.listar_agendamentos_usuario(self._usuario(), limite=50)
+
+    def usuarios_pagina(self, i):
+        cursor = self.aleatorio.randint(0, self.dims['usuarios'])
+        with self.app.app_context():
+            usuario_services.listar_usuario_pagina(100, cursor)
+
+    def buscar_usuarios(self, i):
+        nome = self.aleatorio.choice(gerador.NOMES)[:self.aleatorio.randint(2, 5)]
+        sobrenome = self.aleatorio.choice(gerador.SOBRENOMES)[:3]
+        with self.app.app_context():
+            usuario_services.buscar_usuarios(f'{nome} {sobrenome}', 20)
+
+    # --- HTTP (test client) ---
+
+    def http_horarios(self, i):
+        self.cliente.get(f'/profissional/{self._profissional()}/horarios?data={self._dia_populado()}')
+
+    def http_disponibilidade(self, i):
+        inicio = self._dia_populado()
+        self.cliente.get(f'/disponibilidade?inicio={inicio}&fim={inicio + timedelta(days=6)}'
+                         f'&profissionais={self._profissional()}')
+
+    def http_usuarios(self, i):
+        self.cliente.get(f'/usuario?limite=100&cursor={self.aleatorio.randint(0, self.dims["usuarios"])}')
+
+    def http_agendamentos_usuario(self, i):
+        self.cliente.get(f'/usuario/{self._usuario()}/agendamentos?limite=50')
+
+    def http_buscar_usuarios(self, i):
+        self.cliente.get(f'/usuario/search?q={self.aleatorio.choice(gerador.NOMES)[:3]}&limite=20')
+
+    def todas(self):
+        """
+        Operações na ordem de execução (cancelar depois de agendar, para cancelar o que foi criado).
+        """
+        return {
+            'servico.agendar': self.agendar,
+            'servico.disponibilidade_dia': self.disponibilidade_dia,
+            'servico.disponibilidade_semana': self.disponibilidade_semana,
+            'servico.proximos_horarios': self.proximos_horarios,
+            'servico.agendamentos_usuario': self.agendamentos_usuario,
+            'servico.usuarios_pagina': self.usuarios_pagina,
+            'servico.buscar_usuarios': self.buscar_usuarios,
+            'servico.cancelar': self.cancelar,
+            'http.horarios': self.http_horarios,
+            'http.disponibilidade': self.http_disponibilidade,
+            'http.usuarios': self.http_usuarios,
+            'http.buscar_usuarios': self.http_buscar_usuarios,
+            'http.agendamentos_usuario': self.http_agendamentos_usuario,
+        }
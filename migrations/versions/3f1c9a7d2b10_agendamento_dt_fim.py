@@ -0,0 +1,75 @@
+"""agendamento: dt_fim, observacoes e indice de conflito
+
+Revision ID: 3f1c9a7d2b10
+Revises: ea4e3a3397c3
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9a7d2b10'
+down_revision = 'ea4e3a3397c3'
+branch_labels = None
+depends_on = None
+
+
+# Cópia das durações usadas pelo AgendamentoService no momento desta migração
+DURACAO_SERVICOS = {
+    'alisamento': 30,
+    'corte tesoura': 60,
+    'corte maquina': 60,
+    'barba': 30,
+    'sobrancelha': 10,
+    'pintura': 120
+}
+DURACAO_PADRAO = 60
+TAMANHO_LOTE = 1000
+
+
+def upgrade():
+    with op.batch_alter_table('tb_agendamento') as batch_op:
+        batch_op.add_column(sa.Column('dt_fim', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('observacoes', sa.Text(), nullable=True))
+
+    # Preenche dt_fim dos agendamentos existentes, em lotes
+    conn = op.get_bind()
+    duracoes = {
+        id_servico: DURACAO_SERVICOS.get(descricao.lower(), DURACAO_PADRAO)
+        for id_servico, descricao in conn.execute(sa.text('SELECT id, descricao FROM tb_servico'))
+    }
+    ultimo_id = 0
+    while True:
+        linhas = conn.execute(sa.text(
+            'SELECT id, dt_atendimento, id_servico FROM tb_agendamento '
+            'WHERE id > :ultimo_id ORDER BY id LIMIT :limite'
+        ).columns(id=sa.Integer(), dt_atendimento=sa.DateTime(), id_servico=sa.Integer()),
+            {'ultimo_id': ultimo_id, 'limite': TAMANHO_LOTE}).fetchall()
+        if not linhas:
+            break
+        conn.execute(sa.text('UPDATE tb_agendamento SET dt_fim = :dt_fim WHERE id = :id')
+                     .bindparams(sa.bindparam('dt_fim', type_=sa.DateTime())), [
+            {
+                'id': id_agendamento,
+                'dt_fim': dt_atendimento + timedelta(minutes=duracoes.get(id_servico, DURACAO_PADRAO))
+            }
+            for id_agendamento, dt_atendimento, id_servico in linhas
+        ])
+        ultimo_id = linhas[-1][0]
+
+    with op.batch_alter_table('tb_agendamento') as batch_op:
+        batch_op.alter_column('dt_fim', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index('ix_agendamento_prof_status_periodo',
+                              ['id_profissional', 'status', 'dt_atendimento', 'dt_fim'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tb_agendamento') as batch_op:
+        batch_op.drop_index('ix_agendamento_prof_status_periodo')
+        batch_op.drop_column('observacoes')
+        batch_op.drop_column('dt_fim')
+
@@ -0,0 +1,30 @@
+"""tb_agenda_geracao: geracao da agenda por profissional e dia
+
+Revision ID: 8b2e4d6f1a37
+Revises: 3f1c9a7d2b10
+Create Date: 2026-10-18 10:41:05.562917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d6f1a37'
+down_revision = '3f1c9a7d2b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tb_agenda_geracao',
+    sa.Column('id_profissional', sa.Integer(), nullable=False),
+    sa.Column('data', sa.Date(), nullable=False),
+    sa.Column('geracao', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['id_profissional'], ['tb_profissional.id'], ),
+    sa.PrimaryKeyConstraint('id_profissional', 'data')
+    )
+
+
+def downgrade():
+    op.drop_table('tb_agenda_geracao')
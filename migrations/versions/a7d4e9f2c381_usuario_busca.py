@@ -0,0 +1,59 @@
+"""usuario: indice de busca (FTS5 no SQLite, indices de prefixo no MySQL)
+
+Revision ID: a7d4e9f2c381
+Revises: f3b6c2d8e415
+Create Date: 2026-10-18 18:05:44.902117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d4e9f2c381'
+down_revision = 'f3b6c2d8e415'
+branch_labels = None
+depends_on = None
+
+
+# Mesmos comandos de BUSCA_SQLITE (src/models/usuario_models.py) no momento desta migração
+BUSCA_SQLITE = (
+    "CREATE VIRTUAL TABLE tb_usuario_busca USING fts5("
+    "nome, email, telefone, content='tb_usuario', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER tb_usuario_busca_ai AFTER INSERT ON tb_usuario BEGIN "
+    "INSERT INTO tb_usuario_busca(rowid, nome, email, telefone) VALUES (new.id, new.nome, new.email, new.telefone); "
+    "END",
+    "CREATE TRIGGER tb_usuario_busca_ad AFTER DELETE ON tb_usuario BEGIN "
+    "INSERT INTO tb_usuario_busca(tb_usuario_busca, rowid, nome, email, telefone) "
+    "VALUES ('delete', old.id, old.nome, old.email, old.telefone); "
+    "END",
+    "CREATE TRIGGER tb_usuario_busca_au AFTER UPDATE OF nome, email, telefone ON tb_usuario BEGIN "
+    "INSERT INTO tb_usuario_busca(tb_usuario_busca, rowid, nome, email, telefone) "
+    "VALUES ('delete', old.id, old.nome, old.email, old.telefone); "
+    "INSERT INTO tb_usuario_busca(rowid, nome, email, telefone) VALUES (new.id, new.nome, new.email, new.telefone); "
+    "END",
+)
+
+
+def upgrade():
+    dialeto = op.get_bind().dialect.name
+    if dialeto == 'sqlite':
+        for comando in BUSCA_SQLITE:
+            op.execute(comando)
+        # Indexa os usuários já cadastrados
+        op.execute("INSERT INTO tb_usuario_busca(tb_usuario_busca) VALUES ('rebuild')")
+    elif dialeto == 'mysql':
+        op.create_index('ix_usuario_nome', 'tb_usuario', ['nome'], unique=False)
+        op.create_index('ix_usuario_telefone', 'tb_usuario', ['telefone'], unique=False)
+
+
+def downgrade():
+    dialeto = op.get_bind().dialect.name
+    if dialeto == 'sqlite':
+        for trigger in ('tb_usuario_busca_ai', 'tb_usuario_busca_ad', 'tb_usuario_busca_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS tb_usuario_busca")
+    elif dialeto == 'mysql':
+        op.drop_index('ix_usuario_telefone', table_name='tb_usuario')
+        op.drop_index('ix_usuario_nome', table_name='tb_usuario')
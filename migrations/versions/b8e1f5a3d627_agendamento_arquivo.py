@@ -0,0 +1,49 @@
+"""agendamento: tabela de arquivo dos agendamentos antigos
+
+Revision ID: b8e1f5a3d627
+Revises: a7d4e9f2c381
+Create Date: 2026-10-18 19:32:51.274630
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e1f5a3d627'
+down_revision = 'a7d4e9f2c381'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tb_agendamento_arquivo',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('dt_agendamento', sa.DateTime(), nullable=False),
+    sa.Column('dt_atendimento', sa.DateTime(), nullable=False),
+    sa.Column('dt_fim', sa.DateTime(), nullable=False),
+    sa.Column('id_user', sa.Integer(), nullable=False),
+    sa.Column('id_profissional', sa.Integer(), nullable=False),
+    sa.Column('id_servico', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('valor_total', sa.Float(), nullable=False),
+    sa.Column('taxa_cancelamento', sa.Float(), nullable=True),
+    sa.Column('observacoes', sa.Text(), nullable=True),
+    sa.Column('compareceu', sa.Boolean(), nullable=True),
+    sa.Column('dt_arquivamento', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['id_profissional'], ['tb_profissional.id'], ),
+    sa.ForeignKeyConstraint(['id_servico'], ['tb_servico.id'], ),
+    sa.ForeignKeyConstraint(['id_user'], ['tb_usuario.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('tb_agendamento_arquivo') as batch_op:
+        batch_op.create_index('ix_agendamento_arquivo_usuario_atendimento',
+                              ['id_user', 'dt_atendimento', 'id'], unique=False)
+        batch_op.create_index('ix_agendamento_arquivo_atendimento', ['dt_atendimento'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tb_agendamento_arquivo') as batch_op:
+        batch_op.drop_index('ix_agendamento_arquivo_atendimento')
+        batch_op.drop_index('ix_agendamento_arquivo_usuario_atendimento')
+    op.drop_table('tb_agendamento_arquivo')
@@ -0,0 +1,42 @@
+"""agendamento: AUTOINCREMENT no SQLite para não reutilizar ids arquivados
+
+Revision ID: c2f7a9e4b813
+Revises: b8e1f5a3d627
+Create Date: 2026-10-18 21:05:37.816402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f7a9e4b813'
+down_revision = 'b8e1f5a3d627'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # No MySQL o contador do AUTO_INCREMENT já não volta atrás depois de um DELETE
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    # Recria a tabela com AUTOINCREMENT e começa a sequência depois do maior id já usado,
+    # inclusive os que estão só no arquivo
+    with op.batch_alter_table('tb_agendamento', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+        pass
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'tb_agendamento'")
+    op.execute(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'tb_agendamento', MAX(seq) FROM ("
+        "SELECT COALESCE(MAX(id), 0) AS seq FROM tb_agendamento "
+        "UNION ALL SELECT COALESCE(MAX(id), 0) FROM tb_agendamento_arquivo)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    with op.batch_alter_table('tb_agendamento', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': False}) as batch_op:
+        pass
@@ -0,0 +1,27 @@
+"""agendamento: indice para listagem por usuario
+
+Revision ID: c47a1e9b05d2
+Revises: 8b2e4d6f1a37
+Create Date: 2026-10-18 11:26:53.804411
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47a1e9b05d2'
+down_revision = '8b2e4d6f1a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tb_agendamento') as batch_op:
+        batch_op.create_index('ix_agendamento_usuario_atendimento',
+                              ['id_user', 'dt_atendimento', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tb_agendamento') as batch_op:
+        batch_op.drop_index('ix_agendamento_usuario_atendimento')
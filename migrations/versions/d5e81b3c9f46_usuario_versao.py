@@ -0,0 +1,26 @@
+"""usuario: coluna versao para ETag
+
+Revision ID: d5e81b3c9f46
+Revises: c47a1e9b05d2
+Create Date: 2026-10-18 13:02:17.420913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e81b3c9f46'
+down_revision = 'c47a1e9b05d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tb_usuario') as batch_op:
+        batch_op.add_column(sa.Column('versao', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('tb_usuario') as batch_op:
+        batch_op.drop_column('versao')
@@ -0,0 +1,35 @@
+"""resumo diario por profissional para relatorios
+
+Revision ID: e2a94c7d1b58
+Revises: d5e81b3c9f46
+Create Date: 2026-10-18 14:21:05.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a94c7d1b58'
+down_revision = 'd5e81b3c9f46'
+branch_labels = None
+depends_on = None
+
+
+# Os totais dos agendamentos já existentes são calculados depois com "flask resumo reconstruir"
+def upgrade():
+    op.create_table('tb_resumo_diario',
+    sa.Column('id_profissional', sa.Integer(), nullable=False),
+    sa.Column('data', sa.Date(), nullable=False),
+    sa.Column('receita', sa.Float(), nullable=False),
+    sa.Column('taxas_cancelamento', sa.Float(), nullable=False),
+    sa.Column('minutos_agendados', sa.Integer(), nullable=False),
+    sa.Column('agendamentos', sa.Integer(), nullable=False),
+    sa.Column('cancelamentos', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['id_profissional'], ['tb_profissional.id'], ),
+    sa.PrimaryKeyConstraint('id_profissional', 'data')
+    )
+
+
+def downgrade():
+    op.drop_table('tb_resumo_diario')
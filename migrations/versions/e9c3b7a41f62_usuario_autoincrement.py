@@ -0,0 +1,61 @@
+"""usuario: AUTOINCREMENT no SQLite para não reutilizar ids de usuários excluídos
+
+Revision ID: e9c3b7a41f62
+Revises: c2f7a9e4b813
+Create Date: 2026-10-19 10:12:08.530914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9c3b7a41f62'
+down_revision = 'c2f7a9e4b813'
+branch_labels = None
+depends_on = None
+
+
+# Triggers do índice FTS5 (a7d4e9f2c381): somem junto com a tabela antiga ao recriá-la
+TRIGGERS_BUSCA = (
+    "CREATE TRIGGER tb_usuario_busca_ai AFTER INSERT ON tb_usuario BEGIN "
+    "INSERT INTO tb_usuario_busca(rowid, nome, email, telefone) VALUES (new.id, new.nome, new.email, new.telefone); "
+    "END",
+    "CREATE TRIGGER tb_usuario_busca_ad AFTER DELETE ON tb_usuario BEGIN "
+    "INSERT INTO tb_usuario_busca(tb_usuario_busca, rowid, nome, email, telefone) "
+    "VALUES ('delete', old.id, old.nome, old.email, old.telefone); "
+    "END",
+    "CREATE TRIGGER tb_usuario_busca_au AFTER UPDATE OF nome, email, telefone ON tb_usuario BEGIN "
+    "INSERT INTO tb_usuario_busca(tb_usuario_busca, rowid, nome, email, telefone) "
+    "VALUES ('delete', old.id, old.nome, old.email, old.telefone); "
+    "INSERT INTO tb_usuario_busca(rowid, nome, email, telefone) VALUES (new.id, new.nome, new.email, new.telefone); "
+    "END",
+)
+
+
+def _recriar(autoincrement):
+    # A cópia das linhas dispararia os triggers da tabela nova; eles são recriados depois,
+    # com os ids e o conteúdo iguais aos que o índice já tem
+    with op.batch_alter_table('tb_usuario', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': autoincrement}) as batch_op:
+        pass
+    for comando in TRIGGERS_BUSCA:
+        op.execute(comando)
+
+
+def upgrade():
+    # No MySQL o contador do AUTO_INCREMENT já não volta atrás depois de um DELETE
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    _recriar(True)
+    # Começa a sequência depois do maior id atual (ids já excluídos acima dele não são conhecidos)
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'tb_usuario'")
+    op.execute("INSERT INTO sqlite_sequence (name, seq) SELECT 'tb_usuario', COALESCE(MAX(id), 0) FROM tb_usuario")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    _recriar(False)
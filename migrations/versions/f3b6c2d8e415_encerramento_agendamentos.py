@@ -0,0 +1,47 @@
+"""encerramento de agendamentos: comparecimento, faltas e checkpoint das tarefas
+
+Revision ID: f3b6c2d8e415
+Revises: e2a94c7d1b58
+Create Date: 2026-10-18 16:40:12.537204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b6c2d8e415'
+down_revision = 'e2a94c7d1b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tb_agendamento') as batch_op:
+        batch_op.add_column(sa.Column('compareceu', sa.Boolean(), nullable=True))
+        batch_op.create_index('ix_agendamento_status_atendimento',
+                              ['status', 'dt_atendimento', 'id'], unique=False)
+
+    with op.batch_alter_table('tb_resumo_diario') as batch_op:
+        batch_op.add_column(sa.Column('faltas', sa.Integer(), nullable=False, server_default='0'))
+
+    op.create_table('tb_tarefa_checkpoint',
+    sa.Column('nome', sa.String(length=50), nullable=False),
+    sa.Column('corte', sa.DateTime(), nullable=True),
+    sa.Column('ultimo_dt', sa.DateTime(), nullable=True),
+    sa.Column('ultimo_id', sa.Integer(), nullable=True),
+    sa.Column('processados', sa.Integer(), nullable=False),
+    sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('nome')
+    )
+
+
+def downgrade():
+    op.drop_table('tb_tarefa_checkpoint')
+
+    with op.batch_alter_table('tb_resumo_diario') as batch_op:
+        batch_op.drop_column('faltas')
+
+    with op.batch_alter_table('tb_agendamento') as batch_op:
+        batch_op.drop_index('ix_agendamento_status_atendimento')
+        batch_op.drop_column('compareceu')
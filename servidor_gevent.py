@@ -0,0 +1,92 @@
+"""
+Servidor de produção: atende o app com o WSGIServer do gevent (uma greenlet por conexão)
+
+Uso (na raiz do projeto):
+    python servidor_gevent.py
+
+Configuração pelas variáveis HOST, PORT e GEVENT_* (ver connection.py).
+SIGTERM/SIGINT param de aceitar conexões e esperam as requisições em andamento.
+"""
+
+# O monkey-patch precisa vir antes de qualquer import que use socket, threading ou time
+from gevent import monkey
+monkey.patch_all()
+
+import importlib.util
+import logging
+import signal
+import gevent
+from gevent.pool import Pool
+from gevent.pywsgi import WSGIServer
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+import connection
+from src import create_app, db
+from src.services import senha_services
+
+log = logging.getLogger("sgu.gevent")
+
+
+# Ajusta banco e pool para muitas greenlets concorrentes no mesmo processo
+def configuracao_gevent():
+    url = make_url(connection.SQLALCHEMY_DATABASE_URI)
+    opcoes = dict(connection.SQLALCHEMY_ENGINE_OPTIONS)
+
+    if url.get_backend_name() == "mysql" and url.get_driver_name() == "mysqldb":
+        # mysqlclient é uma extensão em C: enquanto espera o servidor, bloqueia todas as greenlets.
+        # O PyMySQL é Python puro e usa o socket com monkey-patch, cedendo a vez durante a espera
+        if importlib.util.find_spec("pymysql") is not None:
+            url = url.set(drivername="mysql+pymysql")
+        else:
+            log.warning("PyMySQL não instalado: mysqlclient vai bloquear o servidor a cada consulta")
+
+    # sqlite não cede a vez durante as consultas, então cada greenlet segura a conexão
+    # só pelo tempo de CPU da requisição; o pool maior serve às esperas de rede do mysql.
+    # Só o QueuePool aceita tamanho (sqlite em memória usa SingletonThreadPool/StaticPool)
+    classe_pool = opcoes.get("poolclass") or url.get_dialect().get_pool_class(url)
+    if issubclass(classe_pool, QueuePool):
+        opcoes["pool_size"] = connection.GEVENT_POOL_BANCO
+        opcoes.setdefault("max_overflow", connection.GEVENT_POOL_BANCO)
+
+    return {
+        "SQLALCHEMY_DATABASE_URI": url.render_as_string(hide_password=False),
+        "SQLALCHEMY_ENGINE_OPTIONS": opcoes,
+        # Sem o pool de processos do hash: fork e os locks do ProcessPoolExecutor não combinam com o
+        # monkey-patch. O pbkdf2 roda no threadpool nativo do gevent (o hashlib solta o GIL)
+        "SENHA_PROCESSOS": 0,
+        "SENHA_THREADPOOL_GEVENT": True,
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    app = create_app(configuracao_gevent())
+
+    servidor = WSGIServer(
+        (connection.GEVENT_HOST, connection.GEVENT_PORTA),
+        app,
+        spawn=Pool(connection.GEVENT_CONEXOES),  # conexões além do limite esperam na fila do socket
+        log="default" if connection.GEVENT_LOG_ACESSO else None,
+    )
+
+    # O handler do sinal roda no hub: o desligamento (que espera as requisições) vai para outra greenlet
+    def desligar():
+        log.info("desligando: aguardando até %ss pelas requisições em andamento",
+                 connection.GEVENT_TEMPO_DESLIGAMENTO)
+        gevent.spawn(servidor.stop, timeout=connection.GEVENT_TEMPO_DESLIGAMENTO)
+
+    gevent.signal_handler(signal.SIGTERM, desligar)
+    gevent.signal_handler(signal.SIGINT, desligar)
+
+    log.info("servindo em %s:%s", connection.GEVENT_HOST, connection.GEVENT_PORTA)
+    servidor.serve_forever()
+
+    # Libera os recursos do processo depois que a última requisição terminou
+    senha_services.encerrar()
+    with app.app_context():
+        db.engine.dispose()
+    log.info("servidor encerrado")
+
+
+if __name__ == "__main__":
+    main()
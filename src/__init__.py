@@ -1,26 +1,53 @@
-from flask import Flask, request
+from collections.abc import Mapping
+import click
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_marshmallow import Marshmallow
 from flask_cors import CORS
 from flask_restful import Api
+from .banco import configurar_engine, descartar_conexoes_no_fork
+from .metricas import instrumentar
+from .consultas_lentas import registrar_consultas_lentas
 
-# Instanciar e criar objetos principais do Flask
-app = Flask(__name__)
-app.config.from_object("connection")
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
-ma = Marshmallow(app)
-api = Api(app)
-CORS(app)
+# Objetos principais criados sem app: cada aplicação é ligada a eles em create_app
+db = SQLAlchemy()
+ma = Marshmallow()
+api = Api()
+cors = CORS()
 
 
-# Criar as tabelas do banco de dados ao acessar o endpoint 'index'
-@app.before_request
-def create_tables():
-    if request.endpoint == 'index': # Executa apenas na primeira requisição ao endpoint 'index'
-        db.create_all()
+# Cria e configura a aplicação Flask
+# config pode ser um dicionário ou um objeto/módulo de configuração aplicado por cima de "connection"
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config.from_object("connection")
+    if isinstance(config, Mapping):
+        app.config.update(config)
+    elif config is not None:
+        app.config.from_object(config)
 
-from .models import agendamento_models, login_models, profissional_models, servico_models, usuario_models # Importa os modelos para garantir que o SQLAlchemy reconheça as tabelas
+    # O engine só abre conexões no primeiro uso, e as herdadas de um fork são descartadas
+    db.init_app(app)
+    with app.app_context():
+        configurar_engine(db.engine, app.config.get("SQLITE_PRAGMAS"))  # PRAGMAs do perfil de banco escolhido
+        descartar_conexoes_no_fork(db.engine)
+        instrumentar(app, db.engine)  # /metrics e contagem de consultas, só com METRICAS_ATIVAS
+        registrar_consultas_lentas(app, db.engine)  # só com CONSULTAS_LENTAS_MS > 0
 
-from .views import usuario_views
\ No newline at end of file
+    # O Flask-Migrate (alembic) só é usado pelos comandos do flask ("flask db ..."):
+    # fora da linha de comando os workers não pagam essa importação
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    ma.init_app(app)
+
+    from .models import agendamento_models, agendamento_arquivo_models, agenda_geracao_models, login_models, profissional_models, resumo_diario_models, servico_models, tarefa_checkpoint_models, usuario_models # Importa os modelos para garantir que o SQLAlchemy reconheça as tabelas
+    from .views import usuario_views, agendamento_views, relatorio_views # Registra os recursos na api antes de ligá-la ao app
+
+    api.init_app(app)
+    cors.init_app(app)
+
+    from .comandos import registrar_comandos
+    registrar_comandos(app) # Comandos do flask (flask criar-tabelas, flask usuario importar ...)
+
+    return app
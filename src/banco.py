@@ -0,0 +1,61 @@
+import os
+import sqlite3
+import weakref
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import mysql, sqlite
+
+
+# Aplica os PRAGMAs do perfil em cada nova conexão SQLite do engine
+def configurar_engine(engine, sqlite_pragmas):
+    if not sqlite_pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def aplicar_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        for pragma, valor in sqlite_pragmas.items():
+            cursor.execute(f'PRAGMA {pragma} = {valor}')
+        cursor.close()
+
+
+# Engines cujas conexões não podem ser compartilhadas com processos filhos
+_engines_registrados = weakref.WeakSet()
+
+
+def _descartar_conexoes_herdadas():
+    for engine in list(_engines_registrados):
+        # close=False: fecha só as referências no filho, sem mexer nas conexões que continuam no pai
+        engine.dispose(close=False)
+
+
+# Garante que um worker criado por fork (gunicorn, pool de processos) abra as próprias conexões
+def descartar_conexoes_no_fork(engine):
+    _engines_registrados.add(engine)
+
+
+os.register_at_fork(after_in_child=_descartar_conexoes_herdadas)
+
+
+# Insere a linha só se a chave primária ainda não existir, sem disputar a chave com outras transações
+# (INSERT ... ON CONFLICT DO NOTHING no SQLite, INSERT IGNORE no MySQL)
+def inserir_se_ausente(session, modelo, **valores):
+    inserir_se_ausentes(session, modelo, [valores])
+
+
+# Mesmo que inserir_se_ausente para várias linhas, em um único comando (executemany)
+def inserir_se_ausentes(session, modelo, linhas):
+    if not linhas:
+        return
+    dialeto = session.get_bind().dialect.name
+    if dialeto == 'sqlite':
+        session.execute(sqlite.insert(modelo.__table__).on_conflict_do_nothing(), linhas)
+    elif dialeto == 'mysql':
+        session.execute(mysql.insert(modelo.__table__).prefix_with('IGNORE'), linhas)
+    else:
+        for valores in linhas:
+            chave = tuple(valores[coluna.key] for coluna in inspect(modelo).primary_key)
+            if not session.get(modelo, chave):
+                session.add(modelo(**valores))
+        session.flush()
@@ -0,0 +1,160 @@
+import csv
+import json
+import time
+import urllib.error
+import urllib.request
+import click
+from datetime import timedelta
+from flask import current_app
+from flask.cli import AppGroup
+from src import db
+from src.services import arquivamento_services, encerramento_services, relatorio_services, usuario_services
+
+# Comandos de linha de comando do flask (ex.: flask usuario importar usuarios.csv)
+usuario_cli = AppGroup('usuario', help='Comandos de usuários')
+
+
+@usuario_cli.command('importar')
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--lote', default=1000, show_default=True, help='Usuários inseridos por transação')
+def importar_usuarios(arquivo, lote):
+    """Importa usuários de um arquivo CSV (nome,email,telefone,senha) ou JSON (lista)."""
+    with open(arquivo, encoding='utf-8', newline='') as entrada:
+        if arquivo.lower().endswith('.json'):
+            registros = json.load(entrada)
+        else:
+            registros = csv.DictReader(entrada)
+        resultado = usuario_services.importar_usuarios(registros, tamanho_lote=lote)
+
+    for erro in resultado['erros']:
+        click.echo(f"linha {erro['linha']}: {erro['erros']}", err=True)
+    click.echo(f"{resultado['importados']} usuários importados, {len(resultado['erros'])} com erro")
+
+
+
+# Comandos do resumo diário usado nos relatórios (ex.: flask resumo reconstruir)
+resumo_cli = AppGroup('resumo', help='Resumo diário por profissional (relatórios)')
+
+
+@resumo_cli.command('reconstruir')
+@click.option('--inicio', type=click.DateTime(formats=['%Y-%m-%d']), help='Primeiro dia (padrão: primeiro agendamento)')
+@click.option('--fim', type=click.DateTime(formats=['%Y-%m-%d']), help='Último dia (padrão: último agendamento)')
+@click.option('--dias-por-lote', default=31, show_default=True, help='Dias recalculados por transação')
+def reconstruir_resumo(inicio, fim, dias_por_lote):
+    """Recalcula tb_resumo_diario a partir dos agendamentos (inclusive os arquivados), em lotes de dias."""
+    def ao_concluir_lote(inicio_lote, fim_lote, linhas):
+        click.echo(f'{inicio_lote} a {fim_lote}: {linhas} linhas')
+
+    resultado = relatorio_services.reconstruir_resumo(
+        inicio.date() if inicio else None, fim.date() if fim else None, dias_por_lote, ao_concluir_lote)
+    click.echo(f"{resultado['linhas']} linhas em {resultado['lotes']} lotes")
+
+
+# Tarefas em lote sobre os agendamentos (ex.: flask agendamentos encerrar --loop)
+agendamentos_cli = AppGroup('agendamentos', help='Tarefas em lote dos agendamentos')
+
+
+@agendamentos_cli.command('encerrar')
+@click.option('--lote', type=int, help='Agendamentos por transação (padrão: ENCERRAMENTO_LOTE)')
+@click.option('--atraso-horas', type=float, help='Encerra o que terminou há mais que isso (padrão: ENCERRAMENTO_ATRASO_HORAS)')
+@click.option('--sem-registro', type=click.Choice(encerramento_services.DESTINOS_SEM_REGISTRO),
+              help='Status de quem não teve o comparecimento registrado (padrão: ENCERRAMENTO_SEM_REGISTRO)')
+@click.option('--loop', is_flag=True, help='Continua rodando, uma execução a cada --intervalo segundos')
+@click.option('--intervalo', default=300, show_default=True, help='Segundos entre as execuções com --loop')
+def encerrar_agendamentos(lote, atraso_horas, sem_registro, loop, intervalo):
+    """Encerra os agendamentos passados como finalizados ou faltas (com taxa), em lotes."""
+    config = current_app.config
+    parametros = {
+        'atraso': timedelta(hours=atraso_horas if atraso_horas is not None else config['ENCERRAMENTO_ATRASO_HORAS']),
+        'tamanho_lote': lote or config['ENCERRAMENTO_LOTE'],
+        'sem_registro': sem_registro or config['ENCERRAMENTO_SEM_REGISTRO'],
+    }
+
+    def ao_concluir_lote(ultimo, finalizados, faltas):
+        click.echo(f'até {ultimo[0]} (id {ultimo[1]}): {finalizados} finalizados, {faltas} faltas')
+
+    while True:
+        try:
+            resultado = encerramento_services.encerrar_agendamentos(ao_concluir_lote=ao_concluir_lote, **parametros)
+        except Exception as e:
+            if not loop:
+                raise
+            # No modo contínuo uma falha (ex.: banco fora do ar) só adia para a próxima execução
+            db.session.rollback()
+            click.echo(f'falha no encerramento: {e}', err=True)
+        else:
+            if 'erro' in resultado:
+                raise click.ClickException(resultado['erro'])
+            click.echo(f"corte {resultado['corte']}{' (retomada)' if resultado['retomada'] else ''}: "
+                       f"{resultado['finalizados']} finalizados, {resultado['faltas']} faltas, "
+                       f"{resultado['taxas']:.2f} em taxas, {resultado['lotes']} lotes")
+        if not loop:
+            break
+        time.sleep(intervalo)
+
+
+@agendamentos_cli.command('arquivar')
+@click.option('--lote', type=int, help='Agendamentos por transação (padrão: ARQUIVAMENTO_LOTE)')
+@click.option('--horizonte-dias', type=int, help='Mantém na tabela quente os últimos N dias (padrão: ARQUIVAMENTO_HORIZONTE_DIAS)')
+def arquivar_agendamentos(lote, horizonte_dias):
+    """Move os agendamentos encerrados antigos para tb_agendamento_arquivo, em lotes."""
+    config = current_app.config
+
+    def ao_concluir_lote(status, ultimo, arquivados):
+        click.echo(f'{status} até {ultimo[0]} (id {ultimo[1]}): {arquivados} arquivados')
+
+    resultado = arquivamento_services.arquivar_agendamentos(
+        horizonte=timedelta(days=horizonte_dias if horizonte_dias is not None else config['ARQUIVAMENTO_HORIZONTE_DIAS']),
+        tamanho_lote=lote or config['ARQUIVAMENTO_LOTE'],
+        ao_concluir_lote=ao_concluir_lote)
+    if 'erro' in resultado:
+        raise click.ClickException(resultado['erro'])
+    click.echo(f"corte {resultado['corte']}{' (retomada)' if resultado['retomada'] else ''}: "
+               f"{resultado['arquivados']} arquivados em {resultado['lotes']} lotes")
+
+
+@click.command('criar-tabelas')
+def criar_tabelas():
+    """Cria as tabelas que ainda não existem no banco (passo único de instalação)."""
+    db.create_all()
+    click.echo('tabelas criadas')
+
+
+@click.command('consultas-lentas')
+@click.option('--url', default='http://127.0.0.1:8000', show_default=True, help='Endereço do servidor em execução')
+@click.option('--limite', default=20, show_default=True, help='Quantidade de consultas (mais recentes primeiro)')
+@click.option('--json', 'como_json', is_flag=True, help='Imprime a resposta JSON sem formatação')
+def consultas_lentas(url, limite, como_json):
+    """Mostra as consultas lentas registradas pelo servidor (CONSULTAS_LENTAS_MS > 0 e ADMIN_TOKEN)."""
+    # O buffer fica na memória de cada processo do servidor: o comando lê pelo endpoint administrativo
+    # O endpoint só existe com ADMIN_TOKEN configurado no servidor
+    if not current_app.config.get('ADMIN_TOKEN'):
+        raise click.ClickException('ADMIN_TOKEN não configurado: o servidor não expõe as consultas lentas sem ele')
+    pedido = urllib.request.Request(f"{url.rstrip('/')}/admin/consultas-lentas?limite={limite}")
+    pedido.add_header('X-Admin-Token', current_app.config['ADMIN_TOKEN'])
+    try:
+        with urllib.request.urlopen(pedido, timeout=10) as resposta:
+            dados = json.load(resposta)
+    except (urllib.error.URLError, OSError) as e:
+        raise click.ClickException(f'não foi possível consultar {url}: {e}')
+
+    if como_json:
+        click.echo(json.dumps(dados, indent=2, ensure_ascii=False))
+        return
+
+    click.echo(f"{dados['total']} consultas acima de {dados['limite_ms']} ms desde o início do servidor")
+    for consulta in dados['consultas']:
+        click.echo(f"\n[{consulta['quando']}] {consulta['duracao_ms']} ms  {consulta['chamador'] or '-'}")
+        click.echo(consulta['sql'])
+        click.echo(f"parâmetros: {consulta['parametros']}")
+        for linha in consulta['plano'] or []:
+            click.echo(f'  plano: {linha}')
+
+
+# Registra os comandos no app criado por create_app
+def registrar_comandos(app):
+    app.cli.add_command(usuario_cli)
+    app.cli.add_command(resumo_cli)
+    app.cli.add_command(agendamentos_cli)
+    app.cli.add_command(criar_tabelas)
+    app.cli.add_command(consultas_lentas)
@@ -0,0 +1,170 @@
+"""
+Registro de consultas lentas (opt-in, CONSULTAS_LENTAS_MS > 0)
+Cada comando acima do limite guarda o SQL, os parâmetros mascarados, a função do serviço
+que o disparou e o plano de execução (EXPLAIN QUERY PLAN no SQLite, EXPLAIN no MySQL)
+em um buffer circular, consultado por GET /admin/consultas-lentas ou "flask consultas-lentas"
+(o endpoint só existe com ADMIN_TOKEN configurado).
+"""
+
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import abort, jsonify, request
+from sqlalchemy import event
+
+_ARQUIVO = os.path.abspath(__file__)
+_DIRETORIO_SRC = os.path.dirname(_ARQUIVO)
+_DIRETORIO_SERVICOS = os.path.join(_DIRETORIO_SRC, 'services')
+_COMANDOS_COM_PLANO = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+_DATA = re.compile(r'^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?$')
+
+
+class RegistroConsultasLentas:
+    """
+    Buffer circular com as últimas consultas lentas do processo.
+    """
+
+    def __init__(self, capacidade=200):
+        self._registros = deque(maxlen=capacidade)
+        self._lock = threading.Lock()
+        self.total = 0  # consultas lentas vistas desde o início (inclusive as que já saíram do buffer)
+
+    def adicionar(self, registro):
+        with self._lock:
+            self._registros.append(registro)
+            self.total += 1
+
+    def listar(self, limite=None):
+        with self._lock:
+            registros = list(self._registros)
+        registros.reverse()  # mais recentes primeiro
+        return registros[:limite] if limite else registros
+
+    def limpar(self):
+        with self._lock:
+            self._registros.clear()
+
+    def redimensionar(self, capacidade):
+        with self._lock:
+            self._registros = deque(self._registros, maxlen=capacidade)
+
+
+registro = RegistroConsultasLentas()
+
+
+# Mantém números, nulos e datas (ids, limites, períodos); os demais textos e binários viram só tipo e tamanho
+def mascarar_parametros(parametros):
+    def mascarar(valor):
+        if isinstance(valor, str) and _DATA.match(valor):
+            return valor  # datas já convertidas em texto pelo driver (SQLite)
+        if isinstance(valor, (str, bytes, bytearray)):
+            return f'<{type(valor).__name__} {len(valor)}>'
+        if valor is None or isinstance(valor, (bool, int, float)):
+            return valor
+        return str(valor)
+
+    if isinstance(parametros, dict):
+        return {chave: mascarar(valor) for chave, valor in parametros.items()}
+    if isinstance(parametros, (list, tuple)):
+        return [mascarar(valor) for valor in parametros]
+    return mascarar(parametros)
+
+
+# Primeira função do projeto na pilha, de preferência uma dos serviços
+def funcao_chamadora():
+    primeira_do_projeto = None
+    quadro = sys._getframe(1)
+    while quadro is not None:
+        arquivo = os.path.abspath(quadro.f_code.co_filename)
+        if arquivo.startswith(_DIRETORIO_SRC) and arquivo != _ARQUIVO:
+            local = f'{os.path.relpath(arquivo, os.path.dirname(_DIRETORIO_SRC))}:{quadro.f_lineno} {quadro.f_code.co_name}'
+            if arquivo.startswith(_DIRETORIO_SERVICOS):
+                return local
+            primeira_do_projeto = primeira_do_projeto or local
+        quadro = quadro.f_back
+    return primeira_do_projeto
+
+
+# Plano de execução pela mesma conexão DBAPI, sem passar pelos eventos do engine.
+# Com o resultado em streaming (yield_per/stream_results, SSCursor no MySQL) a conexão ainda está
+# entregando as linhas e não aceita outro comando: o plano não é coletado
+def plano_execucao(dialeto, cursor, statement, parametros, streaming=False):
+    if not statement.lstrip().upper().startswith(_COMANDOS_COM_PLANO):
+        return None
+    if streaming:
+        return ['não coletado: resultado em streaming']
+    prefixo = 'EXPLAIN QUERY PLAN ' if dialeto == 'sqlite' else 'EXPLAIN '
+    cursor_plano = cursor.connection.cursor()
+    try:
+        cursor_plano.execute(prefixo + statement, parametros)
+        linhas = cursor_plano.fetchall()
+        colunas = [coluna[0] for coluna in cursor_plano.description or ()]
+    except Exception as e:
+        return [f'EXPLAIN falhou: {e}']
+    finally:
+        cursor_plano.close()
+    if dialeto == 'sqlite':
+        return [linha[-1] for linha in linhas]  # (id, pai, não usado, detalhe)
+    return [dict(zip(colunas, linha)) for linha in linhas]
+
+
+def registrar_consultas_lentas(app, engine):
+    """
+    Liga o registro ao engine e expõe o endpoint administrativo, se CONSULTAS_LENTAS_MS > 0.
+    """
+    limite_ms = app.config.get('CONSULTAS_LENTAS_MS') or 0
+    if limite_ms <= 0:
+        return
+
+    limite = limite_ms / 1000
+    registro.redimensionar(app.config.get('CONSULTAS_LENTAS_CAPACIDADE', 200))
+    dialeto = engine.dialect.name
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._lenta_inicio = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+        inicio = getattr(context, '_lenta_inicio', None)
+        if inicio is None:
+            return
+        duracao = time.perf_counter() - inicio
+        if duracao < limite:
+            return
+
+        registro.adicionar({
+            'quando': datetime.now().isoformat(timespec='milliseconds'),
+            'duracao_ms': round(duracao * 1000, 3),
+            'sql': statement,
+            'parametros': mascarar_parametros(parameters) if not executemany else f'<executemany {len(parameters)}>',
+            'chamador': funcao_chamadora(),
+            'plano': None if executemany else plano_execucao(
+                dialeto, cursor, statement, parameters,
+                streaming=bool(context.execution_options.get('stream_results'))),
+        })
+
+    # GET /admin/consultas-lentas[?limite=N]: exige o cabeçalho X-Admin-Token. Sem ADMIN_TOKEN o endpoint
+    # não é registrado: atrás de um proxy reverso na mesma máquina todo pedido chega de 127.0.0.1,
+    # então o endereço de origem não serve para proteger o SQL e os parâmetros
+    token = app.config.get('ADMIN_TOKEN')
+    if not token:
+        app.logger.warning('CONSULTAS_LENTAS_MS ligado sem ADMIN_TOKEN: GET /admin/consultas-lentas desativado')
+        return
+
+    @app.route('/admin/consultas-lentas')
+    def consultas_lentas():
+        if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+            abort(403)
+
+        return jsonify({
+            'limite_ms': limite_ms,
+            'total': registro.total,
+            'consultas': registro.listar(request.args.get('limite', type=int)),
+        })
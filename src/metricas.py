@@ -0,0 +1,237 @@
+"""
+Métricas do processo no formato texto do Prometheus (GET /metrics)
+- contadores, medidores e histogramas com rótulos, num registro compartilhado pelo processo
+- instrumentação das requisições: latência, consultas e tempo de banco por endpoint,
+  e aviso de N+1 quando a mesma consulta se repete demais em uma requisição
+
+Com METRICAS_ATIVAS desligado nada é registrado no engine nem no Flask: custo zero por requisição.
+"""
+
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from flask import Response, g, has_request_context, request, request_finished, request_started
+from sqlalchemy import event
+
+# Limites (em segundos) dos buckets padrão dos histogramas de latência
+BUCKETS_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Erro levantado no modo de teste quando uma requisição repete a mesma consulta além do limite
+class ConsultasRepetidasError(Exception):
+    pass
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatar_rotulos(nomes, valores, extra=''):
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _chave(self, rotulos):
+        return tuple(rotulos.get(nome, '') for nome in self.rotulos)
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} {self.tipo}']
+        with self._lock:
+            itens = list(self._valores.items())
+        for chave, valor in itens:
+            linhas.append(f'{self.nome}{_formatar_rotulos(self.rotulos, chave)} {valor}')
+        return linhas
+
+
+class Contador(_Metrica):
+    tipo = 'counter'
+
+    def inc(self, valor=1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def valor(self, **rotulos):
+        return self._valores.get(self._chave(rotulos), 0)
+
+
+class Medidor(_Metrica):
+    tipo = 'gauge'
+
+    def definir(self, valor, **rotulos):
+        with self._lock:
+            self._valores[self._chave(rotulos)] = valor
+
+    def valor(self, **rotulos):
+        return self._valores.get(self._chave(rotulos), 0)
+
+
+class Histograma(_Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, rotulos=(), buckets=BUCKETS_PADRAO):
+        super().__init__(nome, ajuda, rotulos)
+        self.buckets = tuple(sorted(buckets))
+
+    def observar(self, valor, **rotulos):
+        chave = self._chave(rotulos)
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            estado = self._valores.get(chave)
+            if estado is None:
+                # [contagem por bucket (o último é o +Inf), soma, total]
+                estado = self._valores[chave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            estado[0][indice] += 1
+            estado[1] += valor
+            estado[2] += 1
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} {self.tipo}']
+        with self._lock:
+            itens = [(chave, (list(contagens), soma, total)) for chave, (contagens, soma, total) in self._valores.items()]
+        for chave, (contagens, soma, total) in itens:
+            acumulado = 0
+            for limite, contagem in zip(self.buckets + ('+Inf',), contagens):
+                acumulado += contagem
+                le = 'le="%s"' % (limite if limite == '+Inf' else repr(float(limite)))
+                linhas.append(f'{self.nome}_bucket{_formatar_rotulos(self.rotulos, chave, le)} {acumulado}')
+            linhas.append(f'{self.nome}_sum{_formatar_rotulos(self.rotulos, chave)} {soma}')
+            linhas.append(f'{self.nome}_count{_formatar_rotulos(self.rotulos, chave)} {total}')
+        return linhas
+
+
+class RegistroMetricas:
+    """
+    Métricas do processo por nome. Pedir de novo uma métrica já criada devolve a mesma instância.
+    """
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _obter(self, classe, nome, *args, **kwargs):
+        with self._lock:
+            metrica = self._metricas.get(nome)
+            if metrica is None:
+                metrica = self._metricas[nome] = classe(nome, *args, **kwargs)
+            return metrica
+
+    def contador(self, nome, ajuda, rotulos=()):
+        return self._obter(Contador, nome, ajuda, rotulos)
+
+    def medidor(self, nome, ajuda, rotulos=()):
+        return self._obter(Medidor, nome, ajuda, rotulos)
+
+    def histograma(self, nome, ajuda, rotulos=(), buckets=BUCKETS_PADRAO):
+        return self._obter(Histograma, nome, ajuda, rotulos, buckets)
+
+    def exportar(self):
+        linhas = []
+        for metrica in list(self._metricas.values()):
+            linhas.extend(metrica.exportar())
+        return '\n'.join(linhas) + '\n'
+
+
+# Registro compartilhado pelo processo
+registro = RegistroMetricas()
+
+duracao_requisicao = registro.histograma(
+    'sgu_requisicao_duracao_segundos', 'Latência das requisições por endpoint', ('endpoint', 'metodo', 'status'))
+consultas_requisicao = registro.contador(
+    'sgu_requisicao_consultas_total', 'Comandos SQL executados pelas requisições', ('endpoint', 'metodo'))
+tempo_banco_requisicao = registro.contador(
+    'sgu_requisicao_banco_segundos_total', 'Tempo gasto no banco pelas requisições', ('endpoint', 'metodo'))
+consultas_repetidas = registro.contador(
+    'sgu_consultas_repetidas_total', 'Consultas repetidas além do limite em uma requisição (suspeita de N+1)',
+    ('endpoint', 'metodo'))
+
+# Listas de parâmetros de tamanhos diferentes ("IN (?, ?, ?)") contam como a mesma consulta
+_LISTA_PARAMETROS = re.compile(r'\((?:\s*(?:\?|%s|:\w+)\s*,)+\s*(?:\?|%s|:\w+)\s*\)')
+
+
+def formato_consulta(sql):
+    return _LISTA_PARAMETROS.sub('(?)', sql)
+
+
+class _EstadoRequisicao:
+    __slots__ = ('inicio', 'consultas', 'tempo_banco', 'formatos', 'repetidas')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tempo_banco = 0.0
+        self.formatos = Counter()
+        self.repetidas = []
+
+
+def instrumentar(app, engine):
+    """
+    Liga as métricas ao app e ao engine, se METRICAS_ATIVAS estiver ligado.
+    """
+    if not app.config.get('METRICAS_ATIVAS'):
+        return
+
+    limite = app.config.get('METRICAS_LIMITE_REPETICOES', 10)
+    falhar = app.config.get('TESTING', False)  # nos testes, N+1 vira erro em vez de aviso
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and has_request_context() and '_metricas' in g:
+            context._metricas_inicio = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+        inicio = getattr(context, '_metricas_inicio', None)
+        if inicio is None:
+            return
+        estado = g._metricas
+        estado.tempo_banco += time.perf_counter() - inicio
+        estado.consultas += 1
+
+        formato = formato_consulta(statement)
+        estado.formatos[formato] += 1
+        if estado.formatos[formato] == limite + 1:
+            estado.repetidas.append(formato)
+
+    def requisicao_iniciada(sender, **extra):
+        g._metricas = _EstadoRequisicao()
+
+    def requisicao_finalizada(sender, response, **extra):
+        estado = g.pop('_metricas', None)
+        if estado is None:
+            return
+        endpoint = request.url_rule.rule if request.url_rule else 'desconhecido'
+        duracao_requisicao.observar(time.perf_counter() - estado.inicio,
+                                    endpoint=endpoint, metodo=request.method, status=response.status_code)
+        consultas_requisicao.inc(estado.consultas, endpoint=endpoint, metodo=request.method)
+        tempo_banco_requisicao.inc(estado.tempo_banco, endpoint=endpoint, metodo=request.method)
+
+        for formato in estado.repetidas:
+            consultas_repetidas.inc(endpoint=endpoint, metodo=request.method)
+            mensagem = (f'{request.method} {endpoint}: consulta repetida mais de {limite} vezes '
+                        f'na mesma requisição (N+1?): {formato}')
+            if falhar:
+                raise ConsultasRepetidasError(mensagem)
+            app.logger.warning(mensagem)
+
+    # weak=False: as funções locais precisam continuar vivas enquanto o app existir
+    request_started.connect(requisicao_iniciada, app, weak=False)
+    request_finished.connect(requisicao_finalizada, app, weak=False)
+
+    @app.route('/metrics')
+    def metricas():
+        return Response(registro.exportar(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,61 @@
+from sqlalchemy import select, update
+from src import db
+from src.banco import inserir_se_ausente, inserir_se_ausentes
+
+
+# Contador de alterações da agenda de um profissional em um dia.
+# Cada agendamento ou cancelamento incrementa a geração, e os caches dos
+# processos comparam a geração guardada com a do banco para saber se estão velhos.
+class AgendaGeracao_model(db.Model):
+    __tablename__ = "tb_agenda_geracao"
+
+    id_profissional = db.Column(db.Integer, db.ForeignKey('tb_profissional.id'), primary_key=True)
+    data = db.Column(db.Date, primary_key=True)
+    geracao = db.Column(db.Integer, nullable=False, default=0)
+
+    # Retorna a geração atual da agenda (0 se o dia nunca foi alterado)
+    @classmethod
+    def atual(cls, id_profissional, data):
+        geracao = db.session.execute(
+            select(cls.geracao).where(cls.id_profissional == id_profissional, cls.data == data)
+        ).scalar()
+        return geracao or 0
+
+    # Incrementa a geração na transação corrente (sem commit) e retorna o novo valor
+    @classmethod
+    def incrementar(cls, id_profissional, data):
+        # Garante que a linha existe sem disputar a chave primária com outros processos
+        inserir_se_ausente(db.session, cls, id_profissional=id_profissional, data=data, geracao=0)
+
+        db.session.execute(
+            update(cls)
+            .where(cls.id_profissional == id_profissional, cls.data == data)
+            .values(geracao=cls.geracao + 1)
+        )
+        return cls.atual(id_profissional, data)
+
+    # Incrementa a geração de vários dias de uma vez (sem commit) e retorna {data: nova geração}
+    @classmethod
+    def incrementar_dias(cls, id_profissional, datas):
+        datas = sorted(set(datas))
+        inserir_se_ausentes(db.session, cls, [
+            {"id_profissional": id_profissional, "data": data, "geracao": 0} for data in datas])
+
+        db.session.execute(
+            update(cls)
+            .where(cls.id_profissional == id_profissional, cls.data.in_(datas))
+            .values(geracao=cls.geracao + 1)
+        )
+        return dict(db.session.execute(
+            select(cls.data, cls.geracao).where(cls.id_profissional == id_profissional, cls.data.in_(datas))
+        ).all())
+
+    # Soma das gerações de um período: as gerações só crescem, então a soma
+    # muda sempre que algum dia do período é alterado (usada como ETag)
+    @classmethod
+    def soma_periodo(cls, data_inicio, data_fim, profissionais_ids=None):
+        consulta = select(db.func.coalesce(db.func.sum(cls.geracao), 0)).where(
+            cls.data >= data_inicio, cls.data <= data_fim)
+        if profissionais_ids is not None:
+            consulta = consulta.where(cls.id_profissional.in_(profissionais_ids))
+        return db.session.execute(consulta).scalar()
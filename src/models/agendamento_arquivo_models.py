@@ -0,0 +1,47 @@
+from sqlalchemy import Boolean, Column, Integer, DateTime, String, ForeignKey, Text, Float, Index, func, select
+from src import db
+from src.models.agendamento_models import Agendamento_model
+
+
+# Agendamentos encerrados há mais tempo que o horizonte de arquivamento, movidos de tb_agendamento
+# (mesmas colunas e mesmos ids). A tabela quente fica só com a agenda recente e futura;
+# a listagem por usuário e a reconstrução do resumo juntam o arquivo quando o período pede
+class AgendamentoArquivo_model(db.Model):
+    __tablename__ = 'tb_agendamento_arquivo'
+
+    __table_args__ = (
+        Index('ix_agendamento_arquivo_usuario_atendimento', 'id_user', 'dt_atendimento', 'id'),
+        Index('ix_agendamento_arquivo_atendimento', 'dt_atendimento'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # o mesmo id que tinha em tb_agendamento
+    dt_agendamento = Column(DateTime, nullable=False)
+    dt_atendimento = Column(DateTime, nullable=False)
+    dt_fim = Column(DateTime, nullable=False)
+    id_user = Column(Integer, ForeignKey('tb_usuario.id'), nullable=False)
+    id_profissional = Column(Integer, ForeignKey('tb_profissional.id'), nullable=False)
+    id_servico = Column(Integer, ForeignKey('tb_servico.id'), nullable=False)
+    status = Column(String(20), nullable=False)
+    valor_total = Column(Float, nullable=False, default=0.00)
+    taxa_cancelamento = Column(Float, nullable=True, default=0.00)
+    observacoes = Column(Text, nullable=True)
+    compareceu = Column(Boolean, nullable=True)
+    dt_arquivamento = Column(DateTime, nullable=False)
+
+    # Colunas copiadas de tb_agendamento no arquivamento (todas, menos dt_arquivamento)
+    COLUNAS = ('id', 'dt_agendamento', 'dt_atendimento', 'dt_fim', 'id_user', 'id_profissional', 'id_servico',
+               'status', 'valor_total', 'taxa_cancelamento', 'observacoes', 'compareceu')
+
+    # Mesmo formato de retorno da API que os agendamentos da tabela quente
+    to_dict = Agendamento_model.to_dict
+
+    # Busca agendamento arquivado pelo id (o mesmo que tinha em tb_agendamento)
+    @classmethod
+    def find_by_id(cls, id):
+        return db.session.get(cls, id)
+
+    # Maior dt_atendimento arquivada (None com o arquivo vazio): nenhum período que comece
+    # depois dela precisa consultar o arquivo. Lida pelo índice de dt_atendimento
+    @classmethod
+    def fronteira(cls):
+        return db.session.execute(select(func.max(cls.dt_atendimento))).scalar()
@@ -1,34 +1,109 @@
 from datetime import datetime, timedelta
-from sqlalchemy import Column, Integer, DateTime, String, ForeignKey, Numeric, Text, Float  # importar as classes do sqlalchemy
+from sqlalchemy import Boolean, Column, Integer, DateTime, String, ForeignKey, Numeric, Text, Float, Index  # importar as classes do sqlalchemy
 from sqlalchemy.orm import relationship
 from src import db
 
 
 class Agendamento_model(db.Model):
     __tablename__ = 'tb_agendamento'
-    
+
+    # Índice composto usado na verificação de conflito de horários:
+    # profissional + status + início/fim permite responder com uma busca por faixa no índice
+    __table_args__ = (
+        Index('ix_agendamento_prof_status_periodo', 'id_profissional', 'status', 'dt_atendimento', 'dt_fim'),
+        # Listagem paginada dos agendamentos do usuário, em ordem de atendimento
+        Index('ix_agendamento_usuario_atendimento', 'id_user', 'dt_atendimento', 'id'),
+        # Encerramento dos agendamentos passados: percorre só os que ainda estão 'agendado'
+        Index('ix_agendamento_status_atendimento', 'status', 'dt_atendimento', 'id'),
+        # AUTOINCREMENT no SQLite: ids de agendamentos arquivados (apagados daqui) não são reutilizados
+        {'sqlite_autoincrement': True},
+    )
+
+    # Prazo para cancelar sem taxa e percentual cobrado depois dele
+    PRAZO_CANCELAMENTO_GRATUITO = timedelta(hours=24)
+    PERCENTUAL_TAXA_CANCELAMENTO = 0.20
+
+    # Status de um agendamento encerrado sem o cliente comparecer (cobra a taxa de cancelamento)
+    STATUS_FALTA = 'nao_compareceu'
+
     # Campos principais
     id = Column(Integer, primary_key=True, autoincrement=True)
     dt_agendamento = Column(DateTime, nullable=False, default=datetime.utcnow)
     dt_atendimento = Column(DateTime, nullable=False)
-    
+    dt_fim = Column(DateTime, nullable=False)  # Fim do atendimento (dt_atendimento + duração do serviço)
+
     # Chaves estrangeiras
     id_user = Column(Integer, ForeignKey('tb_usuario.id'), nullable=False)
     id_profissional = Column(Integer, ForeignKey('tb_profissional.id'), nullable=False)
     id_servico = Column(Integer, ForeignKey('tb_servico.id'), nullable=False)
-    
+
     # Campos adicionais
     status = Column(String(20), nullable=False, default='agendado')
     valor_total = Column(Float, nullable=False, default=0.00)
     taxa_cancelamento = Column(Float, nullable=True, default=0.00)
-    
+    observacoes = Column(Text, nullable=True)
+    compareceu = Column(Boolean, nullable=True)  # registrado pela recepção; nulo enquanto não informado
+
     # Relacionamentos com outras tabelas
-    usuario = relationship("Usuario_model", backref="tb_agendamentos")  
+    usuario = relationship("Usuario_model", backref="tb_agendamentos")
     profissional = relationship("Profissional_model", backref="tb_agendamentos")
     servico = relationship("Servico_model", backref="tb_agendamentos")
-    
-   
-    
-    
-   
-    
\ No newline at end of file
+
+    # Busca um agendamento pelo id
+    @classmethod
+    def find_by_id(cls, id):
+        return db.session.get(cls, id)
+
+    # Busca todos os agendamentos de um usuário
+    @classmethod
+    def find_by_user(cls, id_user):
+        return cls.query.filter_by(id_user=id_user).order_by(cls.dt_atendimento).all()
+
+    # Busca os agendamentos (não cancelados) de um profissional em um dia
+    @classmethod
+    def find_by_profissional_data(cls, id_profissional, data):
+        inicio_dia = datetime.combine(data, datetime.min.time())
+        fim_dia = inicio_dia + timedelta(days=1)
+        return cls.query.filter(
+            cls.id_profissional == id_profissional,
+            cls.status != 'cancelado',
+            cls.dt_atendimento >= inicio_dia,
+            cls.dt_atendimento < fim_dia
+        ).order_by(cls.dt_atendimento).all()
+
+    # Salva o agendamento no banco
+    def save(self):
+        db.session.add(self)
+        db.session.commit()
+
+    # Atualiza os campos informados e salva
+    def update(self, **campos):
+        for campo, valor in campos.items():
+            setattr(self, campo, valor)
+        db.session.commit()
+
+    # Cancelamento é gratuito se feito com antecedência mínima do atendimento
+    def pode_cancelar_gratuito(self):
+        return self.dt_atendimento - datetime.utcnow() >= self.PRAZO_CANCELAMENTO_GRATUITO
+
+    # Taxa cobrada sobre o valor do serviço quando o cancelamento não é gratuito (e nas faltas)
+    @classmethod
+    def calcular_taxa_cancelamento(cls, valor_servico):
+        return round(valor_servico * cls.PERCENTUAL_TAXA_CANCELAMENTO, 2)
+
+    # Converte o agendamento em dicionário para retorno na API
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "dt_agendamento": self.dt_agendamento.isoformat() if self.dt_agendamento else None,
+            "dt_atendimento": self.dt_atendimento.isoformat(),
+            "dt_fim": self.dt_fim.isoformat() if self.dt_fim else None,
+            "id_user": self.id_user,
+            "id_profissional": self.id_profissional,
+            "id_servico": self.id_servico,
+            "status": self.status,
+            "valor_total": self.valor_total,
+            "taxa_cancelamento": self.taxa_cancelamento,
+            "observacoes": self.observacoes,
+            "compareceu": self.compareceu
+        }
@@ -6,4 +6,9 @@ class Profissional_model(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     nome = db.Column(db.String(120), nullable=False)
 
+    # Busca um profissional pelo id
+    @classmethod
+    def find_by_id(cls, id):
+        return db.session.get(cls, id)
+
     
\ No newline at end of file
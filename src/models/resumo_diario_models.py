@@ -0,0 +1,51 @@
+from sqlalchemy import bindparam, update
+from src import db
+from src.banco import inserir_se_ausente, inserir_se_ausentes
+
+
+# Totais de um profissional em um dia, mantidos junto com os agendamentos:
+# os relatórios leem uma linha por profissional/dia em vez de varrer tb_agendamento
+class ResumoDiario_model(db.Model):
+    __tablename__ = "tb_resumo_diario"
+
+    id_profissional = db.Column(db.Integer, db.ForeignKey('tb_profissional.id'), primary_key=True)
+    data = db.Column(db.Date, primary_key=True)
+    receita = db.Column(db.Float, nullable=False, default=0.0)             # valor dos agendamentos não cancelados (nem faltas)
+    taxas_cancelamento = db.Column(db.Float, nullable=False, default=0.0)  # taxas cobradas nos cancelamentos e nas faltas
+    minutos_agendados = db.Column(db.Integer, nullable=False, default=0)   # duração dos agendamentos não cancelados (nem faltas)
+    agendamentos = db.Column(db.Integer, nullable=False, default=0)        # agendamentos não cancelados (nem faltas)
+    cancelamentos = db.Column(db.Integer, nullable=False, default=0)
+    faltas = db.Column(db.Integer, nullable=False, default=0, server_default="0")  # agendamentos encerrados como falta
+
+    # Soma os valores informados aos totais do dia na transação corrente (sem commit)
+    @classmethod
+    def acumular(cls, id_profissional, data, **valores):
+        inserir_se_ausente(db.session, cls, id_profissional=id_profissional, data=data)
+        db.session.execute(
+            update(cls)
+            .where(cls.id_profissional == id_profissional, cls.data == data)
+            .values({getattr(cls, campo): getattr(cls, campo) + valor for campo, valor in valores.items()})
+        )
+
+    # Soma os mesmos valores aos totais de vários dias (sem commit)
+    @classmethod
+    def acumular_dias(cls, id_profissional, datas, **valores):
+        cls.acumular_lote([{"id_profissional": id_profissional, "data": data, **valores}
+                           for data in sorted(set(datas))])
+
+    # Soma valores diferentes a vários dias: cada item tem id_profissional, data e os mesmos campos.
+    # Um comando cria as linhas que faltam e um UPDATE é executado em lote (sem commit)
+    @classmethod
+    def acumular_lote(cls, itens):
+        if not itens:
+            return
+        inserir_se_ausentes(db.session, cls, [
+            {"id_profissional": item["id_profissional"], "data": item["data"]} for item in itens])
+        tabela = cls.__table__
+        campos = [campo for campo in itens[0] if campo not in ("id_profissional", "data")]
+        db.session.execute(
+            update(tabela)
+            .where(tabela.c.id_profissional == bindparam("p_id_profissional"), tabela.c.data == bindparam("p_data"))
+            .values({tabela.c[campo]: tabela.c[campo] + bindparam(f"p_{campo}") for campo in campos}),
+            [{f"p_{chave}": valor for chave, valor in item.items()} for item in itens]
+        )
@@ -6,6 +6,11 @@ class Servico_model(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     descricao = db.Column(db.String(120), nullable=False)
     valor = db.Column(db.Float, nullable=False)
-    horario_duracao = db.Column(db.Float, nullable=False)
+    horario_duracao = db.Column(db.Float, nullable=False)  # Duração do serviço em minutos
+
+    # Busca um serviço pelo id
+    @classmethod
+    def find_by_id(cls, id):
+        return db.session.get(cls, id)
 
    
\ No newline at end of file
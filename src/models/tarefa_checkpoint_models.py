@@ -0,0 +1,36 @@
+from datetime import datetime
+from sqlalchemy import select, update
+from src import db
+from src.banco import inserir_se_ausente
+
+
+# Progresso das tarefas em lote (ex.: encerramento de agendamentos): a posição do último lote
+# confirmado é gravada na mesma transação do lote, então uma execução interrompida
+# continua de onde parou, com o mesmo corte
+class TarefaCheckpoint_model(db.Model):
+    __tablename__ = "tb_tarefa_checkpoint"
+
+    nome = db.Column(db.String(50), primary_key=True)
+    corte = db.Column(db.DateTime, nullable=True)       # corte da execução em andamento (nulo: nenhuma em andamento)
+    ultimo_dt = db.Column(db.DateTime, nullable=True)   # chave (dt_atendimento, id) do último registro processado
+    ultimo_id = db.Column(db.Integer, nullable=True)
+    processados = db.Column(db.Integer, nullable=False, default=0)
+    atualizado_em = db.Column(db.DateTime, nullable=True)
+
+    # Retorna o checkpoint da tarefa (None se a tarefa nunca rodou)
+    @classmethod
+    def obter(cls, nome):
+        return db.session.execute(select(cls).where(cls.nome == nome)).scalar()
+
+    # Grava a posição na transação corrente (sem commit)
+    @classmethod
+    def salvar(cls, nome, **campos):
+        inserir_se_ausente(db.session, cls, nome=nome, processados=0)
+        db.session.execute(
+            update(cls).where(cls.nome == nome).values(atualizado_em=datetime.utcnow(), **campos)
+        )
+
+    # Marca a execução como concluída: a próxima começa do início, com um novo corte
+    @classmethod
+    def concluir(cls, nome):
+        cls.salvar(nome, corte=None, ultimo_dt=None, ultimo_id=None)
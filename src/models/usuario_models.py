@@ -1,5 +1,6 @@
+from sqlalchemy import DDL, Index, event
 from src import db  # Importa a instância do banco de dados (SQLAlchemy)
-from passlib.hash import pbkdf2_sha256 as sha256  # Biblioteca para hash seguro de senhas
+from src.services import senha_services  # Hash das senhas (pbkdf2_sha256) em pool de processos
 
 # Modelo de usuário para o banco de dados
 class Usuario_model(db.Model):
@@ -11,12 +12,57 @@ class Usuario_model(db.Model):
     email = db.Column(db.String(120), nullable=False, unique=True)    # Email único
     senha = db.Column(db.String(255), nullable=False)                 # Senha (armazenada como hash)
     telefone = db.Column(db.String(120), nullable=False)              # Telefone do usuário
+    versao = db.Column(db.Integer, nullable=False, server_default="1")  # Incrementada a cada UPDATE (ETag do recurso)
+
+    # O SQLAlchemy incrementa a versão a cada alteração feita pelo ORM
+    __mapper_args__ = {"version_id_col": versao}
+
+    # Busca por prefixo (LIKE 'texto%') fora do SQLite, que usa o índice FTS5 abaixo;
+    # o email já tem o índice da restrição UNIQUE
+    __table_args__ = (
+        Index('ix_usuario_nome', 'nome').ddl_if(dialect='mysql'),
+        Index('ix_usuario_telefone', 'telefone').ddl_if(dialect='mysql'),
+        # AUTOINCREMENT no SQLite: o id de um usuário excluído não volta para outro (o ETag é id-versao)
+        {'sqlite_autoincrement': True},
+    )
 
 
     # Gera o hash da senha e armazena no campo 'senha'
     def gen_senha(self, senha):
-        self.senha = sha256.hash(senha)
+        self.senha = senha_services.gerar_hash(senha)
 
     # Verifica se a senha informada corresponde ao hash armazenado
     def verificar_senha(self, senha):
-        return sha256.verify(senha, self.senha)
\ No newline at end of file
+        return senha_services.verificar_senha(senha, self.senha)
+
+    # Indica se o hash armazenado usa rounds diferentes dos configurados
+    def precisa_rehash(self):
+        return senha_services.precisa_rehash(self.senha)
+
+
+# Índice de texto (FTS5) de nome, email e telefone para a busca de usuários no SQLite.
+# A tabela virtual só guarda o índice (o conteúdo continua em tb_usuario) e é mantida por triggers,
+# inclusive nas inserções em lote feitas sem o ORM. Criada junto com tb_usuario (create_all)
+# e pela migração correspondente em bancos existentes
+BUSCA_SQLITE = (
+    "CREATE VIRTUAL TABLE tb_usuario_busca USING fts5("
+    "nome, email, telefone, content='tb_usuario', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER tb_usuario_busca_ai AFTER INSERT ON tb_usuario BEGIN "
+    "INSERT INTO tb_usuario_busca(rowid, nome, email, telefone) VALUES (new.id, new.nome, new.email, new.telefone); "
+    "END",
+    "CREATE TRIGGER tb_usuario_busca_ad AFTER DELETE ON tb_usuario BEGIN "
+    "INSERT INTO tb_usuario_busca(tb_usuario_busca, rowid, nome, email, telefone) "
+    "VALUES ('delete', old.id, old.nome, old.email, old.telefone); "
+    "END",
+    "CREATE TRIGGER tb_usuario_busca_au AFTER UPDATE OF nome, email, telefone ON tb_usuario BEGIN "
+    "INSERT INTO tb_usuario_busca(tb_usuario_busca, rowid, nome, email, telefone) "
+    "VALUES ('delete', old.id, old.nome, old.email, old.telefone); "
+    "INSERT INTO tb_usuario_busca(rowid, nome, email, telefone) VALUES (new.id, new.nome, new.email, new.telefone); "
+    "END",
+)
+
+for comando in BUSCA_SQLITE:
+    event.listen(Usuario_model.__table__, 'after_create', DDL(comando).execute_if(dialect='sqlite'))
+event.listen(Usuario_model.__table__, 'before_drop',
+             DDL("DROP TABLE IF EXISTS tb_usuario_busca").execute_if(dialect='sqlite'))
@@ -0,0 +1,77 @@
+"""
+Serializadores compilados para as respostas da API
+A lista de campos de um schema vira, uma única vez, uma função especializada
+tupla de colunas -> dict, e o resultado é codificado direto em bytes JSON.
+O marshmallow continua responsável apenas pela validação da entrada.
+"""
+
+import json
+from itertools import repeat
+from operator import attrgetter
+
+try:
+    import orjson  # opcional: codificador em Rust, bem mais rápido que o json da biblioteca padrão
+except ImportError:
+    orjson = None
+
+# Codificador da biblioteca padrão criado uma vez (usa o encoder em C, sem espaços e sem checar ciclos)
+_codificador = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), check_circular=False)
+
+
+def codificar_json(dados) -> bytes:
+    """
+    Codifica dicts/listas com tipos simples (str, int, float, bool, None) em bytes JSON.
+    """
+    if orjson is not None:
+        return orjson.dumps(dados)
+    return _codificador.encode(dados).encode('utf-8')
+
+
+class Serializador:
+    """
+    Serializa linhas (tuplas na ordem de `colunas`) para dicts com as chaves de `chaves`.
+    As funções de conversão são montadas uma vez na criação (zip das chaves com a linha, feito em C),
+    sem a busca de campos e atributos que o marshmallow faz a cada objeto.
+    """
+
+    def __init__(self, colunas, chaves=None):
+        self.colunas = tuple(colunas)
+        self.chaves = tuple(chaves or colunas)
+
+        def para_dict(linha, _chaves=self.chaves):
+            return dict(zip(_chaves, linha))
+
+        def para_dicts(linhas, _chaves=self.chaves):
+            return list(map(dict, map(zip, repeat(_chaves), linhas)))
+
+        self.para_dict = para_dict
+        self.para_dicts = para_dicts
+        self._atributos = attrgetter(*self.colunas) if len(self.colunas) > 1 else (
+            lambda objeto, _ler=attrgetter(self.colunas[0]): (_ler(objeto),))
+
+    @classmethod
+    def de_schema(cls, schema_cls):
+        """
+        Compila os campos que o schema devolve na serialização (ignora os load_only).
+        """
+        campos = schema_cls().dump_fields
+        return cls([campo.attribute or nome for nome, campo in campos.items()],
+                   [campo.data_key or nome for nome, campo in campos.items()])
+
+    def de_objeto(self, objeto) -> dict:
+        """
+        Serializa um objeto (ex.: um model) lendo os atributos das colunas.
+        """
+        return self.para_dict(self._atributos(objeto))
+
+    def json(self, linha) -> bytes:
+        return codificar_json(self.para_dict(linha))
+
+    def json_lista(self, linhas) -> bytes:
+        return codificar_json(self.para_dicts(linhas))
+
+    def ndjson(self, linhas) -> bytes:
+        """
+        Uma linha JSON por registro (application/x-ndjson).
+        """
+        return b''.join(codificar_json(self.para_dict(linha)) + b'\n' for linha in linhas)
@@ -1,16 +1,22 @@
 from src import ma  # Importa a instância do Marshmallow
 from src.models import usuario_models  # Importa o modelo de usuário
 from marshmallow import fields  # Importa tipos de campos para validação
+from src.schemas.serializadores import Serializador
 
 
 # Schema para serializar e validar dados do usuário
 class UsuarioSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = usuario_models.Usuario_model  # Modelo associado ao schema
-        fields = ('id', 'nome', 'email', 'senha', 'telefone')  # Campos que serão serializados
+        fields = ('id', 'nome', 'email', 'senha', 'telefone')  # Campos do schema (a senha só é lida na entrada)
 
     # Campos obrigatórios para validação na criação de usuário, o id não é obrigatório
     nome = fields.String(required=True)
     email = fields.String(required=True)
     telefone = fields.String(required=True)
-    senha = fields.String(required=True)
+    senha = fields.String(required=True, load_only=True)  # Só entra na validação: o hash nunca é devolvido
+
+
+# Serializador compilado com os campos de saída do schema (id, nome, email, telefone)
+usuario_serializador = Serializador.de_schema(UsuarioSchema)
+
@@ -3,12 +3,24 @@ Service para gerenciamento de agendamentos
 Contém toda a lógica de negócio relacionada aos agendamentos
 """
 
-from datetime import datetime, timedelta, time
+import base64
+import calendar
+import heapq
+import itertools
+from datetime import datetime, timedelta, time, timezone
 from typing import List, Dict, Optional, Tuple
-from src.models.agendamento_models import Agendamento  # Importa o modelo de agendamento
-from src.models.servico_models import Servico          # Importa o modelo de serviço
-from src.models.profissional_models import Profissional # Importa o modelo de profissional
-from src.models.usuario_models import Usuario           # Importa o modelo de usuário
+from flask import current_app
+from src import db
+from src.models.agendamento_models import Agendamento_model as Agendamento  # Importa o modelo de agendamento
+from src.models.agendamento_arquivo_models import AgendamentoArquivo_model as AgendamentoArquivo  # Agendamentos antigos arquivados
+from src.models.servico_models import Servico_model as Servico              # Importa o modelo de serviço
+from src.models.profissional_models import Profissional_model as Profissional # Importa o modelo de profissional
+from src.models.usuario_models import Usuario_model as Usuario              # Importa o modelo de usuário
+from src.models.agenda_geracao_models import AgendaGeracao_model as AgendaGeracao # Geração da agenda por dia
+from src.models.resumo_diario_models import ResumoDiario_model as ResumoDiario   # Totais por profissional/dia
+from src.services.coalescencia import Coalescedor
+from src.services.ocupacao_cache import OcupacaoCache
+from src.services.servico_catalogo import servico_catalogo     # Durações e valores dos serviços em memória
 
 
 class AgendamentoService:
@@ -21,16 +33,24 @@ class AgendamentoService:
     HORA_FECHAMENTO = 20  # Horário de fechamento (20h)
     HORA_ALMOCO_INICIO = 12  # Início do horário de almoço (12h)
     HORA_ALMOCO_FIM = 13  # Fim do horário de almoço (13h)
+    SLOT_MINUTOS = 30  # Intervalo entre os horários oferecidos
+    # Maior duração de um agendamento (um serviço), recusada na reserva: limita a busca de conflitos
+    # independente do catálogo atual, que pode ter encurtado serviços já agendados
+    DURACAO_MAXIMA_MINUTOS = (HORA_FECHAMENTO - HORA_ABERTURA) * 60
+    MAX_DIAS_LOTE = 31  # Maior período aceito na consulta de disponibilidade em lote
+    MAX_HORARIOS_BUSCA = 50  # Maior quantidade de horários devolvida pela busca dos próximos horários
     
-    # Durações dos serviços em minutos
-    DURACAO_SERVICOS = {
-        'alisamento': 30,
-        'corte tesoura': 60,
-        'corte maquina': 60,
-        'barba': 30,
-        'sobrancelha': 10,
-        'pintura': 120
-    }
+    # Agendamentos recorrentes
+    MAX_OCORRENCIAS_RECORRENCIA = 200  # Maior número de ocorrências de uma série
+    TAMANHO_LOTE_RECORRENCIA = 500  # Agendamentos enviados ao banco por flush dentro da transação
+    FREQUENCIAS_RECORRENCIA = ('DAILY', 'WEEKLY', 'MONTHLY')
+    
+    # Paginação das listagens
+    LIMITE_PADRAO_PAGINA = 50
+    LIMITE_MAXIMO_PAGINA = 200
+    
+    # Status que ocupam a agenda do profissional (usados na verificação de conflito)
+    STATUS_OCUPANTES = ('agendado', 'finalizado', Agendamento.STATUS_FALTA)
     
     @staticmethod
     def criar_agendamento(dt_atendimento: datetime, id_user: int, 
@@ -40,6 +60,9 @@ class AgendamentoService:
         Cria um ou mais agendamentos para um usuário e profissional, considerando os serviços escolhidos.
         Realiza validações de dados, horário, disponibilidade e salva os agendamentos no banco.
         Retorna os agendamentos criados ou mensagem de erro.
+        Todos os serviços são gravados em uma única transação, serializada por profissional/dia:
+        a transação começa travando a linha da agenda do dia, então duas reservas concorrentes
+        não passam juntas pela verificação de disponibilidade.
         """
         try:
             # Validações básicas dos dados recebidos
@@ -55,25 +78,23 @@ class AgendamentoService:
             if not AgendamentoService._verificar_horario_funcionamento(dt_atendimento):
                 return {"erro": "Horário fora do funcionamento do estabelecimento"}
             
-            # Busca os serviços e calcula duração e valor total
-            servicos = []
-            duracao_total = 0
-            valor_total = 0
-            
-            for servico_id in servicos_ids:
-                servico = Servico.find_by_id(servico_id)  # Busca serviço pelo id
-                if not servico:
-                    return {"erro": f"Serviço com ID {servico_id} não encontrado"}
-                
-                servicos.append(servico)
-                duracao_total += AgendamentoService.DURACAO_SERVICOS.get(
-                    servico.nome.lower(), 60)  # Se não encontrar, assume 60min
-                valor_total += float(servico.preco)
+            # Trava a agenda do profissional no dia, antes de qualquer leitura da transação:
+            # no SQLite garante o lock de escrita do banco, no MySQL trava a linha até o commit.
+            # No REPEATABLE READ do InnoDB a primeira leitura fixa o retrato da transação, então uma
+            # leitura anterior (ex.: a recarga do catálogo) esconderia reservas confirmadas durante a espera
+            geracao = AgendaGeracao.incrementar(id_profissional, dt_atendimento.date())
             
-            # Verifica se o profissional está disponível no horário
+            # Busca os serviços e calcula duração e valor total
+            servicos, duracao_total, valor_total = AgendamentoService._resolver_servicos(servicos_ids)
+            if isinstance(servicos, str):
+                db.session.rollback()  # Libera a agenda
+                return {"erro": servicos}
             dt_fim = dt_atendimento + timedelta(minutes=duracao_total)
+            
+            # Verifica se o profissional está disponível no horário (já com a agenda travada)
             if not AgendamentoService._verificar_disponibilidade(
                 id_profissional, dt_atendimento, dt_fim):
+                db.session.rollback()  # Libera a agenda
                 return {"erro": "Horário não disponível para o profissional"}
             
             # Cria os agendamentos (um para cada serviço)
@@ -81,24 +102,35 @@ class AgendamentoService:
             dt_atual = dt_atendimento
             
             for i, servico in enumerate(servicos):
-                duracao_servico = AgendamentoService.DURACAO_SERVICOS.get(
-                    servico.nome.lower(), 60)
+                duracao_servico = servico.duracao
                 
                 agendamento = Agendamento(
                     dt_atendimento=dt_atual,
+                    dt_fim=dt_atual + timedelta(minutes=duracao_servico),  # Fim já calculado para a busca de conflitos
                     id_user=id_user,
                     id_profissional=id_profissional,
                     id_servico=servico.id,
                     observacoes=observacoes if i == 0 else None,  # Observação só no primeiro
-                    valor_total=float(servico.preco)
+                    valor_total=servico.valor
                 )
-                
-                agendamento.save()  # Salva no banco
                 agendamentos_criados.append(agendamento)
                 
                 # Atualiza o horário para o próximo serviço
                 dt_atual += timedelta(minutes=duracao_servico)
             
+            # Grava todos os serviços de uma vez: ou a reserva inteira entra, ou nada entra
+            # (os totais do dia para os relatórios entram na mesma transação)
+            db.session.add_all(agendamentos_criados)
+            ResumoDiario.acumular(id_profissional, dt_atendimento.date(),
+                                  receita=valor_total,
+                                  minutos_agendados=duracao_total,
+                                  agendamentos=len(agendamentos_criados))
+            db.session.commit()
+            
+            # Atualiza a ocupação em memória sem reler o dia
+            ocupacao_cache.marcar(id_profissional, dt_atendimento, dt_fim, geracao)
+            horarios_coalescedor.invalidar((id_profissional, dt_atendimento.date()))
+            
             # Retorna os agendamentos criados, valor e duração total
             return {
                 "sucesso": True,
@@ -108,7 +140,160 @@ class AgendamentoService:
             }
             
         except Exception as e:
-            # Retorna erro interno se ocorrer exceção
+            # Desfaz a reserva parcial e retorna erro interno se ocorrer exceção
+            db.session.rollback()
+            return {"erro": f"Erro interno: {str(e)}"}
+    
+    @staticmethod
+    def criar_agendamentos_recorrentes(dt_inicio: datetime, id_user: int,
+                                       id_profissional: int, servicos_ids: List[int],
+                                       regra, observacoes: str = None,
+                                       parcial: bool = True) -> Dict:
+        """
+        Cria uma série de agendamentos a partir de uma regra no estilo RRULE
+        (ex.: "FREQ=WEEKLY;INTERVAL=2;COUNT=13": a cada duas semanas, 13 vezes).
+        A primeira ocorrência é dt_inicio. As ocorrências são conferidas contra a agenda do
+        profissional com uma única consulta do período e gravadas em uma única transação.
+        Com parcial=True grava as ocorrências livres e devolve as recusadas com o motivo;
+        com parcial=False qualquer recusa cancela a série inteira.
+        """
+        try:
+            # Mesmas validações de criar_agendamento, feitas uma vez para a série
+            if not AgendamentoService._validar_dados_basicos(
+                dt_inicio, id_user, id_profissional, servicos_ids):
+                return {"erro": "Dados inválidos fornecidos"}
+            
+            try:
+                ocorrencias = AgendamentoService._expandir_recorrencia(dt_inicio, regra)
+            except ValueError as e:
+                return {"erro": f"Regra de recorrência inválida: {e}"}
+            
+            # Recusa as ocorrências no passado ou fora do funcionamento antes de tocar no banco
+            agora = datetime.utcnow()
+            recusadas = []
+            candidatas = []
+            for ocorrencia in ocorrencias:
+                if ocorrencia <= agora:
+                    recusadas.append((ocorrencia, "Não é possível agendar para datas passadas"))
+                elif not AgendamentoService._verificar_horario_funcionamento(ocorrencia):
+                    recusadas.append((ocorrencia, "Horário fora do funcionamento do estabelecimento"))
+                else:
+                    candidatas.append(ocorrencia)
+            
+            aceitas = []
+            geracoes = {}
+            if candidatas:
+                # Trava a agenda de todos os dias da série antes de qualquer leitura da transação
+                # (no REPEATABLE READ do InnoDB a primeira leitura fixa o retrato, ver criar_agendamento)
+                geracoes = AgendaGeracao.incrementar_dias(
+                    id_profissional, [ocorrencia.date() for ocorrencia in candidatas])
+            
+            servicos, duracao_total, valor_total = AgendamentoService._resolver_servicos(servicos_ids)
+            if isinstance(servicos, str):
+                db.session.rollback()  # Libera a agenda
+                return {"erro": servicos}
+            duracao = timedelta(minutes=duracao_total)
+            
+            if candidatas:
+                # Uma consulta com os intervalos ocupados do período inteiro, em ordem de início
+                ocupados = db.session.execute(
+                    db.select(Agendamento.dt_atendimento, Agendamento.dt_fim).where(
+                        Agendamento.id_profissional == id_profissional,
+                        Agendamento.status.in_(AgendamentoService.STATUS_OCUPANTES),
+                        Agendamento.dt_atendimento < candidatas[-1] + duracao,
+                        Agendamento.dt_atendimento > candidatas[0] - timedelta(
+                            minutes=AgendamentoService.DURACAO_MAXIMA_MINUTOS),
+                        Agendamento.dt_fim > candidatas[0]
+                    ).order_by(Agendamento.dt_atendimento)
+                ).all()
+                
+                # Varredura: as ocorrências estão em ordem, então um intervalo que termina antes
+                # de uma ocorrência não interessa a nenhuma das seguintes
+                indice = 0
+                for ocorrencia in candidatas:
+                    fim = ocorrencia + duracao
+                    while indice < len(ocupados) and ocupados[indice][1] <= ocorrencia:
+                        indice += 1
+                    conflito = False
+                    i = indice
+                    while i < len(ocupados) and ocupados[i][0] < fim:
+                        if ocupados[i][1] > ocorrencia:
+                            conflito = True
+                            break
+                        i += 1
+                    if conflito:
+                        recusadas.append((ocorrencia, "Horário não disponível para o profissional"))
+                    else:
+                        aceitas.append(ocorrencia)
+            
+            recusadas.sort()
+            conflitos = [{"dt_atendimento": ocorrencia.isoformat(), "motivo": motivo}
+                         for ocorrencia, motivo in recusadas]
+            
+            if not aceitas or (recusadas and not parcial):
+                db.session.rollback()  # Libera a agenda
+                return {"erro": "Nenhuma ocorrência da série pôde ser agendada" if not aceitas
+                        else "Há ocorrências da série indisponíveis", "conflitos": conflitos}
+            
+            # Linhas de todas as ocorrências (um agendamento por serviço, em sequência)
+            linhas = []
+            for ocorrencia in aceitas:
+                dt_atual = ocorrencia
+                for i, servico in enumerate(servicos):
+                    linhas.append({
+                        "dt_agendamento": agora,
+                        "dt_atendimento": dt_atual,
+                        "dt_fim": dt_atual + timedelta(minutes=servico.duracao),
+                        "id_user": id_user,
+                        "id_profissional": id_profissional,
+                        "id_servico": servico.id,
+                        "status": 'agendado',
+                        "observacoes": observacoes if i == 0 else None,
+                        "valor_total": servico.valor,
+                        "taxa_cancelamento": 0.0
+                    })
+                    dt_atual += timedelta(minutes=servico.duracao)
+            
+            # INSERT em lotes (executemany, sem o INSERT por objeto do flush do ORM), todos
+            # na mesma transação: ou a série aceita entra inteira, ou nada entra
+            lote = AgendamentoService.TAMANHO_LOTE_RECORRENCIA
+            for inicio_lote in range(0, len(linhas), lote):
+                db.session.execute(db.insert(Agendamento), linhas[inicio_lote:inicio_lote + lote])
+            ResumoDiario.acumular_dias(id_profissional, [ocorrencia.date() for ocorrencia in aceitas],
+                                       receita=valor_total,
+                                       minutos_agendados=duracao_total,
+                                       agendamentos=len(servicos))
+            
+            # Relê a série com os ids gerados, ainda com a agenda travada: nos horários aceitos
+            # não havia nenhum agendamento ocupando a agenda, então os encontrados são os da série
+            agendamentos_criados = db.session.execute(
+                db.select(Agendamento).where(
+                    Agendamento.id_profissional == id_profissional,
+                    Agendamento.status == 'agendado',
+                    Agendamento.dt_atendimento.in_([linha["dt_atendimento"] for linha in linhas])
+                ).order_by(Agendamento.dt_atendimento)
+            ).scalars().all()
+            agendamentos = [ag.to_dict() for ag in agendamentos_criados]
+            db.session.commit()
+            
+            # Atualiza a ocupação em memória sem reler os dias
+            for ocorrencia in aceitas:
+                ocupacao_cache.marcar(id_profissional, ocorrencia, ocorrencia + duracao,
+                                      geracoes[ocorrencia.date()])
+                horarios_coalescedor.invalidar((id_profissional, ocorrencia.date()))
+            
+            return {
+                "sucesso": True,
+                "agendamentos": agendamentos,
+                "ocorrencias": [ocorrencia.isoformat() for ocorrencia in aceitas],
+                "conflitos": conflitos,
+                "valor_total": valor_total * len(aceitas),
+                "duracao_total": duracao_total
+            }
+            
+        except Exception as e:
+            # Desfaz a série parcial e retorna erro interno se ocorrer exceção
+            db.session.rollback()
             return {"erro": f"Erro interno: {str(e)}"}
     
     @staticmethod
@@ -132,18 +317,42 @@ class AgendamentoService:
             if agendamento.status == 'finalizado':
                 return {"erro": "Não é possível cancelar um agendamento finalizado"}
             
-            # Calcula taxa de cancelamento se não for gratuito
-            servico = Servico.find_by_id(agendamento.id_servico)
+            if agendamento.status == Agendamento.STATUS_FALTA:
+                return {"erro": "Não é possível cancelar um agendamento encerrado como falta"}
+            
+            # Calcula taxa de cancelamento se não for gratuito (sobre o valor cobrado no agendamento)
             taxa = 0.0
             
             if not agendamento.pode_cancelar_gratuito():
-                taxa = agendamento.calcular_taxa_cancelamento(float(servico.preco))
+                taxa = agendamento.calcular_taxa_cancelamento(float(agendamento.valor_total))
             
-            # Atualiza status e taxa no agendamento
+            # Trava a agenda do dia e relê o agendamento: um cancelamento concorrente
+            # pode ter sido confirmado depois da leitura acima (FOR UPDATE no MySQL também
+            # espera o encerramento em lote, que não passa pela agenda do dia)
+            geracao = AgendaGeracao.incrementar(agendamento.id_profissional,
+                                                agendamento.dt_atendimento.date())
+            db.session.refresh(agendamento, with_for_update=True)
+            if agendamento.status != 'agendado':
+                db.session.rollback()  # Libera a agenda
+                return {"erro": "Agendamento já foi cancelado" if agendamento.status == 'cancelado'
+                        else "Não é possível cancelar um agendamento finalizado"}
+            
+            # Retira o agendamento dos totais do dia e soma a taxa, na mesma transação do cancelamento
+            ResumoDiario.acumular(agendamento.id_profissional, agendamento.dt_atendimento.date(),
+                                  receita=-float(agendamento.valor_total),
+                                  minutos_agendados=-int((agendamento.dt_fim - agendamento.dt_atendimento).total_seconds() // 60),
+                                  agendamentos=-1,
+                                  cancelamentos=1,
+                                  taxas_cancelamento=taxa)
+            
+            # Atualiza status e taxa no agendamento (commit da transação)
             agendamento.update(
                 status='cancelado',
                 taxa_cancelamento=taxa
             )
+            ocupacao_cache.liberar(agendamento.id_profissional, agendamento.dt_atendimento,
+                                   agendamento.dt_fim, geracao)
+            horarios_coalescedor.invalidar((agendamento.id_profissional, agendamento.dt_atendimento.date()))
             
             # Retorna dados do cancelamento
             return {
@@ -154,62 +363,109 @@ class AgendamentoService:
             }
             
         except Exception as e:
-            # Retorna erro interno se ocorrer exceção
+            # Desfaz o cancelamento e retorna erro interno se ocorrer exceção
+            db.session.rollback()
             return {"erro": f"Erro interno: {str(e)}"}
     
     @staticmethod
-    def listar_horarios_disponiveis(profissional_id: int, data: datetime.date) -> Dict:
+    def registrar_comparecimento(agendamento_id: int, compareceu: bool) -> Dict:
+        """
+        Registra se o cliente compareceu a um agendamento que já começou.
+        Só vale enquanto o agendamento está 'agendado': o encerramento em lote usa o registro
+        para decidir entre 'finalizado' e falta (com taxa).
+        """
+        try:
+            if not isinstance(compareceu, bool):
+                return {"erro": "Informe compareceu como verdadeiro ou falso"}
+            
+            # UPDATE condicional: não disputa com o encerramento nem com um cancelamento
+            alterados = db.session.execute(
+                db.update(Agendamento)
+                .where(Agendamento.id == agendamento_id,
+                       Agendamento.status == 'agendado',
+                       Agendamento.dt_atendimento <= datetime.utcnow())
+                .values(compareceu=compareceu)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+            
+            agendamento = Agendamento.find_by_id(agendamento_id)
+            if not agendamento:
+                return {"erro": "Agendamento não encontrado"}
+            
+            if not alterados:
+                if agendamento.status != 'agendado':
+                    return {"erro": "Agendamento já foi encerrado ou cancelado"}
+                return {"erro": "O atendimento ainda não começou"}
+            
+            db.session.refresh(agendamento)
+            return {"sucesso": True, "agendamento": agendamento.to_dict()}
+            
+        except Exception as e:
+            # Desfaz o registro e retorna erro interno se ocorrer exceção
+            db.session.rollback()
+            return {"erro": f"Erro interno: {str(e)}"}
+    
+    @staticmethod
+    def geracao_agenda(profissional_id: int, data: datetime.date) -> int:
+        """
+        Geração atual da agenda do profissional no dia, lida no banco
+        (chamadas simultâneas compartilham uma única leitura).
+        """
+        return geracoes_coalescedor.executar(
+            (profissional_id, data), lambda: AgendaGeracao.atual(profissional_id, data))
+    
+    @staticmethod
+    def listar_horarios_disponiveis(profissional_id: int, data: datetime.date,
+                                    geracao: Optional[int] = None) -> Dict:
         """
         Lista todos os horários disponíveis para um profissional em um dia.
         Considera horários ocupados, funcionamento e horário de almoço.
+        A resposta reflete a geração da agenda informada (ou lida agora, se omitida): quem usa a geração
+        como ETag deve passar a mesma. Chamadas simultâneas com a mesma geração compartilham um único
+        cálculo, e o resultado vale por DISPONIBILIDADE_COALESCENCIA_SEGUNDOS enquanto a geração não mudar
+        (agendamentos e cancelamentos de qualquer processo a incrementam).
+        O dicionário retornado é compartilhado entre as chamadas e não deve ser alterado.
+        """
+        # Verifica se o profissional existe (pelo catálogo em memória), fora do resultado compartilhado
+        if not servico_catalogo.profissional_existe(profissional_id):
+            return {"erro": "Profissional não encontrado"}
+        
+        if geracao is None:
+            geracao = AgendamentoService.geracao_agenda(profissional_id, data)
+        return horarios_coalescedor.executar(
+            (profissional_id, data),
+            lambda: AgendamentoService._calcular_horarios_disponiveis(profissional_id, data, geracao),
+            validade=current_app.config.get('DISPONIBILIDADE_COALESCENCIA_SEGUNDOS', 0),
+            guardar=lambda resultado: 'sucesso' in resultado,
+            versao=geracao)
+    
+    @staticmethod
+    def _calcular_horarios_disponiveis(profissional_id: int, data: datetime.date,
+                                       geracao: Optional[int] = None) -> Dict:
+        """
+        Monta os horários disponíveis do dia (sem coalescência) de um profissional já conferido.
+        geracao, se já lida no banco, dispensa a ocupação em memória de conferir a sua.
         """
         try:
-            # Verifica se o profissional existe
-            if not Profissional.find_by_id(profissional_id):
-                return {"erro": "Profissional não encontrado"}
+            # Ocupação do dia em bitmap (vem do cache em memória na maioria das chamadas)
+            ocupados = ocupacao_cache.obter(profissional_id, data, geracao)
             
-            # Busca agendamentos do profissional no dia
-            agendamentos = Agendamento.find_by_profissional_data(profissional_id, data)
+            # Horário de almoço entra como slots sempre indisponíveis
+            inicio_dia = datetime.combine(data, time(AgendamentoService.HORA_ABERTURA))
+            ocupados |= AgendamentoService._mascara_almoco(data)
             
-            # Gera slots de horário (intervalos de 30 min)
+            # Gera os horários disponíveis a partir dos slots livres
             horarios_disponiveis = []
-            horarios_ocupados = set()
-            
-            # Marca horários ocupados
-            for agendamento in agendamentos:
-                servico = Servico.find_by_id(agendamento.id_servico)
-                duracao = AgendamentoService.DURACAO_SERVICOS.get(
-                    servico.nome.lower(), 60)
-                
-                inicio = agendamento.dt_atendimento
-                fim = inicio + timedelta(minutes=duracao)
-                
-                # Marca todos os slots ocupados
-                slot_atual = inicio
-                while slot_atual < fim:
-                    horarios_ocupados.add(slot_atual.strftime("%H:%M"))
-                    slot_atual += timedelta(minutes=30)
-            
-            # Gera horários disponíveis, pulando horário de almoço
-            data_completa = datetime.combine(data, time(AgendamentoService.HORA_ABERTURA))
-            
-            while data_completa.hour < AgendamentoService.HORA_FECHAMENTO:
-                # Pula horário de almoço
-                if (data_completa.hour >= AgendamentoService.HORA_ALMOCO_INICIO and 
-                    data_completa.hour < AgendamentoService.HORA_ALMOCO_FIM):
-                    data_completa += timedelta(minutes=30)
+            for slot in range(ocupacao_cache.total_slots):
+                if ocupados >> slot & 1:
                     continue
                 
-                horario_str = data_completa.strftime("%H:%M")
-                
-                # Adiciona horário se não estiver ocupado
-                if horario_str not in horarios_ocupados:
-                    horarios_disponiveis.append({
-                        "horario": horario_str,
-                        "timestamp": data_completa.isoformat()
-                    })
-                
-                data_completa += timedelta(minutes=30)
+                horario = inicio_dia + timedelta(minutes=slot * AgendamentoService.SLOT_MINUTOS)
+                horarios_disponiveis.append({
+                    "horario": horario.strftime("%H:%M"),
+                    "timestamp": horario.isoformat()
+                })
             
             # Retorna lista de horários disponíveis
             return {
@@ -222,63 +478,319 @@ class AgendamentoService:
             # Retorna erro interno se ocorrer exceção
             return {"erro": f"Erro interno: {str(e)}"}
     
+    @staticmethod
+    def listar_horarios_disponiveis_lote(profissionais_ids: Optional[List[int]],
+                                         data_inicio: datetime.date,
+                                         data_fim: datetime.date,
+                                         formato: str = 'bits') -> Dict:
+        """
+        Lista a disponibilidade de vários profissionais (ou de todos) em um período de dias.
+        Busca todos os agendamentos do período em uma única consulta e monta a grade
+        profissional x dia x slot com operações de bits (um inteiro por profissional/dia).
+        Formatos de retorno: 'bits' (string com '1' nos slots livres) ou 'intervalos'.
+        """
+        try:
+            if data_fim < data_inicio:
+                return {"erro": "Data final anterior à data inicial"}
+            
+            total_dias = (data_fim - data_inicio).days + 1
+            if total_dias > AgendamentoService.MAX_DIAS_LOTE:
+                return {"erro": f"Período máximo de {AgendamentoService.MAX_DIAS_LOTE} dias"}
+            
+            if formato not in ('bits', 'intervalos'):
+                return {"erro": "Formato inválido"}
+            
+            # Profissionais consultados (todos, se nenhum for informado)
+            consulta_profissionais = db.select(Profissional.id).order_by(Profissional.id)
+            if profissionais_ids:
+                consulta_profissionais = consulta_profissionais.where(Profissional.id.in_(profissionais_ids))
+            ids = db.session.execute(consulta_profissionais).scalars().all()
+            
+            # Uma única consulta com todos os agendamentos do período
+            inicio_periodo = datetime.combine(data_inicio, time())
+            agendamentos = db.session.execute(
+                db.select(Agendamento.id_profissional, Agendamento.dt_atendimento, Agendamento.dt_fim).where(
+                    Agendamento.id_profissional.in_(ids),
+                    Agendamento.status.in_(AgendamentoService.STATUS_OCUPANTES),
+                    Agendamento.dt_atendimento >= inicio_periodo,
+                    Agendamento.dt_atendimento < inicio_periodo + timedelta(days=total_dias)
+                )
+            ).all()
+            
+            # Grade de ocupação: começa com o almoço marcado em todos os dias
+            dias = [data_inicio + timedelta(days=d) for d in range(total_dias)]
+            grade = {
+                id_profissional: {dia: AgendamentoService._mascara_almoco(dia) for dia in dias}
+                for id_profissional in ids
+            }
+            for id_profissional, inicio, fim in agendamentos:
+                grade[id_profissional][inicio.date()] |= ocupacao_cache.mascara_intervalo(
+                    inicio.date(), inicio, fim)
+            
+            # Converte cada dia para o formato compacto pedido
+            todos_slots = (1 << ocupacao_cache.total_slots) - 1
+            profissionais = []
+            for id_profissional in ids:
+                dias_profissional = {}
+                for dia, ocupados in grade[id_profissional].items():
+                    livres = ~ocupados & todos_slots
+                    if formato == 'bits':
+                        # Slot 0 (abertura) é o primeiro caractere
+                        dias_profissional[dia.isoformat()] = format(
+                            livres, f'0{ocupacao_cache.total_slots}b')[::-1]
+                    else:
+                        dias_profissional[dia.isoformat()] = AgendamentoService._intervalos_livres(livres)
+                profissionais.append({
+                    "id_profissional": id_profissional,
+                    "dias": dias_profissional
+                })
+            
+            return {
+                "sucesso": True,
+                "abertura": time(AgendamentoService.HORA_ABERTURA).strftime("%H:%M"),
+                "slot_minutos": AgendamentoService.SLOT_MINUTOS,
+                "formato": formato,
+                "profissionais": profissionais
+            }
+            
+        except Exception as e:
+            # Retorna erro interno se ocorrer exceção
+            return {"erro": f"Erro interno: {str(e)}"}
+    
+    @staticmethod
+    def buscar_proximos_horarios(servicos_ids: List[int],
+                                 inicio: datetime,
+                                 fim: datetime,
+                                 quantidade: int = 5,
+                                 profissionais_ids: Optional[List[int]] = None) -> Dict:
+        """
+        Busca os primeiros horários, com qualquer profissional (ou entre os informados),
+        em que cabem todos os serviços em sequência dentro da janela [inicio, fim).
+        Carrega os intervalos ocupados de todos os profissionais em uma única consulta e
+        intercala as lacunas livres de cada um (heap) em ordem de horário.
+        """
+        try:
+            if not servicos_ids or not isinstance(servicos_ids, list):
+                return {"erro": "Informe ao menos um serviço"}
+            
+            if fim <= inicio:
+                return {"erro": "Fim da janela deve ser posterior ao início"}
+            
+            if (fim.date() - inicio.date()).days + 1 > AgendamentoService.MAX_DIAS_LOTE:
+                return {"erro": f"Período máximo de {AgendamentoService.MAX_DIAS_LOTE} dias"}
+            
+            if not 1 <= quantidade <= AgendamentoService.MAX_HORARIOS_BUSCA:
+                return {"erro": f"Quantidade deve estar entre 1 e {AgendamentoService.MAX_HORARIOS_BUSCA}"}
+            
+            # Mesma duração e valor que criar_agendamento calcularia para os serviços
+            servicos, duracao_total, valor_total = AgendamentoService._resolver_servicos(servicos_ids)
+            if isinstance(servicos, str):
+                return {"erro": servicos}
+            
+            inicio = max(inicio, datetime.utcnow())  # Não oferece horários no passado
+            
+            consulta_profissionais = db.select(Profissional.id).order_by(Profissional.id)
+            if profissionais_ids:
+                consulta_profissionais = consulta_profissionais.where(Profissional.id.in_(profissionais_ids))
+            ids = db.session.execute(consulta_profissionais).scalars().all()
+            
+            # Uma única consulta com os intervalos ocupados de todos na janela, já em ordem
+            ocupados = {id_profissional: [] for id_profissional in ids}
+            for id_profissional, dt_inicio, dt_fim in db.session.execute(
+                db.select(Agendamento.id_profissional, Agendamento.dt_atendimento, Agendamento.dt_fim).where(
+                    Agendamento.id_profissional.in_(ids),
+                    Agendamento.status.in_(AgendamentoService.STATUS_OCUPANTES),
+                    Agendamento.dt_atendimento < fim,
+                    Agendamento.dt_atendimento > inicio - timedelta(minutes=AgendamentoService.DURACAO_MAXIMA_MINUTOS),
+                    Agendamento.dt_fim > inicio
+                ).order_by(Agendamento.dt_atendimento)
+            ):
+                ocupados[id_profissional].append((dt_inicio, dt_fim))
+            
+            # Lacunas de cada profissional em ordem de horário, intercaladas pelo heap do merge
+            duracao = timedelta(minutes=duracao_total)
+            lacunas = heapq.merge(*(
+                AgendamentoService._lacunas_livres(id_profissional, intervalos, inicio, fim, duracao)
+                for id_profissional, intervalos in ocupados.items()
+            ))
+            
+            horarios = [
+                {
+                    "id_profissional": id_profissional,
+                    "inicio": dt_inicio.isoformat(),
+                    "fim": (dt_inicio + duracao).isoformat(),
+                    "livre_ate": livre_ate.isoformat()
+                }
+                for dt_inicio, id_profissional, livre_ate in itertools.islice(lacunas, quantidade)
+            ]
+            
+            return {
+                "sucesso": True,
+                "duracao_total": duracao_total,
+                "valor_total": valor_total,
+                "horarios": horarios
+            }
+            
+        except Exception as e:
+            # Retorna erro interno se ocorrer exceção
+            return {"erro": f"Erro interno: {str(e)}"}
+    
+    @staticmethod
+    def versao_disponibilidade(profissionais_ids: Optional[List[int]],
+                               data_inicio: datetime.date,
+                               data_fim: datetime.date,
+                               geracao: Optional[int] = None) -> str:
+        """
+        Versão da disponibilidade de um período, usada como ETag sem montar a grade.
+        Muda quando algum dia do período recebe agendamento ou cancelamento
+        (soma das gerações) ou quando o conjunto de profissionais muda.
+        Para um profissional e um dia, geracao é a já lida para montar a resposta, e a existência
+        do profissional vem do catálogo em memória: nenhuma consulta ao banco.
+        """
+        if geracao is not None and profissionais_ids and len(profissionais_ids) == 1:
+            id_profissional = profissionais_ids[0]
+            existe = servico_catalogo.profissional_existe(id_profissional)
+            return f"{geracao}-{int(existe)}-{id_profissional if existe else 0}"
+        
+        consulta_profissionais = db.select(db.func.count(Profissional.id), db.func.max(Profissional.id))
+        if profissionais_ids:
+            consulta_profissionais = consulta_profissionais.where(Profissional.id.in_(profissionais_ids))
+        total, maior_id = db.session.execute(consulta_profissionais).one()
+        
+        soma = AgendaGeracao.soma_periodo(data_inicio, data_fim, profissionais_ids or None)
+        return f"{soma}-{total}-{maior_id or 0}"
+    
+    @staticmethod
+    def obter_agendamento(agendamento_id: int) -> Dict:
+        """
+        Busca um agendamento pelo id. Se não está na tabela quente, procura no arquivo
+        (agendamentos encerrados antigos mantêm o mesmo id); "arquivado" indica de onde veio.
+        """
+        try:
+            agendamento = Agendamento.find_by_id(agendamento_id)
+            arquivado = agendamento is None
+            if arquivado:
+                agendamento = AgendamentoArquivo.find_by_id(agendamento_id)
+            
+            if not agendamento:
+                return {"erro": "Agendamento não encontrado"}
+            
+            return {"sucesso": True, "agendamento": agendamento.to_dict(), "arquivado": arquivado}
+            
+        except Exception as e:
+            return {"erro": f"Erro interno: {str(e)}"}
+    
     @staticmethod
     def listar_agendamentos_usuario(user_id: int, 
                                    status: str = None,
                                    data_inicio: datetime = None,
-                                   data_fim: datetime = None) -> Dict:
+                                   data_fim: datetime = None,
+                                   limite: int = None,
+                                   cursor: str = None) -> Dict:
         """
         Lista agendamentos de um usuário, podendo filtrar por status e datas.
         Enriquecer dados com informações do serviço e profissional.
+        Os filtros e a junção com serviço/profissional são feitos em uma única consulta,
+        paginada por cursor (dt_atendimento, id) para o tempo de resposta não crescer com o histórico.
+        O arquivo (agendamentos encerrados antigos) só é consultado quando o período e o cursor
+        alcançam a data do agendamento mais recente arquivado; as duas partes são intercaladas em ordem.
         """
         try:
-            agendamentos = Agendamento.find_by_user(user_id)  # Busca agendamentos do usuário
+            if not limite or limite <= 0:
+                limite = AgendamentoService.LIMITE_PADRAO_PAGINA
+            limite = min(limite, AgendamentoService.LIMITE_MAXIMO_PAGINA)
+            
+            # Continua a partir do último agendamento da página anterior
+            posicao = None
+            if cursor:
+                posicao = AgendamentoService._decodificar_cursor(cursor)
+                if not posicao:
+                    return {"erro": "Cursor inválido"}
             
-            # Aplica filtros de status e datas
-            if status:
-                agendamentos = [ag for ag in agendamentos if ag.status == status]
+            # Busca um registro a mais para saber se existe próxima página
+            linhas = AgendamentoService._consultar_agendamentos_usuario(
+                Agendamento, user_id, status, data_inicio, data_fim, posicao, limite + 1)
             
-            if data_inicio:
-                agendamentos = [ag for ag in agendamentos 
-                               if ag.dt_atendimento >= data_inicio]
+            # Só agendamentos encerrados são arquivados, e nenhum depois da fronteira
+            if status != 'agendado':
+                fronteira = AgendamentoArquivo.fronteira()
+                if (fronteira is not None
+                        and (data_inicio is None or data_inicio <= fronteira)
+                        and (posicao is None or posicao[0] <= fronteira)):
+                    arquivados = AgendamentoService._consultar_agendamentos_usuario(
+                        AgendamentoArquivo, user_id, status, data_inicio, data_fim, posicao, limite + 1)
+                    chave = lambda linha: (linha[0].dt_atendimento, linha[0].id)
+                    linhas = list(itertools.islice(heapq.merge(arquivados, linhas, key=chave), limite + 1))
             
-            if data_fim:
-                agendamentos = [ag for ag in agendamentos 
-                               if ag.dt_atendimento <= data_fim]
+            tem_proxima = len(linhas) > limite
+            linhas = linhas[:limite]
             
-            # Adiciona dados detalhados de serviço e profissional
+            # Monta os dados detalhados de serviço e profissional a partir da mesma linha
             agendamentos_detalhados = []
-            for agendamento in agendamentos:
+            for agendamento, servico_nome, servico_valor, profissional_nome in linhas:
                 ag_dict = agendamento.to_dict()
-                
-                # Dados do serviço
-                servico = Servico.find_by_id(agendamento.id_servico)
                 ag_dict['servico'] = {
-                    'nome': servico.nome,
-                    'preco': float(servico.preco),
-                    'duracao': AgendamentoService.DURACAO_SERVICOS.get(
-                        servico.nome.lower(), 60)
+                    'nome': servico_nome,
+                    'preco': float(servico_valor),
+                    'duracao': int((agendamento.dt_fim - agendamento.dt_atendimento).total_seconds() // 60)
                 }
-                
-                # Dados do profissional
-                profissional = Profissional.find_by_id(agendamento.id_profissional)
                 ag_dict['profissional'] = {
-                    'nome': profissional.nome,
-                    'especialidade': profissional.especialidade
+                    'nome': profissional_nome
                 }
-                
                 agendamentos_detalhados.append(ag_dict)
             
+            proximo_cursor = None
+            if tem_proxima:
+                ultimo = linhas[-1][0]
+                proximo_cursor = AgendamentoService._codificar_cursor(ultimo.dt_atendimento, ultimo.id)
+            
             # Retorna lista de agendamentos detalhados
             return {
                 "sucesso": True,
-                "agendamentos": agendamentos_detalhados
+                "agendamentos": agendamentos_detalhados,
+                "proximo_cursor": proximo_cursor
             }
             
         except Exception as e:
             # Retorna erro interno se ocorrer exceção
             return {"erro": f"Erro interno: {str(e)}"}
     
+    @staticmethod
+    def _consultar_agendamentos_usuario(modelo, user_id: int, status: Optional[str],
+                                        data_inicio: Optional[datetime], data_fim: Optional[datetime],
+                                        posicao: Optional[Tuple[datetime, int]], limite: int):
+        """
+        Página de agendamentos do usuário em tb_agendamento ou no arquivo (mesmas colunas),
+        com serviço e profissional, em ordem de (dt_atendimento, id).
+        """
+        consulta = (
+            db.select(modelo, Servico.descricao, Servico.valor, Profissional.nome)
+            .join(Servico, Servico.id == modelo.id_servico)
+            .join(Profissional, Profissional.id == modelo.id_profissional)
+            .where(modelo.id_user == user_id)
+        )
+        
+        # Aplica filtros de status e datas no próprio banco
+        if status:
+            consulta = consulta.where(modelo.status == status)
+        
+        if data_inicio:
+            consulta = consulta.where(modelo.dt_atendimento >= data_inicio)
+        
+        if data_fim:
+            consulta = consulta.where(modelo.dt_atendimento <= data_fim)
+        
+        if posicao:
+            dt_cursor, id_cursor = posicao
+            consulta = consulta.where(db.or_(
+                modelo.dt_atendimento > dt_cursor,
+                db.and_(modelo.dt_atendimento == dt_cursor, modelo.id > id_cursor)
+            ))
+        
+        return db.session.execute(
+            consulta.order_by(modelo.dt_atendimento, modelo.id).limit(limite)
+        ).all()
+    
     @staticmethod
     def _validar_dados_basicos(dt_atendimento: datetime, id_user: int,
                               id_profissional: int, servicos_ids: List[int]) -> bool:
@@ -286,8 +798,8 @@ class AgendamentoService:
         Valida os dados básicos para criação de agendamento.
         Verifica tipos e valores mínimos.
         """
-        if not isinstance(dt_atendimento, datetime):
-            return False
+        if not isinstance(dt_atendimento, datetime) or dt_atendimento.tzinfo is not None:
+            return False  # horários da agenda são sem fuso
         
         if not isinstance(id_user, int) or id_user <= 0:
             return False
@@ -318,28 +830,250 @@ class AgendamentoService:
         
         return True
     
+    @staticmethod
+    def _codificar_cursor(dt_atendimento: datetime, agendamento_id: int) -> str:
+        """
+        Gera o cursor opaco da próxima página a partir do último agendamento retornado.
+        """
+        valor = f"{dt_atendimento.isoformat()}|{agendamento_id}"
+        return base64.urlsafe_b64encode(valor.encode()).decode()
+    
+    @staticmethod
+    def _decodificar_cursor(cursor: str) -> Optional[Tuple[datetime, int]]:
+        """
+        Lê o cursor recebido, retornando None se ele for inválido.
+        """
+        try:
+            dt_texto, id_texto = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(dt_texto), int(id_texto)
+        except (ValueError, UnicodeDecodeError):
+            return None
+    
+    @staticmethod
+    def _mascara_almoco(data) -> int:
+        """
+        Retorna a máscara de slots do horário de almoço no dia.
+        """
+        return ocupacao_cache.mascara_intervalo(
+            data,
+            datetime.combine(data, time(AgendamentoService.HORA_ALMOCO_INICIO)),
+            datetime.combine(data, time(AgendamentoService.HORA_ALMOCO_FIM)))
+    
+    @staticmethod
+    def _intervalos_livres(livres: int) -> List[List[str]]:
+        """
+        Converte um bitmap de slots livres em intervalos contínuos ["HH:MM", "HH:MM"].
+        """
+        abertura = datetime.combine(datetime.min.date(), time(AgendamentoService.HORA_ABERTURA))
+        intervalos = []
+        slot = 0
+        while livres >> slot:
+            if not livres >> slot & 1:
+                slot += 1
+                continue
+            # Avança até o fim da sequência de slots livres
+            fim = slot
+            while livres >> fim & 1:
+                fim += 1
+            intervalos.append([
+                (abertura + timedelta(minutes=slot * AgendamentoService.SLOT_MINUTOS)).strftime("%H:%M"),
+                (abertura + timedelta(minutes=fim * AgendamentoService.SLOT_MINUTOS)).strftime("%H:%M")
+            ])
+            slot = fim
+        return intervalos
+    
+    @staticmethod
+    def _resolver_servicos(servicos_ids: List[int]):
+        """
+        Busca os serviços no catálogo e soma duração (minutos) e valor.
+        Retorna (servicos, duracao_total, valor_total), ou (mensagem de erro, 0, 0).
+        """
+        servicos = []
+        duracao_total = 0
+        valor_total = 0
+        
+        for servico_id in servicos_ids:
+            servico = servico_catalogo.obter(servico_id)  # Busca serviço no catálogo em memória
+            if not servico:
+                return f"Serviço com ID {servico_id} não encontrado", 0, 0
+            if servico.duracao <= 0:
+                return f"Serviço com ID {servico_id} sem duração cadastrada", 0, 0
+            if servico.duracao > AgendamentoService.DURACAO_MAXIMA_MINUTOS:
+                return (f"Serviço com ID {servico_id} passa da duração máxima de "
+                        f"{AgendamentoService.DURACAO_MAXIMA_MINUTOS} minutos"), 0, 0
+            
+            servicos.append(servico)
+            duracao_total += servico.duracao
+            valor_total += servico.valor
+        
+        return servicos, duracao_total, valor_total
+    
+    @staticmethod
+    def _expandir_recorrencia(dt_inicio: datetime, regra) -> List[datetime]:
+        """
+        Expande uma regra no estilo RRULE nas datas das ocorrências, começando em dt_inicio.
+        Aceita o texto "FREQ=WEEKLY;INTERVAL=2;COUNT=13" (com ou sem o prefixo "RRULE:")
+        ou um dicionário com as mesmas chaves. FREQ: DAILY, WEEKLY ou MONTHLY; é preciso
+        informar COUNT ou UNTIL (data ou data e hora, inclusiva). Como no RFC 5545, os meses
+        sem o dia de dt_inicio (ex.: 31) são pulados. Levanta ValueError se a regra for inválida.
+        """
+        if isinstance(regra, str):
+            texto = regra.strip()
+            if texto.upper().startswith('RRULE:'):
+                texto = texto[6:]
+            try:
+                regra = dict(parte.split('=', 1) for parte in texto.split(';') if parte.strip())
+            except ValueError:
+                raise ValueError("use o formato CHAVE=VALOR;CHAVE=VALOR")
+        if not isinstance(regra, dict):
+            raise ValueError("regra deve ser um texto ou um objeto")
+        regra = {str(chave).strip().upper(): str(valor).strip() for chave, valor in regra.items()}
+        
+        desconhecidas = set(regra) - {'FREQ', 'INTERVAL', 'COUNT', 'UNTIL'}
+        if desconhecidas:
+            raise ValueError(f"chaves não suportadas: {', '.join(sorted(desconhecidas))}")
+        
+        frequencia = regra.get('FREQ', '').upper()
+        if frequencia not in AgendamentoService.FREQUENCIAS_RECORRENCIA:
+            raise ValueError(f"FREQ deve ser {', '.join(AgendamentoService.FREQUENCIAS_RECORRENCIA)}")
+        
+        intervalo = int(regra.get('INTERVAL', 1))
+        if intervalo < 1:
+            raise ValueError("INTERVAL deve ser positivo")
+        
+        maximo = AgendamentoService.MAX_OCORRENCIAS_RECORRENCIA
+        if ('COUNT' in regra) == ('UNTIL' in regra):
+            raise ValueError("informe COUNT ou UNTIL")
+        if 'COUNT' in regra:
+            quantidade = int(regra['COUNT'])
+            if not 1 <= quantidade <= maximo:
+                raise ValueError(f"COUNT deve estar entre 1 e {maximo}")
+            ate = None
+        else:
+            quantidade = maximo + 1  # uma a mais para detectar séries longas demais
+            valor = regra['UNTIL'].rstrip('Z')
+            if 'T' not in valor and len(valor) in (8, 10):
+                # Só a data: inclui o dia inteiro
+                ate = datetime.combine(datetime.strptime(valor.replace('-', ''), '%Y%m%d').date(), time.max)
+            elif '-' in valor:
+                ate = datetime.fromisoformat(valor)
+            else:
+                ate = datetime.strptime(valor, '%Y%m%dT%H%M%S')
+            if ate.tzinfo is not None:
+                # Com fuso (ex.: +03:00): convertido para UTC sem fuso, como o sufixo Z
+                ate = ate.astimezone(timezone.utc).replace(tzinfo=None)
+        
+        ocorrencias = []
+        passo = 0
+        while len(ocorrencias) < quantidade:
+            if frequencia == 'MONTHLY':
+                meses = dt_inicio.month - 1 + passo * intervalo
+                ano, mes = dt_inicio.year + meses // 12, meses % 12 + 1
+                passo += 1
+                if dt_inicio.day > calendar.monthrange(ano, mes)[1]:
+                    continue
+                ocorrencia = dt_inicio.replace(year=ano, month=mes)
+            else:
+                dias = intervalo * (7 if frequencia == 'WEEKLY' else 1)
+                ocorrencia = dt_inicio + timedelta(days=passo * dias)
+                passo += 1
+            if ate is not None and ocorrencia > ate:
+                break
+            ocorrencias.append(ocorrencia)
+        
+        if len(ocorrencias) > maximo:
+            raise ValueError(f"a série passa de {maximo} ocorrências")
+        return ocorrencias
+    
+    @staticmethod
+    def _lacunas_livres(profissional_id: int, ocupados: List[Tuple[datetime, datetime]],
+                        inicio: datetime, fim: datetime, duracao: timedelta):
+        """
+        Gera, em ordem, (início, profissional, livre até) de cada lacuna livre do profissional
+        na janela em que a duração cabe inteira dentro do expediente (sem atravessar o almoço
+        nem o fechamento). O início é alinhado à grade de slots. `ocupados` vem ordenado por início.
+        """
+        slot = timedelta(minutes=AgendamentoService.SLOT_MINUTOS)
+        indice = 0
+        data = inicio.date()
+        while data <= fim.date():
+            blocos = (
+                (time(AgendamentoService.HORA_ABERTURA), time(AgendamentoService.HORA_ALMOCO_INICIO)),
+                (time(AgendamentoService.HORA_ALMOCO_FIM), time(AgendamentoService.HORA_FECHAMENTO)),
+            )
+            for abertura, fechamento in blocos:
+                inicio_bloco = datetime.combine(data, abertura)
+                fim_bloco = min(datetime.combine(data, fechamento), fim)
+                
+                # Ocupações que terminam antes do bloco não interessam a mais nenhum bloco
+                while indice < len(ocupados) and ocupados[indice][1] <= inicio_bloco:
+                    indice += 1
+                
+                cursor = max(inicio_bloco, inicio)
+                lacunas = []
+                i = indice
+                while i < len(ocupados) and ocupados[i][0] < fim_bloco:
+                    if ocupados[i][0] > cursor:
+                        lacunas.append((cursor, ocupados[i][0]))
+                    cursor = max(cursor, ocupados[i][1])
+                    i += 1
+                lacunas.append((cursor, fim_bloco))
+                
+                for lacuna_inicio, lacuna_fim in lacunas:
+                    # Primeiro horário da grade de slots dentro da lacuna
+                    desde_abertura = lacuna_inicio - inicio_bloco
+                    lacuna_inicio = inicio_bloco + -(-desde_abertura // slot) * slot
+                    if lacuna_inicio + duracao <= lacuna_fim:
+                        yield lacuna_inicio, profissional_id, lacuna_fim
+            data += timedelta(days=1)
+    
+    @staticmethod
+    def _intervalos_ocupados(profissional_id: int, data) -> List[Tuple[datetime, datetime]]:
+        """
+        Busca (início, fim) dos agendamentos que ocupam a agenda do profissional no dia.
+        """
+        inicio_dia = datetime.combine(data, time())
+        return db.session.execute(
+            db.select(Agendamento.dt_atendimento, Agendamento.dt_fim).where(
+                Agendamento.id_profissional == profissional_id,
+                Agendamento.status.in_(AgendamentoService.STATUS_OCUPANTES),
+                Agendamento.dt_atendimento >= inicio_dia,
+                Agendamento.dt_atendimento < inicio_dia + timedelta(days=1)
+            )
+        ).all()
+    
     @staticmethod
     def _verificar_disponibilidade(profissional_id: int, dt_inicio: datetime,
                                   dt_fim: datetime) -> bool:
         """
         Verifica se o profissional está disponível entre dt_inicio e dt_fim.
         Não permite sobreposição de horários.
+        A checagem é feita inteiramente no banco, com uma busca por faixa no índice
+        (id_profissional, status, dt_atendimento, dt_fim). O limite inferior usa DURACAO_MAXIMA_MINUTOS,
+        já que nenhum agendamento começa antes disso e ainda termina depois de dt_inicio.
         """
-        agendamentos_conflito = Agendamento.query.filter(
+        conflito = Agendamento.query.filter(
             Agendamento.id_profissional == profissional_id,
-            Agendamento.status != 'cancelado',
-            Agendamento.dt_atendimento < dt_fim
-        ).all()
-        
-        for agendamento in agendamentos_conflito:
-            # Calcula fim do agendamento existente
-            servico = Servico.find_by_id(agendamento.id_servico)
-            duracao = AgendamentoService.DURACAO_SERVICOS.get(
-                servico.nome.lower(), 60)
-            ag_fim = agendamento.dt_atendimento + timedelta(minutes=duracao)
-            
-            # Verifica sobreposição de horários
-            if not (dt_fim <= agendamento.dt_atendimento or dt_inicio >= ag_fim):
-                return False
+            Agendamento.status.in_(AgendamentoService.STATUS_OCUPANTES),
+            Agendamento.dt_atendimento < dt_fim,
+            Agendamento.dt_atendimento > dt_inicio - timedelta(minutes=AgendamentoService.DURACAO_MAXIMA_MINUTOS),
+            Agendamento.dt_fim > dt_inicio  # Sobreposição: começa antes do fim e termina depois do início
+        ).exists()
         
-        return True
\ No newline at end of file
+        return not db.session.query(conflito).scalar()
+
+
+# Ocupação diária dos profissionais em memória, compartilhada pelo processo
+ocupacao_cache = OcupacaoCache(
+    hora_abertura=AgendamentoService.HORA_ABERTURA,
+    hora_fechamento=AgendamentoService.HORA_FECHAMENTO,
+    slot_minutos=AgendamentoService.SLOT_MINUTOS,
+    carregar_intervalos=AgendamentoService._intervalos_ocupados,
+    obter_geracao=AgendaGeracao.atual
+)
+
+# Cálculos de listar_horarios_disponiveis em andamento e recentes, por (profissional, data)
+horarios_coalescedor = Coalescedor('horarios_disponiveis')
+
+# Leituras simultâneas da geração da agenda que validam os resultados recentes de horarios_coalescedor
+geracoes_coalescedor = Coalescedor('agenda_geracao')
@@ -0,0 +1,97 @@
+"""
+Arquivamento dos agendamentos encerrados mais antigos que o horizonte: as linhas são
+copiadas para tb_agendamento_arquivo e apagadas de tb_agendamento, em lotes. Cópia e
+remoção de cada lote ficam na mesma transação, junto com o checkpoint, então uma execução
+interrompida não perde nem duplica agendamentos e continua do último lote confirmado.
+Só status encerrados são arquivados: o que ainda está 'agendado' fica na tabela quente.
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import delete, insert, literal, select
+from src import db
+from src.metricas import registro
+from src.models.agendamento_arquivo_models import AgendamentoArquivo_model as AgendamentoArquivo
+from src.models.agendamento_models import Agendamento_model as Agendamento
+from src.models.tarefa_checkpoint_models import TarefaCheckpoint_model as TarefaCheckpoint
+
+TAREFA = 'arquivar_agendamentos'
+STATUS_ARQUIVAVEIS = ('finalizado', 'cancelado', Agendamento.STATUS_FALTA)
+
+agendamentos_arquivados = registro.contador(
+    'sgu_arquivamento_agendamentos_total', 'Agendamentos movidos para tb_agendamento_arquivo', ('status',))
+duracao_lote = registro.histograma(
+    'sgu_arquivamento_lote_duracao_segundos', 'Duração de cada lote (transação) do arquivamento')
+ultima_execucao = registro.medidor(
+    'sgu_arquivamento_ultima_execucao_timestamp', 'Fim da última execução completa do arquivamento (epoch)')
+
+
+def arquivar_agendamentos(horizonte: timedelta = timedelta(days=365), tamanho_lote: int = 1000,
+                          corte: Optional[datetime] = None, ao_concluir_lote=None) -> Dict:
+    """
+    Move para o arquivo os agendamentos encerrados com atendimento antes do corte
+    (padrão: agora - horizonte). Se a execução anterior foi interrompida, continua com o corte dela.
+    """
+    if horizonte < timedelta(days=1):
+        return {"erro": "Horizonte de arquivamento deve ser de pelo menos um dia"}
+    if tamanho_lote <= 0:
+        return {"erro": "Tamanho do lote deve ser positivo"}
+
+    checkpoint = TarefaCheckpoint.obter(TAREFA)
+    retomada = checkpoint is not None and checkpoint.corte is not None
+    if retomada:
+        corte = checkpoint.corte
+        processados = checkpoint.processados
+    else:
+        corte = corte or datetime.utcnow() - horizonte
+        processados = 0
+    db.session.rollback()  # não segura a transação da leitura do checkpoint entre os lotes
+
+    tabela = Agendamento.__table__
+    colunas = [tabela.c[coluna] for coluna in AgendamentoArquivo.COLUNAS]
+    totais = {"lotes": 0, "arquivados": 0}
+    # Um status por vez: cada lote sai em ordem do índice (status, dt_atendimento, id), sem ordenação.
+    # As linhas arquivadas somem da tabela quente, então cada lote recomeça do início do índice
+    for status in STATUS_ARQUIVAVEIS:
+        while True:
+            inicio = time.perf_counter()
+            # FOR UPDATE (MySQL) trava as linhas do lote até o commit
+            chaves = db.session.execute(
+                select(tabela.c.id, tabela.c.dt_atendimento)
+                .where(tabela.c.status == status, tabela.c.dt_atendimento < corte)
+                .order_by(tabela.c.dt_atendimento, tabela.c.id).limit(tamanho_lote)
+                .with_for_update()
+            ).all()
+            if not chaves:
+                break
+            ids = [id_agendamento for id_agendamento, _ in chaves]
+
+            db.session.execute(insert(AgendamentoArquivo).from_select(
+                [*AgendamentoArquivo.COLUNAS, 'dt_arquivamento'],
+                select(*colunas, literal(datetime.utcnow(), db.DateTime)).where(tabela.c.id.in_(ids))))
+            db.session.execute(delete(tabela).where(tabela.c.id.in_(ids)))
+
+            processados += len(ids)
+            ultimo = chaves[-1]
+            TarefaCheckpoint.salvar(TAREFA, corte=corte, ultimo_dt=ultimo.dt_atendimento, ultimo_id=ultimo.id,
+                                    processados=processados)
+            db.session.commit()
+
+            totais["lotes"] += 1
+            totais["arquivados"] += len(ids)
+            agendamentos_arquivados.inc(len(ids), status=status)
+            duracao_lote.observar(time.perf_counter() - inicio)
+            if ao_concluir_lote:
+                ao_concluir_lote(status, (ultimo.dt_atendimento, ultimo.id), len(ids))
+
+    TarefaCheckpoint.concluir(TAREFA)
+    db.session.commit()
+    ultima_execucao.definir(time.time())
+
+    return {
+        "sucesso": True,
+        "corte": corte.isoformat(),
+        "retomada": retomada,
+        **totais,
+    }
@@ -0,0 +1,124 @@
+"""
+Coalescência de consultas idênticas (single-flight) dentro do processo
+Chamadas concorrentes com a mesma chave esperam a que já está em andamento e recebem
+o mesmo resultado; por uma janela curta o resultado ainda é reaproveitado pelas seguintes.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from src.metricas import registro
+
+chamadas_coalescidas = registro.contador(
+    'sgu_coalescencia_chamadas_total',
+    'Chamadas por resultado: executada (calculou), compartilhada (esperou a em andamento) ou recente (janela de validade)',
+    ('nome', 'resultado'))
+em_andamento = registro.medidor(
+    'sgu_coalescencia_em_andamento', 'Cálculos em andamento com outras chamadas podendo aguardar', ('nome',))
+
+
+class _Voo:
+    """
+    Um cálculo em andamento: quem chega depois espera o evento e lê o resultado.
+    """
+
+    __slots__ = ('concluido', 'resultado', 'erro', 'valido', 'versao')
+
+    def __init__(self, versao=None):
+        self.concluido = threading.Event()  # com o monkey-patch do gevent, espera sem bloquear a thread
+        self.resultado = None
+        self.erro = None
+        self.valido = True  # False se a chave foi invalidada durante o cálculo: o resultado não é guardado
+        self.versao = versao
+
+
+class Coalescedor:
+    """
+    Single-flight por chave. O resultado é compartilhado entre as chamadas e não deve ser alterado.
+    Cada processo tem o seu: sem versao, alterações feitas por outro processo só aparecem depois da janela de validade.
+    """
+
+    def __init__(self, nome: str, capacidade: int = 4096):
+        self.nome = nome
+        self.capacidade = capacidade
+        self._voos = {}                  # chave -> _Voo em andamento
+        self._recentes = OrderedDict()   # chave -> (resultado, iniciado_em, versao), descartados por LRU
+        self._lock = threading.Lock()
+
+    def executar(self, chave: Hashable, funcao: Callable[[], Any], validade: float = 0.0,
+                 guardar: Optional[Callable[[Any], bool]] = None,
+                 versao: Optional[Hashable] = None) -> Any:
+        """
+        Retorna o resultado de funcao() para a chave, calculado uma única vez por vez.
+        Resultados aceitos por guardar (padrão: todos) valem por validade segundos a partir do início do cálculo.
+        O resultado recente e o cálculo em andamento só são aproveitados por chamadas com a mesma versao
+        (por exemplo a geração dos dados lida no banco: alterações de outros processos os descartam sem
+        esperar a janela); uma versão diferente começa um cálculo novo no lugar do em andamento.
+        Uma exceção é repassada a todas as chamadas que aguardavam, e nada é guardado.
+        """
+        agora = time.monotonic()
+        with self._lock:
+            recente = self._recentes.get(chave)
+            if recente and agora - recente[1] < validade and recente[2] == versao:
+                self._recentes.move_to_end(chave)
+            else:
+                recente = None
+                voo = self._voos.get(chave)
+                lider = voo is None or voo.versao != versao
+                if lider:
+                    if voo is not None:
+                        voo.valido = False  # o cálculo da outra versão ainda responde a quem aguarda, sem guardar
+                    voo = self._voos[chave] = _Voo(versao)
+                    total = len(self._voos)
+
+        if recente:
+            chamadas_coalescidas.inc(nome=self.nome, resultado='recente')
+            return recente[0]
+
+        if not lider:
+            voo.concluido.wait()
+            chamadas_coalescidas.inc(nome=self.nome, resultado='compartilhada')
+            if voo.erro is not None:
+                raise voo.erro
+            return voo.resultado
+
+        chamadas_coalescidas.inc(nome=self.nome, resultado='executada')
+        em_andamento.definir(total, nome=self.nome)
+        try:
+            voo.resultado = funcao()
+        except BaseException as e:
+            voo.erro = e
+            raise
+        finally:
+            with self._lock:
+                if self._voos.get(chave) is voo:
+                    del self._voos[chave]
+                if (voo.erro is None and voo.valido and validade > 0
+                        and (guardar is None or guardar(voo.resultado))):
+                    self._recentes[chave] = (voo.resultado, agora, versao)
+                    self._recentes.move_to_end(chave)
+                    while len(self._recentes) > self.capacidade:
+                        self._recentes.popitem(last=False)  # Remove o menos usado recentemente
+                total = len(self._voos)
+            em_andamento.definir(total, nome=self.nome)
+            voo.concluido.set()
+        return voo.resultado
+
+    def invalidar(self, chave: Hashable = None):
+        """
+        Descarta o resultado recente de uma chave (ou de todas). Um cálculo em andamento
+        ainda responde a quem já aguardava, mas as próximas chamadas calculam de novo.
+        """
+        with self._lock:
+            if chave is None:
+                voos = list(self._voos.values())
+                self._voos.clear()
+                self._recentes.clear()
+            else:
+                voo = self._voos.pop(chave, None)
+                voos = [voo] if voo else []
+                self._recentes.pop(chave, None)
+            for voo in voos:
+                voo.valido = False
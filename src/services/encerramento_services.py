@@ -0,0 +1,146 @@
+"""
+Encerramento dos agendamentos que já passaram: 'agendado' vira 'finalizado', ou falta
+(STATUS_FALTA, com a taxa de cancelamento) quando a recepção registrou que o cliente não veio.
+Cada lote é um UPDATE por conjunto na sua própria transação, junto com os totais de
+tb_resumo_diario e o checkpoint: só agendamentos ainda 'agendado' são alterados, então repetir
+uma execução não muda nada, e uma execução interrompida continua do último lote confirmado.
+"""
+
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import and_, bindparam, or_, select, update
+from src import db
+from src.metricas import registro
+from src.models.agendamento_models import Agendamento_model as Agendamento
+from src.models.resumo_diario_models import ResumoDiario_model as ResumoDiario
+from src.models.tarefa_checkpoint_models import TarefaCheckpoint_model as TarefaCheckpoint
+
+TAREFA = 'encerrar_agendamentos'
+DESTINOS_SEM_REGISTRO = ('finalizado', Agendamento.STATUS_FALTA)
+
+agendamentos_encerrados = registro.contador(
+    'sgu_encerramento_agendamentos_total', 'Agendamentos encerrados pela tarefa de encerramento', ('status',))
+taxas_faltas = registro.contador(
+    'sgu_encerramento_taxas_total', 'Taxas de cancelamento cobradas nas faltas')
+duracao_lote = registro.histograma(
+    'sgu_encerramento_lote_duracao_segundos', 'Duração de cada lote (transação) do encerramento')
+ultima_execucao = registro.medidor(
+    'sgu_encerramento_ultima_execucao_timestamp', 'Fim da última execução completa do encerramento (epoch)')
+
+
+def encerrar_agendamentos(atraso: timedelta = timedelta(hours=24), tamanho_lote: int = 1000,
+                          sem_registro: str = 'finalizado', corte: Optional[datetime] = None,
+                          ao_concluir_lote=None) -> Dict:
+    """
+    Encerra os agendamentos 'agendado' que terminaram antes do corte (padrão: agora - atraso).
+    Quem tem compareceu = False vira falta e paga a taxa; os demais viram 'finalizado',
+    ou falta se sem_registro = STATUS_FALTA e o comparecimento não foi registrado.
+    Se a execução anterior foi interrompida, continua com o corte dela.
+    """
+    if sem_registro not in DESTINOS_SEM_REGISTRO:
+        return {"erro": f"sem_registro deve ser {' ou '.join(DESTINOS_SEM_REGISTRO)}"}
+    if tamanho_lote <= 0:
+        return {"erro": "Tamanho do lote deve ser positivo"}
+
+    checkpoint = TarefaCheckpoint.obter(TAREFA)
+    retomada = checkpoint is not None and checkpoint.corte is not None
+    if retomada:
+        corte = checkpoint.corte
+        ultimo = (checkpoint.ultimo_dt, checkpoint.ultimo_id) if checkpoint.ultimo_id else None
+        processados = checkpoint.processados
+    else:
+        corte = corte or datetime.utcnow() - atraso
+        ultimo = None
+        processados = 0
+    db.session.rollback()  # não segura a transação da leitura do checkpoint entre os lotes
+
+    falta = Agendamento.compareceu.is_(False)
+    if sem_registro == Agendamento.STATUS_FALTA:
+        falta = or_(falta, Agendamento.compareceu.is_(None))
+
+    totais = {"lotes": 0, "finalizados": 0, "faltas": 0, "taxas": 0.0}
+    while True:
+        inicio = time.perf_counter()
+        pendentes = [
+            Agendamento.status == 'agendado',
+            Agendamento.dt_atendimento < corte,
+            Agendamento.dt_fim <= corte,  # não encerra atendimento em andamento
+        ]
+        if ultimo:
+            pendentes.append(or_(Agendamento.dt_atendimento > ultimo[0],
+                                 and_(Agendamento.dt_atendimento == ultimo[0], Agendamento.id > ultimo[1])))
+
+        # Chave do último agendamento do lote, pelo índice (status, dt_atendimento, id)
+        chaves = db.session.execute(
+            select(Agendamento.dt_atendimento, Agendamento.id).where(*pendentes)
+            .order_by(Agendamento.dt_atendimento, Agendamento.id).limit(tamanho_lote)
+        ).all()
+        if not chaves:
+            break
+        ultimo = tuple(chaves[-1])
+        lote = pendentes + [or_(Agendamento.dt_atendimento < ultimo[0],
+                                and_(Agendamento.dt_atendimento == ultimo[0], Agendamento.id <= ultimo[1]))]
+
+        # Faltas: taxa calculada por agendamento (mesma regra do cancelamento) e retirada dos totais do dia.
+        # FOR UPDATE (MySQL) impede que um cancelamento concorrente altere as linhas antes do UPDATE
+        faltas = db.session.execute(
+            select(Agendamento.id, Agendamento.id_profissional, Agendamento.dt_atendimento,
+                   Agendamento.dt_fim, Agendamento.valor_total)
+            .where(*lote, falta).with_for_update()
+        ).all()
+        deltas = defaultdict(lambda: {"receita": 0.0, "taxas_cancelamento": 0.0, "minutos_agendados": 0,
+                                      "agendamentos": 0, "faltas": 0})
+        taxas = []
+        for id_agendamento, id_profissional, dt_atendimento, dt_fim, valor in faltas:
+            taxa = Agendamento.calcular_taxa_cancelamento(float(valor))
+            taxas.append({"p_id": id_agendamento, "p_taxa": taxa})
+            dia = deltas[(id_profissional, dt_atendimento.date())]
+            dia["receita"] -= float(valor)
+            dia["taxas_cancelamento"] += taxa
+            dia["minutos_agendados"] -= int((dt_fim - dt_atendimento).total_seconds() // 60)
+            dia["agendamentos"] -= 1
+            dia["faltas"] += 1
+
+        tabela = Agendamento.__table__
+        if taxas:
+            db.session.execute(
+                update(tabela).where(tabela.c.id == bindparam("p_id"))
+                .values(status=Agendamento.STATUS_FALTA, taxa_cancelamento=bindparam("p_taxa")),
+                taxas)
+        finalizados = db.session.execute(
+            update(tabela).where(*lote).values(status='finalizado')  # o que sobrou no lote compareceu
+        ).rowcount
+        ResumoDiario.acumular_lote([
+            {"id_profissional": id_profissional, "data": data, **valores}
+            for (id_profissional, data), valores in sorted(deltas.items())])
+
+        processados += len(chaves)
+        TarefaCheckpoint.salvar(TAREFA, corte=corte, ultimo_dt=ultimo[0], ultimo_id=ultimo[1],
+                                processados=processados)
+        db.session.commit()
+
+        soma_taxas = sum(taxa["p_taxa"] for taxa in taxas)
+        totais["lotes"] += 1
+        totais["finalizados"] += finalizados
+        totais["faltas"] += len(taxas)
+        totais["taxas"] += soma_taxas
+        agendamentos_encerrados.inc(finalizados, status='finalizado')
+        agendamentos_encerrados.inc(len(taxas), status=Agendamento.STATUS_FALTA)
+        taxas_faltas.inc(soma_taxas)
+        duracao_lote.observar(time.perf_counter() - inicio)
+        if ao_concluir_lote:
+            ao_concluir_lote(ultimo, finalizados, len(taxas))
+
+    TarefaCheckpoint.concluir(TAREFA)
+    db.session.commit()
+    ultima_execucao.definir(time.time())
+
+    return {
+        "sucesso": True,
+        "corte": corte.isoformat(),
+        "retomada": retomada,
+        **totais,
+        "taxas": round(totais["taxas"], 2),
+    }
@@ -0,0 +1,137 @@
+"""
+Cache em memória da ocupação diária dos profissionais
+Cada dia de um profissional é guardado como um bitmap de slots (bit 1 = slot ocupado)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, date
+from typing import Callable, Iterable, Optional, Tuple
+
+
+class OcupacaoCache:
+    """
+    Guarda, por (profissional, data), o bitmap dos slots ocupados do dia.
+    As entradas são descartadas por LRU quando passam da capacidade e validadas
+    contra a geração da agenda no banco, para enxergar alterações de outros processos.
+    """
+
+    def __init__(self, hora_abertura: int, hora_fechamento: int, slot_minutos: int,
+                 carregar_intervalos: Callable[[int, date], Iterable[Tuple[datetime, datetime]]],
+                 obter_geracao: Callable[[int, date], int],
+                 capacidade: int = 4096, intervalo_verificacao: float = 2.0):
+        self.hora_abertura = hora_abertura
+        self.slot_minutos = slot_minutos
+        self.total_slots = (hora_fechamento - hora_abertura) * 60 // slot_minutos
+        self.capacidade = capacidade
+        self.intervalo_verificacao = intervalo_verificacao  # Segundos entre consultas da geração no banco
+
+        self._carregar_intervalos = carregar_intervalos  # Busca (inicio, fim) dos agendamentos do dia
+        self._obter_geracao = obter_geracao              # Busca a geração atual da agenda do dia
+        self._entradas = OrderedDict()  # (profissional, data) -> [bitmap, geracao, verificado_em]
+        self._lock = threading.Lock()
+
+    def obter(self, id_profissional: int, data: date, geracao: Optional[int] = None) -> int:
+        """
+        Retorna o bitmap de ocupação do dia, lendo do banco só quando necessário.
+        Com a geração já lida pelo chamador, a entrada é conferida contra ela na hora.
+        """
+        chave = (id_profissional, data)
+        agora = time.monotonic()
+
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada and geracao is None and agora - entrada[2] < self.intervalo_verificacao:
+                self._entradas.move_to_end(chave)
+                return entrada[0]
+
+        # Entrada ausente ou sem verificação recente: confere a geração no banco
+        if geracao is None:
+            geracao = self._obter_geracao(id_profissional, data)
+        if entrada and entrada[1] == geracao:
+            with self._lock:
+                entrada[2] = agora
+                self._entradas[chave] = entrada
+                self._entradas.move_to_end(chave)
+            return entrada[0]
+
+        bitmap = self.montar_bitmap(data, self._carregar_intervalos(id_profissional, data))
+        self._guardar(chave, bitmap, geracao, agora)
+        return bitmap
+
+    def marcar(self, id_profissional: int, inicio: datetime, fim: datetime, geracao: int):
+        """
+        Marca como ocupados os slots do intervalo (após um agendamento).
+        """
+        chave = (id_profissional, inicio.date())
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            # Só atualiza se nenhum outro processo alterou o dia desde a última leitura
+            if not entrada or entrada[1] != geracao - 1:
+                self._entradas.pop(chave, None)
+                return
+            entrada[0] |= self.mascara_intervalo(inicio.date(), inicio, fim)
+            entrada[1] = geracao
+
+    def liberar(self, id_profissional: int, inicio: datetime, fim: datetime, geracao: int):
+        """
+        Libera os slots do intervalo (após um cancelamento).
+        Slots parcialmente cobertos podem ser compartilhados com outro agendamento,
+        então nesse caso o dia é descartado e recalculado na próxima leitura.
+        """
+        chave = (id_profissional, inicio.date())
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if (not entrada or entrada[1] != geracao - 1
+                    or not self._alinhado(inicio) or not self._alinhado(fim)):
+                self._entradas.pop(chave, None)
+                return
+            entrada[0] &= ~self.mascara_intervalo(inicio.date(), inicio, fim)
+            entrada[1] = geracao
+
+    def invalidar(self, id_profissional: int = None, data: date = None):
+        """
+        Descarta um dia, todos os dias de um profissional ou o cache inteiro.
+        """
+        with self._lock:
+            if id_profissional is None:
+                self._entradas.clear()
+            elif data is not None:
+                self._entradas.pop((id_profissional, data), None)
+            else:
+                for chave in [c for c in self._entradas if c[0] == id_profissional]:
+                    del self._entradas[chave]
+
+    def montar_bitmap(self, data: date, intervalos: Iterable[Tuple[datetime, datetime]]) -> int:
+        """
+        Monta o bitmap do dia a partir dos intervalos ocupados.
+        """
+        bitmap = 0
+        for inicio, fim in intervalos:
+            bitmap |= self.mascara_intervalo(data, inicio, fim)
+        return bitmap
+
+    def mascara_intervalo(self, data: date, inicio: datetime, fim: datetime) -> int:
+        """
+        Retorna a máscara dos slots do dia que se sobrepõem ao intervalo [inicio, fim).
+        """
+        abertura = datetime.combine(data, datetime.min.time()) + timedelta(hours=self.hora_abertura)
+        minutos_inicio = (inicio - abertura).total_seconds() / 60
+        minutos_fim = (fim - abertura).total_seconds() / 60
+
+        primeiro = max(int(minutos_inicio // self.slot_minutos), 0)
+        ultimo = min(-int(-minutos_fim // self.slot_minutos), self.total_slots)  # Arredonda para cima
+        if ultimo <= primeiro:
+            return 0
+        return ((1 << (ultimo - primeiro)) - 1) << primeiro
+
+    def _alinhado(self, momento: datetime) -> bool:
+        return momento.second == 0 and momento.microsecond == 0 and momento.minute % self.slot_minutos == 0
+
+    def _guardar(self, chave, bitmap: int, geracao: int, agora: float):
+        with self._lock:
+            self._entradas[chave] = [bitmap, geracao, agora]
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)  # Remove o menos usado recentemente
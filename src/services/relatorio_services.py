@@ -0,0 +1,168 @@
+"""
+Relatórios de receita, taxas de cancelamento e minutos agendados por profissional e dia
+As consultas leem apenas tb_resumo_diario (uma linha por profissional/dia), mantida
+por criar_agendamento/cancelar_agendamento e pelo encerramento dos agendamentos
+passados, e recalculável por reconstruir_resumo
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional
+from sqlalchemy import Integer, case, cast, delete, func, insert, literal_column, select, union_all
+from src import db
+from src.models.agendamento_arquivo_models import AgendamentoArquivo_model as AgendamentoArquivo
+from src.models.agendamento_models import Agendamento_model as Agendamento
+from src.models.profissional_models import Profissional_model as Profissional
+from src.models.resumo_diario_models import ResumoDiario_model as ResumoDiario
+
+MAX_DIAS_RELATORIO = 366
+CAMPOS = ('receita', 'taxas_cancelamento', 'minutos_agendados', 'agendamentos', 'cancelamentos', 'faltas')
+
+
+# Duração do agendamento em minutos, na função de datas de cada banco
+def _minutos_agendamento(dialeto, agendamentos):
+    if dialeto == 'sqlite':
+        return cast(func.round((func.julianday(agendamentos.c.dt_fim) - func.julianday(agendamentos.c.dt_atendimento)) * 1440), Integer)
+    return func.timestampdiff(literal_column('MINUTE'), agendamentos.c.dt_atendimento, agendamentos.c.dt_fim)
+
+
+# Agendamentos do período [inicio, fim) em tb_agendamento e no arquivo, com as colunas usadas nos totais
+def _agendamentos_periodo(inicio: datetime, fim: datetime):
+    partes = [
+        select(modelo.id_profissional, modelo.dt_atendimento, modelo.dt_fim, modelo.status,
+               modelo.valor_total, modelo.taxa_cancelamento)
+        .where(modelo.dt_atendimento >= inicio, modelo.dt_atendimento < fim)
+        for modelo in (Agendamento, AgendamentoArquivo)
+    ]
+    return union_all(*partes).subquery('agendamentos')
+
+
+# Totais por profissional/dia calculados direto dos agendamentos (quentes e arquivados), no período [inicio, fim)
+def _consulta_totais(dialeto, inicio: datetime, fim: datetime):
+    agendamentos = _agendamentos_periodo(inicio, fim)
+    status = agendamentos.c.status
+    cancelado = status == 'cancelado'
+    falta = status == Agendamento.STATUS_FALTA
+    sem_atendimento = status.in_(('cancelado', Agendamento.STATUS_FALTA))  # não entram na receita nem na agenda
+    dia = func.date(agendamentos.c.dt_atendimento)
+    return (
+        select(
+            agendamentos.c.id_profissional,
+            dia,
+            func.sum(case((sem_atendimento, 0.0), else_=agendamentos.c.valor_total)),
+            func.sum(case((sem_atendimento, func.coalesce(agendamentos.c.taxa_cancelamento, 0.0)), else_=0.0)),
+            func.sum(case((sem_atendimento, 0), else_=_minutos_agendamento(dialeto, agendamentos))),
+            func.sum(case((sem_atendimento, 0), else_=1)),
+            func.sum(case((cancelado, 1), else_=0)),
+            func.sum(case((falta, 1), else_=0)),
+        )
+        .group_by(agendamentos.c.id_profissional, dia)
+    )
+
+
+def reconstruir_resumo(data_inicio: Optional[date] = None, data_fim: Optional[date] = None,
+                       dias_por_lote: int = 31, ao_concluir_lote=None) -> Dict:
+    """
+    Recalcula o resumo a partir de tb_agendamento e do arquivo (ex.: depois de importar
+    agendamentos por fora dos serviços). Cada lote de dias é apagado e regravado com um único
+    INSERT ... SELECT ... GROUP BY em sua própria transação.
+    Sem período, cobre do primeiro ao último agendamento.
+    """
+    if data_inicio is None or data_fim is None:
+        limites = [
+            db.session.execute(select(func.min(modelo.dt_atendimento), func.max(modelo.dt_atendimento))).one()
+            for modelo in (Agendamento, AgendamentoArquivo)
+        ]
+        datas = [data for limite in limites for data in limite if data is not None]
+        if not datas:
+            return {"lotes": 0, "linhas": 0}
+        data_inicio = data_inicio or min(datas).date()
+        data_fim = data_fim or max(datas).date()
+
+    dialeto = db.session.get_bind().dialect.name
+    lotes = linhas = 0
+    inicio_lote = data_inicio
+    while inicio_lote <= data_fim:
+        fim_lote = min(inicio_lote + timedelta(days=dias_por_lote - 1), data_fim)
+
+        db.session.execute(delete(ResumoDiario).where(
+            ResumoDiario.data >= inicio_lote, ResumoDiario.data <= fim_lote))
+        resultado = db.session.execute(
+            insert(ResumoDiario).from_select(
+                ['id_profissional', 'data', *CAMPOS],
+                _consulta_totais(dialeto,
+                                 datetime.combine(inicio_lote, time()),
+                                 datetime.combine(fim_lote + timedelta(days=1), time()))))
+        db.session.commit()
+
+        lotes += 1
+        linhas += max(resultado.rowcount, 0)
+        if ao_concluir_lote:
+            ao_concluir_lote(inicio_lote, fim_lote, resultado.rowcount)
+        inicio_lote = fim_lote + timedelta(days=1)
+
+    return {"lotes": lotes, "linhas": linhas}
+
+
+def _validar_periodo(data_inicio: date, data_fim: date) -> Optional[str]:
+    if data_fim < data_inicio:
+        return "Data final anterior à data inicial"
+    if (data_fim - data_inicio).days + 1 > MAX_DIAS_RELATORIO:
+        return f"Período máximo de {MAX_DIAS_RELATORIO} dias"
+    return None
+
+
+def _totais(valores) -> Dict:
+    return {campo: round(valor or 0, 2) for campo, valor in zip(CAMPOS, valores)}
+
+
+def relatorio_profissional(id_profissional: int, data_inicio: date, data_fim: date) -> Dict:
+    """
+    Totais dia a dia de um profissional no período, e a soma do período.
+    """
+    erro = _validar_periodo(data_inicio, data_fim)
+    if erro:
+        return {"erro": erro}
+
+    linhas = db.session.execute(
+        select(ResumoDiario.data, *[getattr(ResumoDiario, campo) for campo in CAMPOS])
+        .where(ResumoDiario.id_profissional == id_profissional,
+               ResumoDiario.data >= data_inicio, ResumoDiario.data <= data_fim)
+        .order_by(ResumoDiario.data)
+    ).all()
+
+    dias = [{"data": linha[0].isoformat(), **_totais(linha[1:])} for linha in linhas]
+    return {
+        "sucesso": True,
+        "id_profissional": id_profissional,
+        "inicio": data_inicio.isoformat(),
+        "fim": data_fim.isoformat(),
+        "dias": dias,
+        "totais": {campo: round(sum(dia[campo] for dia in dias), 2) for campo in CAMPOS},
+    }
+
+
+def relatorio_profissionais(data_inicio: date, data_fim: date) -> Dict:
+    """
+    Soma do período para cada profissional com movimento.
+    """
+    erro = _validar_periodo(data_inicio, data_fim)
+    if erro:
+        return {"erro": erro}
+
+    linhas = db.session.execute(
+        select(ResumoDiario.id_profissional, Profissional.nome,
+               *[func.sum(getattr(ResumoDiario, campo)) for campo in CAMPOS])
+        .join(Profissional, Profissional.id == ResumoDiario.id_profissional)
+        .where(ResumoDiario.data >= data_inicio, ResumoDiario.data <= data_fim)
+        .group_by(ResumoDiario.id_profissional, Profissional.nome)
+        .order_by(ResumoDiario.id_profissional)
+    ).all()
+
+    return {
+        "sucesso": True,
+        "inicio": data_inicio.isoformat(),
+        "fim": data_fim.isoformat(),
+        "profissionais": [
+            {"id_profissional": linha[0], "nome": linha[1], **_totais(linha[2:])} for linha in linhas
+        ],
+    }
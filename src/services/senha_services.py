@@ -0,0 +1,87 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from passlib.hash import pbkdf2_sha256 as sha256  # Biblioteca para hash seguro de senhas
+
+# Pool de processos para o hash das senhas, criado no primeiro uso
+# (assim cada worker do servidor cria o seu depois do fork)
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+# Funções executadas nos processos do pool
+def _gerar_hash(senha, rounds):
+    return sha256.using(rounds=rounds).hash(senha)
+
+
+def _verificar_hash(senha, hash_senha):
+    return sha256.verify(senha, hash_senha)
+
+
+# Sem o pool de processos: roda na própria thread, ou no threadpool nativo do gevent
+# no servidor gevent (SENHA_THREADPOOL_GEVENT), para o hash não parar as outras greenlets
+def _executar_sem_pool(funcao, *args):
+    if current_app.config.get("SENHA_THREADPOOL_GEVENT"):
+        import gevent  # só importado no servidor gevent
+        return gevent.get_hub().threadpool.apply(funcao, args)
+    return funcao(*args)
+
+
+# Rounds configurados para o ambiente atual
+def _rounds():
+    return current_app.config.get("PBKDF2_ROUNDS") or sha256.default_rounds
+
+
+def _obter_executor():
+    global _executor, _executor_pid
+    processos = current_app.config.get("SENHA_PROCESSOS", os.cpu_count())
+    if not processos:
+        return None  # pool desativado: o hash roda na própria thread
+
+    with _executor_lock:
+        # Um executor herdado de outro processo (fork) não pode ser reaproveitado
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(max_workers=processos)
+            _executor_pid = os.getpid()
+        return _executor
+
+
+# Gera o hash da senha fora da thread da requisição
+def gerar_hash(senha):
+    executor = _obter_executor()
+    if executor is None:
+        return _executar_sem_pool(_gerar_hash, senha, _rounds())
+    return executor.submit(_gerar_hash, senha, _rounds()).result()
+
+
+# Gera o hash de várias senhas em paralelo, mantendo a ordem
+def gerar_hashes(senhas, tamanho_lote=64):
+    executor = _obter_executor()
+    rounds = _rounds()
+    if executor is None:
+        return [_executar_sem_pool(_gerar_hash, senha, rounds) for senha in senhas]
+    return list(executor.map(_gerar_hash, senhas, [rounds] * len(senhas), chunksize=tamanho_lote))
+
+
+# Verifica a senha contra o hash armazenado fora da thread da requisição
+def verificar_senha(senha, hash_senha):
+    executor = _obter_executor()
+    if executor is None:
+        return _executar_sem_pool(_verificar_hash, senha, hash_senha)
+    return executor.submit(_verificar_hash, senha, hash_senha).result()
+
+
+# Indica se o hash foi gerado com rounds diferentes dos configurados
+def precisa_rehash(hash_senha):
+    return sha256.using(rounds=_rounds()).needs_update(hash_senha)
+
+
+# Encerra o pool (usado ao desligar o servidor)
+def encerrar():
+    global _executor
+    with _executor_lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=True)
+        _executor = None
@@ -0,0 +1,130 @@
+"""
+Catálogo de serviços em memória
+Carrega tb_servico em uma única consulta e responde duração/valor sem ir ao banco;
+o mesmo retrato guarda os ids dos profissionais, para conferir se um profissional existe
+"""
+
+import math
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src import db
+from src.models.profissional_models import Profissional_model
+from src.models.servico_models import Servico_model
+
+# Dados de um serviço usados nos cálculos de agenda (duração em minutos)
+ServicoCatalogado = namedtuple('ServicoCatalogado', ['id', 'descricao', 'duracao', 'valor'])
+
+
+class ServicoCatalogo:
+    """
+    Mantém um retrato imutável id -> ServicoCatalogado de todos os serviços e os ids dos profissionais.
+    O retrato é recarregado quando expira (ttl) ou quando algum serviço ou profissional é alterado
+    neste processo; outros processos enxergam a alteração ao fim do ttl (um profissional novo, na hora).
+    """
+
+    DURACAO_PADRAO = 60  # Duração assumida para serviços que não existem no catálogo
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self.versao = 0  # Incrementada a cada recarga do retrato
+        self._servicos = MappingProxyType({})
+        self._profissionais = frozenset()
+        self._carregado_em = None
+        self._lock = threading.Lock()
+
+    def obter(self, servico_id: int):
+        """
+        Retorna o serviço do catálogo ou None se ele não existir.
+        """
+        return self.servicos().get(servico_id)
+
+    def duracao(self, servico_id: int) -> int:
+        """
+        Retorna a duração em minutos do serviço (padrão se não existir).
+        """
+        servico = self.obter(servico_id)
+        return servico.duracao if servico else self.DURACAO_PADRAO
+
+    def profissional_existe(self, profissional_id: int) -> bool:
+        """
+        Indica se o profissional existe. Um id fora do retrato é conferido no banco,
+        e se existir (criado depois da carga) o retrato é recarregado no próximo acesso.
+        """
+        self.servicos()  # Recarrega o retrato se estiver vencido
+        if profissional_id in self._profissionais:
+            return True
+        if Profissional_model.find_by_id(profissional_id) is None:
+            return False
+        self.invalidar()
+        return True
+
+    def servicos(self):
+        """
+        Retorna o retrato atual do catálogo, recarregando se estiver vencido.
+        """
+        carregado_em = self._carregado_em
+        if carregado_em is None or time.monotonic() - carregado_em >= self.ttl:
+            self._recarregar(carregado_em)
+        return self._servicos
+
+    def invalidar(self):
+        """
+        Força a recarga do catálogo no próximo acesso.
+        """
+        self._carregado_em = None
+
+    def _recarregar(self, carregado_em_visto):
+        with self._lock:
+            # Outra thread já recarregou enquanto esta esperava
+            if self._carregado_em is not None and self._carregado_em != carregado_em_visto:
+                return
+
+            linhas = db.session.execute(
+                db.select(Servico_model.id, Servico_model.descricao,
+                          Servico_model.horario_duracao, Servico_model.valor)
+            ).all()
+            servicos = {
+                id: ServicoCatalogado(
+                    id=id,
+                    descricao=descricao,
+                    # Minutos fracionados arredondam para cima: 0.5 ocupa 1 minuto, não 0 (sem conflito com nada).
+                    # Zero ou negativo fica como está e o agendamento recusa o serviço
+                    duracao=math.ceil(horario_duracao),
+                    valor=float(valor)
+                )
+                for id, descricao, horario_duracao, valor in linhas
+            }
+            profissionais = frozenset(db.session.execute(db.select(Profissional_model.id)).scalars())
+
+            self._servicos = MappingProxyType(servicos)
+            self._profissionais = profissionais
+            self.versao += 1
+            self._carregado_em = time.monotonic()
+
+
+# Catálogo compartilhado pelo processo
+servico_catalogo = ServicoCatalogo()
+
+
+# Marca a sessão quando algum serviço ou profissional foi criado, alterado ou excluído
+@event.listens_for(Session, 'after_flush')
+def _marcar_servicos_alterados(session, flush_context):
+    if any(isinstance(obj, (Servico_model, Profissional_model))
+           for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['servicos_alterados'] = True
+
+
+# Invalida o catálogo depois que a alteração de serviços foi confirmada
+@event.listens_for(Session, 'after_commit')
+def _invalidar_catalogo(session):
+    if session.info.pop('servicos_alterados', False):
+        servico_catalogo.invalidar()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_marcacao(session):
+    session.info.pop('servicos_alterados', None)
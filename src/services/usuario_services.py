@@ -3,20 +3,128 @@ from src import db
 from ..schemas import usuario_schemas
 from ..entities import usuario_entitie 
 from ..entities.usuario_entitie import Usuario
+from . import senha_services
+import re
+from sqlalchemy import case, column, func, literal_column, or_, table
+from sqlalchemy.exc import IntegrityError
 
 
 
 
 
+# Erro levantado quando o email já pertence a outro usuário
+class EmailJaCadastradoError(Exception):
+    pass
+
+
+# Identificação da violação da constraint UNIQUE do email em cada banco:
+# mensagem do SQLite e código/chave do MySQL (ER_DUP_ENTRY, "for key 'email'" ou "'tb_usuario.email'")
+ERRO_EMAIL_SQLITE = 'UNIQUE constraint failed: tb_usuario.email'
+ERRO_MYSQL_DUPLICADO = 1062
+CHAVE_EMAIL_MYSQL = re.compile(r"for key '(tb_usuario\.)?email'")
+
+
+def _email_duplicado(erro: IntegrityError) -> bool:
+    argumentos = getattr(erro.orig, 'args', ())
+    if argumentos and argumentos[0] == ERRO_MYSQL_DUPLICADO:
+        return len(argumentos) > 1 and CHAVE_EMAIL_MYSQL.search(str(argumentos[1])) is not None
+    return str(erro.orig) == ERRO_EMAIL_SQLITE
+
+
 def cadastrar_usuario(usuario_entitie):
      # Cria uma instância do modelo Usuario com os dados recebidos do front(usuario)
     usuario_db = usuario_models.Usuario_model(nome=usuario_entitie.nome, email=usuario_entitie.email, telefone=usuario_entitie.telefone, senha=usuario_entitie.senha)
     usuario_db.gen_senha(usuario_entitie.senha) # criptografa a senha
     db.session.add(usuario_db)  # Adiciona o novo usuário à sessão do banco de dados
-    db.session.commit()  # Salva (commita) as alterações no banco de dados
+    try:
+        # O email é único no banco: o próprio INSERT detecta o cadastro repetido,
+        # sem consulta prévia e sem janela entre a consulta e a gravação
+        db.session.commit()  # Salva (commita) as alterações no banco de dados
+    except IntegrityError as e:
+        db.session.rollback()
+        if _email_duplicado(e):
+            raise EmailJaCadastradoError(usuario_entitie.email) from e
+        raise
     return usuario_db  # Retorna o usuário cadastrado
 
 
+# importa usuarios em massa: valida, remove emails repetidos, gera os hashes em paralelo
+# e insere cada lote em uma única transação (executemany)
+def importar_usuarios(registros, tamanho_lote=1000):
+    schema = usuario_schemas.UsuarioSchema(many=True)
+    resultado = {"importados": 0, "erros": []}
+    emails_vistos = set()  # emails já aceitos nesta importação
+
+    for inicio, lote in _em_lotes(registros, tamanho_lote):
+        # Validação do lote inteiro; os erros vêm indexados pela posição no lote
+        erros_validacao = schema.validate(lote)
+        validos = []
+        for posicao, registro in enumerate(lote):
+            linha = inicio + posicao + 1
+            if posicao in erros_validacao:
+                resultado["erros"].append({"linha": linha, "erros": erros_validacao[posicao]})
+            elif registro["email"] in emails_vistos:
+                resultado["erros"].append({"linha": linha, "erros": {"email": ["email repetido no arquivo"]}})
+            else:
+                emails_vistos.add(registro["email"])
+                validos.append((linha, registro))
+
+        # Uma única consulta IN para os emails do lote que já existem no banco
+        existentes = set(db.session.execute(
+            db.select(usuario_models.Usuario_model.email)
+            .where(usuario_models.Usuario_model.email.in_([r["email"] for _, r in validos]))
+        ).scalars())
+        novos = []
+        for linha, registro in validos:
+            if registro["email"] in existentes:
+                resultado["erros"].append({"linha": linha, "erros": {"email": ["email ja cadastrado"]}})
+            else:
+                novos.append((linha, registro))
+
+        if not novos:
+            continue
+
+        hashes = senha_services.gerar_hashes([r["senha"] for _, r in novos])
+        linhas_banco = [
+            {"nome": r["nome"], "email": r["email"], "telefone": r["telefone"], "senha": hash_senha}
+            for (_, r), hash_senha in zip(novos, hashes)
+        ]
+
+        try:
+            db.session.execute(db.insert(usuario_models.Usuario_model), linhas_banco)
+            db.session.commit()
+            resultado["importados"] += len(linhas_banco)
+        except IntegrityError:
+            # Algum email foi cadastrado por outra requisição no meio do lote: insere um a um
+            db.session.rollback()
+            for (linha, _), linha_banco in zip(novos, linhas_banco):
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(db.insert(usuario_models.Usuario_model), [linha_banco])
+                    resultado["importados"] += 1
+                except IntegrityError as e:
+                    if not _email_duplicado(e):
+                        raise
+                    resultado["erros"].append({"linha": linha, "erros": {"email": ["email ja cadastrado"]}})
+            db.session.commit()
+
+    return resultado
+
+
+# divide um iterável em lotes, devolvendo também a posição inicial de cada lote
+def _em_lotes(registros, tamanho_lote):
+    lote = []
+    inicio = 0
+    for registro in registros:
+        lote.append(registro)
+        if len(lote) == tamanho_lote:
+            yield inicio, lote
+            inicio += len(lote)
+            lote = []
+    if lote:
+        yield inicio, lote
+
+
 #listar usuarios
 def listar_usuario():
     usuario_db = usuario_models.Usuario_model.query.all()  #faz uma busca e retorna todos os usuários do banco
@@ -25,6 +133,102 @@ def listar_usuario():
     ]
     return usuario_enti
 
+# listar usuarios paginados por id (keyset): retorna a página e o cursor da próxima
+# cada usuário vem como uma linha com as colunas pedidas (que devem incluir o id)
+def listar_usuario_pagina(limite, cursor=None, colunas=('id', 'nome', 'email', 'telefone')):
+    Usuario_model = usuario_models.Usuario_model
+    consulta = db.select(*[getattr(Usuario_model, coluna) for coluna in colunas]).order_by(Usuario_model.id)
+    if cursor:
+        consulta = consulta.where(Usuario_model.id > cursor)  # continua depois do último id visto
+
+    linhas = db.session.execute(consulta.limit(limite + 1)).all()  # um a mais para saber se existe próxima página
+    proximo_cursor = linhas[limite - 1].id if len(linhas) > limite else None
+    return linhas[:limite], proximo_cursor
+
+
+# percorre todos os usuarios em lotes com cursor do lado do servidor, sem carregar a tabela inteira
+def iterar_usuarios(colunas, cursor=None, tamanho_lote=500):
+    Usuario_model = usuario_models.Usuario_model
+    consulta = db.select(*[getattr(Usuario_model, coluna) for coluna in colunas]).order_by(Usuario_model.id)
+    if cursor:
+        consulta = consulta.where(Usuario_model.id > cursor)
+
+    resultado = db.session.execute(consulta.execution_options(yield_per=tamanho_lote))
+    for linha in resultado:
+        yield linha
+
+
+# busca as colunas pedidas de um usuário (tupla), sem montar o objeto do modelo; None se não existir
+def buscar_usuario_colunas(id, colunas):
+    Usuario_model = usuario_models.Usuario_model
+    return db.session.execute(
+        db.select(*[getattr(Usuario_model, coluna) for coluna in colunas]).where(Usuario_model.id == id)
+    ).first()
+
+
+# palavras da busca (letras e números), como o tokenizador do FTS5 separa o texto indexado
+_PALAVRA = re.compile(r'\w+')
+_BUSCA_SQLITE = table('tb_usuario_busca', column('rowid'))
+
+# resultados da busca ordenados por relevância no SQLite. O bm25 do FTS5 percorre todos os
+# resultados para calcular as estatísticas (mais de 100 ms para "mar" em 500 mil usuários),
+# então a relevância vem das marcas do highlight() em no máximo CANDIDATOS_BUSCA resultados:
+# uma busca mais ampla que isso ordena só os primeiros (por id) e precisa ser refinada
+CANDIDATOS_BUSCA = 500
+_MARCA = '\x01'
+
+
+# busca usuários por começo de palavra do nome, email ou telefone, do mais relevante para o menos
+# retorna as linhas (colunas pedidas) da página e se existe uma próxima página
+def buscar_usuarios(texto, limite=20, pagina=1, colunas=('id', 'nome', 'email', 'telefone')):
+    Usuario_model = usuario_models.Usuario_model
+    consulta = db.select(*[getattr(Usuario_model, coluna) for coluna in colunas])
+
+    if db.session.get_bind().dialect.name == 'sqlite':
+        # FTS5: todas as palavras, cada uma como prefixo ("ana"* "sil"*)
+        palavras = _PALAVRA.findall(texto or '')
+        if not palavras:
+            return [], False
+        expressao = ' '.join(f'"{palavra}"*' for palavra in palavras)
+        indice = literal_column('tb_usuario_busca')
+        candidatos = (
+            db.select(_BUSCA_SQLITE.c.rowid.label('id'),
+                      func.highlight(indice, 0, _MARCA, '').label('nome'),
+                      func.highlight(indice, 1, _MARCA, '').label('email'))
+            .select_from(_BUSCA_SQLITE)
+            .where(indice.op('MATCH')(expressao))
+            .limit(CANDIDATOS_BUSCA)
+            .subquery()
+        )
+        # Mais palavras encontradas no nome, nome começando pela busca, encontrado no email, e por nome
+        consulta = (
+            consulta.select_from(candidatos)
+            .join(Usuario_model, Usuario_model.id == candidatos.c.id)
+            .order_by(
+                (func.length(candidatos.c.nome) - func.length(func.replace(candidatos.c.nome, _MARCA, ''))).desc(),
+                (func.substr(candidatos.c.nome, 1, 1) == _MARCA).desc(),
+                (func.instr(candidatos.c.email, _MARCA) > 0).desc(),
+                Usuario_model.nome,
+                Usuario_model.id)
+        )
+    else:
+        # Sem FTS (MySQL): o texto inteiro como prefixo, pelos índices de nome, email e telefone;
+        # quem bate pelo nome vem antes de quem bate pelo email, que vem antes do telefone
+        texto = (texto or '').strip()
+        if not texto:
+            return [], False
+        prefixo = texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        condicoes = [campo.like(prefixo, escape='\\')
+                     for campo in (Usuario_model.nome, Usuario_model.email, Usuario_model.telefone)]
+        consulta = consulta.where(or_(*condicoes)).order_by(
+            case((condicoes[0], 0), (condicoes[1], 1), else_=2), Usuario_model.nome, Usuario_model.id)
+
+    linhas = db.session.execute(
+        consulta.limit(limite + 1).offset((pagina - 1) * limite)  # um a mais para saber se existe próxima página
+    ).all()
+    return linhas[:limite], len(linhas) > limite
+
+
 def listar_usuario_id(id):
     try:
         #buscar usuario
@@ -35,6 +239,12 @@ def listar_usuario_id(id):
         print(f"erro ao listar usuário por id {e}")
         return None
 
+# versão do usuário (incrementada a cada alteração) sem carregar o registro; None se não existir
+def versao_usuario(id):
+    return db.session.execute(
+        db.select(usuario_models.Usuario_model.versao).where(usuario_models.Usuario_model.id == id)
+    ).scalar()
+
 def excluir_usuario(id):
     # Busca o usuário pelo id
     usuario_db = usuario_models.Usuario_model.query.get(id)
@@ -65,6 +275,18 @@ def editar_usuario(id, usuario_entitie):
 
 
 
+# autentica o usuario pelo email e senha; refaz o hash se os rounds configurados mudaram
+def autenticar_usuario(email, senha):
+    usuario_db = usuario_models.Usuario_model.query.filter_by(email = email).first()
+    if not usuario_db or not usuario_db.verificar_senha(senha):
+        return None
+
+    if usuario_db.precisa_rehash():
+        usuario_db.gen_senha(senha)  # a senha em texto só está disponível no login
+        db.session.commit()
+    return usuario_db
+
+
 def listar_usuario_email(email):
     usuario_db = usuario_models.Usuario_model.query.filter_by(email = email).first()
 
@@ -0,0 +1,216 @@
+from datetime import date, datetime, timedelta
+from flask_restful import Resource
+from flask import request, jsonify, make_response, current_app
+from src.services.agendamento_services import AgendamentoService
+from src.views.cache_http import responder_com_etag
+from src import api
+
+
+# Converte a data recebida na query string (AAAA-MM-DD)
+def ler_data(nome):
+    valor = request.args.get(nome)
+    if not valor:
+        raise ValueError(f"parâmetro '{nome}' é obrigatório")
+    return date.fromisoformat(valor)
+
+
+# Converte data e hora opcionais recebidas na query string (ISO 8601)
+def ler_data_hora(nome):
+    valor = request.args.get(nome)
+    return datetime.fromisoformat(valor) if valor else None
+
+
+# Converte um booleano do corpo JSON: true/false, ou os textos "true"/"false"/"1"/"0"
+# (bool("false") seria True)
+def ler_booleano(valor, nome):
+    if isinstance(valor, bool):
+        return valor
+    if isinstance(valor, str) and valor.strip().lower() in ('true', '1', 'false', '0'):
+        return valor.strip().lower() in ('true', '1')
+    if isinstance(valor, int) and valor in (0, 1):
+        return bool(valor)
+    raise ValueError(f"campo '{nome}' deve ser true ou false")
+
+
+# Converte uma lista de ids separados por vírgula ("1,2,3")
+def ler_ids(nome):
+    valor = request.args.get(nome)
+    if not valor:
+        return None
+    return [int(id) for id in valor.split(',') if id.strip()]
+
+
+# Disponibilidade é pública: um proxy reverso pode repetir a resposta por alguns segundos
+def cache_disponibilidade():
+    return f"public, max-age={current_app.config.get('CACHE_DISPONIBILIDADE_SEGUNDOS', 0)}"
+
+
+# Horários disponíveis de um profissional em um dia
+class HorariosDisponiveis(Resource):
+    # Método GET: /profissional/<id>/horarios?data=AAAA-MM-DD
+    def get(self, id_profissional):
+        try:
+            data = ler_data('data')
+        except ValueError as e:
+            return make_response(jsonify({'message': str(e)}), 400)
+
+        # O ETag vem da geração da agenda do dia: 304 enquanto ninguém agendar ou cancelar.
+        # A mesma geração valida a resposta, para o ETag novo nunca levar horários de antes dela
+        geracao = AgendamentoService.geracao_agenda(id_profissional, data)
+
+        def listar():
+            resultado = AgendamentoService.listar_horarios_disponiveis(id_profissional, data, geracao)
+            if 'erro' in resultado:
+                return make_response(jsonify({'message': resultado['erro']}), 400)
+            return make_response(jsonify(resultado), 200)
+
+        versao = AgendamentoService.versao_disponibilidade([id_profissional], data, data, geracao)
+        return responder_com_etag(versao, listar, cache_disponibilidade())
+
+
+api.add_resource(HorariosDisponiveis, '/profissional/<int:id_profissional>/horarios')
+
+
+# Disponibilidade de vários profissionais em vários dias, em uma única requisição
+class DisponibilidadeLote(Resource):
+    # Método GET: /disponibilidade?inicio=AAAA-MM-DD&fim=AAAA-MM-DD[&profissionais=1,2][&formato=bits|intervalos]
+    def get(self):
+        try:
+            data_inicio = ler_data('inicio')
+            data_fim = ler_data('fim')
+            profissionais = ler_ids('profissionais')
+        except ValueError as e:
+            return make_response(jsonify({'message': str(e)}), 400)
+
+        def listar():
+            resultado = AgendamentoService.listar_horarios_disponiveis_lote(
+                profissionais, data_inicio, data_fim, request.args.get('formato', 'bits'))
+            if 'erro' in resultado:
+                return make_response(jsonify({'message': resultado['erro']}), 400)
+            return make_response(jsonify(resultado), 200)
+
+        versao = AgendamentoService.versao_disponibilidade(profissionais, data_inicio, data_fim)
+        return responder_com_etag(versao, listar, cache_disponibilidade())
+
+
+api.add_resource(DisponibilidadeLote, '/disponibilidade')
+
+
+# Primeiros horários livres, com qualquer profissional, em que cabem todos os serviços
+class ProximosHorarios(Resource):
+    # Método GET: /horarios/proximos?servicos=1,2[&inicio=][&fim=][&quantidade=5][&profissionais=1,2]
+    # Sem início, busca a partir de agora; sem fim, até 7 dias depois do início
+    def get(self):
+        try:
+            servicos = ler_ids('servicos')
+            if not servicos:
+                raise ValueError("parâmetro 'servicos' é obrigatório")
+            inicio = ler_data_hora('inicio') or datetime.utcnow()
+            fim = ler_data_hora('fim') or inicio + timedelta(days=7)
+            profissionais = ler_ids('profissionais')
+            quantidade = int(request.args.get('quantidade', 5))
+        except ValueError as e:
+            return make_response(jsonify({'message': str(e)}), 400)
+
+        resultado = AgendamentoService.buscar_proximos_horarios(
+            servicos, inicio, fim, quantidade, profissionais)
+        if 'erro' in resultado:
+            return make_response(jsonify({'message': resultado['erro']}), 400)
+        return make_response(jsonify(resultado), 200)
+
+
+api.add_resource(ProximosHorarios, '/horarios/proximos')
+
+
+# Série de agendamentos a partir de uma regra de recorrência
+class AgendamentoRecorrente(Resource):
+    # Método POST: /agendamento/recorrente
+    # {"id_user", "id_profissional", "servicos": [ids], "dt_atendimento": ISO 8601 (primeira ocorrência),
+    #  "regra": "FREQ=WEEKLY;INTERVAL=2;COUNT=13", "observacoes"?, "parcial"?: true}
+    def post(self):
+        dados = request.get_json(silent=True) or {}
+        try:
+            dt_atendimento = datetime.fromisoformat(dados['dt_atendimento'])
+        except (KeyError, TypeError, ValueError):
+            return make_response(jsonify({'message': "campo 'dt_atendimento' (ISO 8601) é obrigatório"}), 400)
+        if dt_atendimento.tzinfo is not None:
+            # Os horários da agenda são locais e sem fuso, como em todo o restante da API
+            return make_response(jsonify({'message': "campo 'dt_atendimento' deve ser informado sem fuso horário"}), 400)
+        if not dados.get('regra'):
+            return make_response(jsonify({'message': "campo 'regra' é obrigatório"}), 400)
+        try:
+            parcial = ler_booleano(dados.get('parcial', True), 'parcial')
+        except ValueError as e:
+            return make_response(jsonify({'message': str(e)}), 400)
+
+        resultado = AgendamentoService.criar_agendamentos_recorrentes(
+            dt_atendimento,
+            dados.get('id_user'),
+            dados.get('id_profissional'),
+            dados.get('servicos'),
+            dados['regra'],
+            observacoes=dados.get('observacoes'),
+            parcial=parcial)
+        if 'erro' in resultado:
+            return make_response(jsonify({'message': resultado['erro'], 'conflitos': resultado.get('conflitos', [])}), 400)
+        return make_response(jsonify(resultado), 201)
+
+
+api.add_resource(AgendamentoRecorrente, '/agendamento/recorrente')
+
+
+# Um agendamento pelo id (inclusive os já arquivados)
+class AgendamentoPorId(Resource):
+    # Método GET: /agendamento/<id>
+    def get(self, id_agendamento):
+        resultado = AgendamentoService.obter_agendamento(id_agendamento)
+        if 'erro' in resultado:
+            status = 404 if resultado['erro'] == 'Agendamento não encontrado' else 400
+            return make_response(jsonify({'message': resultado['erro']}), status)
+        return make_response(jsonify(resultado), 200)
+
+
+api.add_resource(AgendamentoPorId, '/agendamento/<int:id_agendamento>')
+
+
+# Registro de comparecimento (usado pelo encerramento em lote para cobrar as faltas)
+class ComparecimentoAgendamento(Resource):
+    # Método PUT: /agendamento/<id>/comparecimento  {"compareceu": true|false}
+    def put(self, id_agendamento):
+        dados = request.get_json(silent=True) or {}
+        if 'compareceu' not in dados:
+            return make_response(jsonify({'message': "campo 'compareceu' é obrigatório"}), 400)
+
+        resultado = AgendamentoService.registrar_comparecimento(id_agendamento, dados['compareceu'])
+        if 'erro' in resultado:
+            return make_response(jsonify({'message': resultado['erro']}), 400)
+        return make_response(jsonify(resultado), 200)
+
+
+api.add_resource(ComparecimentoAgendamento, '/agendamento/<int:id_agendamento>/comparecimento')
+
+
+# Agendamentos de um usuário, paginados por cursor
+class AgendamentosUsuario(Resource):
+    # Método GET: /usuario/<id>/agendamentos?[status=][&inicio=][&fim=][&limite=][&cursor=]
+    def get(self, id_usuario):
+        try:
+            data_inicio = ler_data_hora('inicio')
+            data_fim = ler_data_hora('fim')
+            limite = request.args.get('limite', type=int)
+        except ValueError as e:
+            return make_response(jsonify({'message': str(e)}), 400)
+
+        resultado = AgendamentoService.listar_agendamentos_usuario(
+            id_usuario,
+            status=request.args.get('status'),
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            limite=limite,
+            cursor=request.args.get('cursor'))
+        if 'erro' in resultado:
+            return make_response(jsonify({'message': resultado['erro']}), 400)
+        return make_response(jsonify(resultado), 200)
+
+
+api.add_resource(AgendamentosUsuario, '/usuario/<int:id_usuario>/agendamentos')
@@ -0,0 +1,18 @@
+from flask import request, make_response
+
+
+# Responde com ETag fraco e GET condicional: se o cliente (ou o proxy) já tem a versão
+# atual (If-None-Match), devolve 304 sem executar gerar_resposta (consulta + serialização).
+# A versão é lida antes dos dados: se mudar no meio, o ETag fica velho e só causa uma nova busca.
+def responder_com_etag(versao, gerar_resposta, cache_control):
+    etag = str(versao)
+    if request.if_none_match.contains_weak(etag):
+        resposta = make_response('', 304)
+    else:
+        resposta = gerar_resposta()
+        if resposta.status_code != 200:
+            return resposta  # erros não levam ETag nem são guardados em cache
+
+    resposta.set_etag(etag, weak=True)
+    resposta.headers['Cache-Control'] = cache_control
+    return resposta
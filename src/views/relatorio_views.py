@@ -0,0 +1,43 @@
+from flask_restful import Resource
+from flask import jsonify, make_response
+from src.services import relatorio_services
+from src.views.agendamento_views import ler_data
+from src import api
+
+
+# Receita, taxas e minutos agendados de um profissional, dia a dia (lidos do resumo diário)
+class RelatorioProfissional(Resource):
+    # Método GET: /relatorio/profissional/<id>?inicio=AAAA-MM-DD&fim=AAAA-MM-DD
+    def get(self, id_profissional):
+        try:
+            data_inicio = ler_data('inicio')
+            data_fim = ler_data('fim')
+        except ValueError as e:
+            return make_response(jsonify({'message': str(e)}), 400)
+
+        resultado = relatorio_services.relatorio_profissional(id_profissional, data_inicio, data_fim)
+        if 'erro' in resultado:
+            return make_response(jsonify({'message': resultado['erro']}), 400)
+        return make_response(jsonify(resultado), 200)
+
+
+api.add_resource(RelatorioProfissional, '/relatorio/profissional/<int:id_profissional>')
+
+
+# Totais do período de todos os profissionais
+class RelatorioProfissionais(Resource):
+    # Método GET: /relatorio/profissionais?inicio=AAAA-MM-DD&fim=AAAA-MM-DD
+    def get(self):
+        try:
+            data_inicio = ler_data('inicio')
+            data_fim = ler_data('fim')
+        except ValueError as e:
+            return make_response(jsonify({'message': str(e)}), 400)
+
+        resultado = relatorio_services.relatorio_profissionais(data_inicio, data_fim)
+        if 'erro' in resultado:
+            return make_response(jsonify({'message': resultado['erro']}), 400)
+        return make_response(jsonify(resultado), 200)
+
+
+api.add_resource(RelatorioProfissionais, '/relatorio/profissionais')
@@ -1,26 +1,67 @@
 from flask_restful import Resource
 from marshmallow import ValidationError
 from src.schemas import usuario_schemas
-from flask import request, jsonify, make_response
+from src.schemas.serializadores import codificar_json
+import csv
+import io
+from urllib.parse import urlencode
+from flask import request, jsonify, make_response, Response, stream_with_context
 from src.services import usuario_services
 from src import api
 from src.models.usuario_models import Usuario_model
 from src.entities import usuario_entitie
+from src.views.cache_http import responder_com_etag
+
+# Paginação da listagem de usuários
+LIMITE_PADRAO = 100
+LIMITE_MAXIMO = 1000
+TAMANHO_LOTE_NDJSON = 500  # usuários por pedaço enviado no streaming
+
+# Paginação da busca (ordenada por relevância, então paginada por número de página)
+LIMITE_BUSCA_PADRAO = 20
+LIMITE_BUSCA_MAXIMO = 100
+PAGINA_BUSCA_MAXIMA = 50  # páginas mais fundas custam caro: refine a busca
 
 # post, get, put, delete
 # lidar com todos os usuários
 class UsuarioList(Resource):
-    # Método GET: lista todos os usuários cadastrados
+    # Método GET: lista os usuários cadastrados, paginados por id
+    # ?limite=N&cursor=ID -> próxima página no cabeçalho X-Proximo-Cursor
+    # ?formato=ndjson (ou Accept: application/x-ndjson) -> transmite um usuário por linha
     def get(self):
-        usuarios = usuario_services.listar_usuario()  # Busca usuários no banco
+        cursor = request.args.get('cursor', type=int)
+        limite = request.args.get('limite', LIMITE_PADRAO, type=int)
+
+        serializador = usuario_schemas.usuario_serializador  # Compilado uma vez, trabalha direto nas colunas
+
+        if request.args.get('formato') == 'ndjson' or \
+                request.accept_mimetypes.best == 'application/x-ndjson':
+            # Gera as linhas sob demanda: a memória usada não depende do tamanho da tabela
+            def gerar_linhas():
+                lote = []
+                for linha in usuario_services.iterar_usuarios(serializador.colunas, cursor):
+                    lote.append(linha)
+                    if len(lote) == TAMANHO_LOTE_NDJSON:
+                        yield serializador.ndjson(lote)
+                        lote = []
+                if lote:
+                    yield serializador.ndjson(lote)
+
+            return Response(stream_with_context(gerar_linhas()), mimetype='application/x-ndjson')
 
-        if not usuarios:
+        limite = min(max(limite, 1), LIMITE_MAXIMO)
+        usuarios, proximo_cursor = usuario_services.listar_usuario_pagina(limite, cursor, serializador.colunas)  # Busca usuários no banco
+
+        if not usuarios and not cursor:
             # Retorna mensagem se não houver usuários cadastrados
             return make_response(jsonify({"mensage": "Não existe usuários"}))
-        
-        schema = usuario_schemas.UsuarioSchema(many=True)  # Instancia o schema para serializar vários usuários
-        # Retorna a lista de usuários serializada em formato JSON
-        return make_response(jsonify(schema.dump(usuarios)), 200)
+
+        # Retorna a página de usuários serializada em formato JSON
+        resposta = Response(serializador.json_lista(usuarios), 200, mimetype='application/json')
+        if proximo_cursor:
+            resposta.headers['X-Proximo-Cursor'] = str(proximo_cursor)
+            resposta.headers['Link'] = f'<{request.path}?limite={limite}&cursor={proximo_cursor}>; rel="next"'
+        return resposta
     
     # Método POST: será implementado para cadastrar novo usuário
     def post(self):
@@ -33,10 +74,6 @@ class UsuarioList(Resource):
             # Se houver erro de validação, retorna mensagem de erro e status 400
             return make_response(jsonify(err.messages), 400)
         
-        # Verifica se já existe um usuário com o mesmo email
-        if usuario_services.listar_usuario_email(dados['email']):
-            return make_response(jsonify({'message': 'email ja cadastrado'}), 400)
-        
         try:
             # Cria um novo objeto Usuario com os dados validados
             novo_usuario = usuario_entitie.Usuario (
@@ -48,8 +85,13 @@ class UsuarioList(Resource):
 
             # Chama o serviço para cadastrar o usuário no banco
             resultado = usuario_services.cadastrar_usuario(novo_usuario)
-            # Retorna o usuário cadastrado (serializado) e status 201 (criado)
-            return make_response(jsonify(schema.dump(resultado)), 201)
+            # Retorna o usuário cadastrado (serializado, sem a senha) e status 201 (criado)
+            return Response(codificar_json(usuario_schemas.usuario_serializador.de_objeto(resultado)),
+                            201, mimetype='application/json')
+        
+        except usuario_services.EmailJaCadastradoError:
+            # O banco recusou o email repetido (constraint UNIQUE)
+            return make_response(jsonify({'message': 'email ja cadastrado'}), 400)
         
         except Exception as e:
             # Se ocorrer algum erro, retorna mensagem de erro e status 400
@@ -61,17 +103,51 @@ class UsuarioList(Resource):
 api.add_resource(UsuarioList, '/usuario')
 
 
+class UsuarioBusca(Resource):
+    # Método GET: busca por parte do nome, email ou telefone, do mais relevante para o menos
+    # ?q=texto[&limite=N][&pagina=P] -> próxima página no cabeçalho X-Proxima-Pagina
+    def get(self):
+        texto = request.args.get('q', '').strip()
+        if not texto:
+            return make_response(jsonify({'message': "parâmetro 'q' é obrigatório"}), 400)
+        limite = min(max(request.args.get('limite', LIMITE_BUSCA_PADRAO, type=int), 1), LIMITE_BUSCA_MAXIMO)
+        pagina = request.args.get('pagina', 1, type=int)
+        if not 1 <= pagina <= PAGINA_BUSCA_MAXIMA:
+            return make_response(jsonify({'message': f'pagina deve estar entre 1 e {PAGINA_BUSCA_MAXIMA}'}), 400)
+
+        serializador = usuario_schemas.usuario_serializador
+        usuarios, tem_proxima = usuario_services.buscar_usuarios(texto, limite, pagina, serializador.colunas)
+
+        resposta = Response(serializador.json_lista(usuarios), 200, mimetype='application/json')
+        if tem_proxima and pagina < PAGINA_BUSCA_MAXIMA:
+            resposta.headers['X-Proxima-Pagina'] = str(pagina + 1)
+            resposta.headers['Link'] = f'<{request.path}?{urlencode({"q": texto, "limite": limite, "pagina": pagina + 1})}>; rel="next"'
+        return resposta
+
+
+api.add_resource(UsuarioBusca, '/usuario/search')
+
+
 class UsuarioResource(Resource):
     # Método GET: busca um usuário pelo id
+    # Responde 304 (If-None-Match) enquanto a versão do usuário não mudar
     def get(self, id_usuario):
-        usuario_encontrado = usuario_services.listar_usuario_id(id_usuario)  # Busca usuário pelo id
-        if not usuario_encontrado:
-            # Retorna mensagem se não encontrar o usuário
-            return make_response(jsonify({'message': 'usuario não encontrado'}), 400)
-        
-        schema = usuario_schemas.UsuarioSchema()  # Instancia o schema para serializar o usuário
-        # Retorna o usuário serializado em formato JSON
-        return make_response(jsonify(schema.dump(usuario_encontrado)), 200)
+        serializador = usuario_schemas.usuario_serializador
+
+        def buscar():
+            usuario_encontrado = usuario_services.buscar_usuario_colunas(id_usuario, serializador.colunas)  # Busca usuário pelo id
+            if not usuario_encontrado:
+                # Retorna mensagem se não encontrar o usuário
+                return make_response(jsonify({'message': 'usuario não encontrado'}), 400)
+
+            # Retorna o usuário serializado em formato JSON
+            return Response(serializador.json(usuario_encontrado), 200, mimetype='application/json')
+
+        versao = usuario_services.versao_usuario(id_usuario)
+        if versao is None:
+            return buscar()
+        # Dados pessoais: só o navegador guarda, e sempre revalida com o ETag
+        return responder_com_etag(f"{id_usuario}-{versao}", buscar, 'private, no-cache')
     
     # Método PUT: será implementado para editar usuário
     def put(self, id_usuario):
@@ -92,4 +168,39 @@ class UsuarioResource(Resource):
             return make_response(jsonify({'message': f'Erro ao excluir usuário: {str(e)}'}), 400)
 
 
-api.add_resource(UsuarioResource, "/usuario/<int:id_usuario>")
\ No newline at end of file
+api.add_resource(UsuarioResource, "/usuario/<int:id_usuario>")
+
+class UsuarioLogin(Resource):
+    # Método POST: autentica o usuário pelo email e senha
+    def post(self):
+        dados = request.json or {}
+        if not dados.get('email') or not dados.get('senha'):
+            return make_response(jsonify({'message': 'email e senha são obrigatórios'}), 400)
+
+        usuario = usuario_services.autenticar_usuario(dados['email'], dados['senha'])
+        if not usuario:
+            return make_response(jsonify({'message': 'email ou senha inválidos'}), 401)
+        return make_response(jsonify({'message': 'login realizado', 'id': usuario.id}), 200)
+
+
+api.add_resource(UsuarioLogin, "/usuario/login")
+
+
+
+class UsuarioBulk(Resource):
+    # Método POST: importa vários usuários de uma vez
+    # Aceita uma lista JSON ou um CSV (Content-Type: text/csv) com as colunas nome,email,telefone,senha
+    def post(self):
+        if request.mimetype == 'text/csv':
+            # Lê o CSV direto do corpo da requisição, linha a linha
+            registros = csv.DictReader(io.TextIOWrapper(request.stream, encoding='utf-8'))
+        else:
+            registros = request.get_json(silent=True)
+            if not isinstance(registros, list):
+                return make_response(jsonify({'message': 'envie uma lista de usuários'}), 400)
+
+        resultado = usuario_services.importar_usuarios(registros)
+        return make_response(jsonify(resultado), 200)
+
+
+api.add_resource(UsuarioBulk, "/usuario/bulk")